@@ -8,7 +8,7 @@ pycodestyle *.py */*.py
 
 export PYTHONPATH=`pwd`
 
-pylint services/ letsgo.py instance.py mission.py
+pylint services/ letsgo.py instance.py mission.py scheduler.py missionclock.py loadtest.py fakes/
 mypy .
 
-pytest -m "not integration"
+pytest -m "not integration and not benchmark"
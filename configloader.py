@@ -1,48 +1,306 @@
 """
 Parser to load config for mission/participants
+YAML is parsed with libyaml when PyYAML was built with it. Validated
+configs can be cached on disk by content hash, so an unchanged file is
+loaded without parsing or validating it again.
 """
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
-from typing import Any, cast
+import logging
+import os
+import pathlib
+import pickle
+import stat
+import tempfile
+import threading
+from typing import Any, Callable, TypeVar, cast
 
 import yaml
 
-from configmodels import ConfigError, MissionConfig, ParticipantConfig
+import configmodels
+from configmodels import (
+    AssetConfig,
+    ConfigError,
+    MissionConfig,
+    ParticipantConfig,
+    POIConfig,
+)
 
+log = logging.getLogger(__name__)
 
-def load_config(filename: str) -> dict[str, Any]:
+_SafeLoader: Any = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_T = TypeVar('_T')
+
+# YAML mission files larger than this build each asset and POI as it is
+# read, instead of building the whole document first
+STREAM_BYTES = 1024 * 1024
+
+_YAML_EXTENSIONS = ('.yml', '.yaml')
+
+
+class _CacheSettings:
+    # pylint: disable=R0903
     """
-    Load the config from a yaml or json file.
-    Raises ValueError for unsupported extensions.
+    Where validated configs are cached, if anywhere.
     """
-    if filename.endswith('.yml') or filename.endswith('.yaml'):
-        with open(filename, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
-    elif filename.endswith('.json'):
-        with open(filename, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-    else:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.directory: str | None = os.environ.get('IMT_CONFIG_CACHE') or None
+
+
+_CACHE = _CacheSettings()
+
+
+def configure_cache(directory: str | None) -> None:
+    """
+    Cache validated configs in `directory`, or stop caching if None.
+    The cache holds pickles, so it is ignored unless it belongs to this
+    user and nobody else can write to it.
+    """
+    with _CACHE.lock:
+        _CACHE.directory = directory
+
+
+def _check_extension(filename: str) -> None:
+    if not filename.endswith((*_YAML_EXTENSIONS, '.json')):
         raise ValueError(
             f"{filename}: unsupported file extension"
             " (expected .yml, .yaml, or .json)")
+
+
+def _parse(filename: str, text: str) -> dict[str, Any]:
+    if filename.endswith(_YAML_EXTENSIONS):
+        data = yaml.load(text, Loader=_SafeLoader)
+    else:
+        data = json.loads(text)
     if not isinstance(data, dict):
         raise ConfigError(f"{filename}: config root must be an object")
     return cast(dict[str, Any], data)
 
 
+def _read(filename: str) -> str:
+    with open(filename, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def load_config(filename: str) -> dict[str, Any]:
+    """
+    Load the config from a yaml or json file.
+    Raises ValueError for unsupported extensions.
+    """
+    _check_extension(filename)
+    return _parse(filename, _read(filename))
+
+
+class _Unstreamable(Exception):
+    """Raised when a document needs the full parser, e.g. for aliases."""
+
+
+def _compose(loader: Any) -> yaml.Node:
+    """
+    Build the node starting at the loader's next event
+    """
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent) or event.anchor is not None:
+        raise _Unstreamable()
+    tag = event.tag
+    # libyaml's marks are a different class from PyYAML's
+    start_mark: Any = event.start_mark
+    if isinstance(event, yaml.ScalarEvent):
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        end_mark: Any = event.end_mark
+        return yaml.ScalarNode(
+            tag, event.value, start_mark, end_mark, style=event.style)
+    if isinstance(event, yaml.SequenceStartEvent):
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        items = []
+        while not loader.check_event(yaml.SequenceEndEvent):
+            items.append(_compose(loader))
+        end = loader.get_event()
+        return yaml.SequenceNode(
+            tag, items, start_mark, end.end_mark,
+            flow_style=event.flow_style)
+    if tag is None or tag == '!':
+        tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+    pairs = []
+    while not loader.check_event(yaml.MappingEndEvent):
+        key = _compose(loader)
+        pairs.append((key, _compose(loader)))
+    end = loader.get_event()
+    return yaml.MappingNode(
+        tag, pairs, start_mark, end.end_mark,
+        flow_style=event.flow_style)
+
+
+def _construct(loader: Any) -> Any:
+    return loader.construct_document(_compose(loader))
+
+
+_ITEM_BUILDERS: dict[str, Callable[[Any, str, str], Any]] = {
+    'assets': AssetConfig.from_dict,
+    'POIs': POIConfig.from_dict,
+}
+
+
+def _stream_mission(filename: str, text: str) -> dict[str, Any]:
+    """
+    Read a YAML mission's top-level mapping one entry at a time,
+    validating each asset and POI as soon as it has been read
+    """
+    loader = _SafeLoader(text)
+    try:
+        loader.get_event()
+        loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent) or (
+                loader.peek_event().anchor is not None):
+            raise _Unstreamable()
+        loader.get_event()
+        data: dict[str, Any] = {}
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _construct(loader)
+            if not isinstance(key, str) or key == '<<':
+                raise _Unstreamable()
+            build = _ITEM_BUILDERS.get(key)
+            if build is None or not loader.check_event(
+                    yaml.SequenceStartEvent):
+                data[key] = _construct(loader)
+                continue
+            if loader.peek_event().anchor is not None:
+                raise _Unstreamable()
+            loader.get_event()
+            items: list[Any] = []
+            while not loader.check_event(yaml.SequenceEndEvent):
+                prefix = f"{key}[{len(items)}]"
+                items.append(build(_construct(loader), filename, prefix))
+            loader.get_event()
+            data[key] = items
+        loader.get_event()
+        loader.get_event()
+        if not loader.check_event(yaml.StreamEndEvent):
+            raise _Unstreamable()
+        return data
+    finally:
+        loader.dispose()
+
+
+def _parse_mission(filename: str, text: str) -> MissionConfig:
+    if filename.endswith(_YAML_EXTENSIONS) and len(text) > STREAM_BYTES:
+        try:
+            data = _stream_mission(filename, text)
+        except _Unstreamable:
+            log.debug("%s: cannot be streamed, parsing it whole", filename)
+        else:
+            return MissionConfig.from_dict(data, filename)
+    return MissionConfig.from_dict(_parse(filename, text), filename)
+
+
+def _parse_participant(filename: str, text: str) -> ParticipantConfig:
+    return ParticipantConfig.from_dict(_parse(filename, text), filename)
+
+
+@functools.cache
+def _code_digest() -> bytes:
+    """
+    Hash of the config models and of this loader, so cached configs
+    built by older code are not used
+    """
+    digest = hashlib.sha256()
+    for source in (configmodels.__file__, __file__):
+        digest.update(pathlib.Path(source).read_bytes())
+    return digest.digest()
+
+
+def _cache_path(directory: str, filename: str, text: str) -> str:
+    digest = hashlib.sha256(_code_digest())
+    digest.update(os.path.splitext(filename)[1].encode())
+    digest.update(text.encode('utf-8'))
+    return os.path.join(directory, f'{digest.hexdigest()}.pickle')
+
+
+def _is_private(directory: str) -> bool:
+    """
+    Whether `directory` exists and only this user can write to it.
+    Anyone else who could write cached pickles could run code here.
+    """
+    try:
+        info = os.stat(directory)
+    except FileNotFoundError:
+        return False
+    if info.st_uid != os.getuid() or info.st_mode & (
+            stat.S_IWGRP | stat.S_IWOTH):
+        log.warning(
+            "Not using config cache %s: it must belong to this user and"
+            " not be writable by anyone else", directory)
+        return False
+    return True
+
+
+def _read_cache(directory: str, path: str, expected: type[_T]) -> _T | None:
+    if not _is_private(directory):
+        return None
+    try:
+        with open(path, 'rb') as file:
+            config = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-exception-caught
+        log.debug("Ignoring unreadable cached config %s", path, exc_info=True)
+        return None
+    return config if isinstance(config, expected) else None
+
+
+def _write_cache(directory: str, path: str, config: object) -> None:
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _is_private(directory):
+            return
+        with tempfile.NamedTemporaryFile(
+                dir=directory, suffix='.tmp', delete=False) as file:
+            pickle.dump(config, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file.name, path)
+    except OSError:
+        log.warning("Could not cache config in %s", directory, exc_info=True)
+
+
+def _load(
+        filename: str,
+        expected: type[_T],
+        parse: Callable[[str, str], _T]) -> _T:
+    """
+    Parse and validate `filename`, or take it from the cache if the
+    same content has been validated before
+    """
+    _check_extension(filename)
+    text = _read(filename)
+    directory = _CACHE.directory
+    if directory is None:
+        return parse(filename, text)
+    path = _cache_path(directory, filename, text)
+    config = _read_cache(directory, path, expected)
+    if config is None:
+        config = parse(filename, text)
+        _write_cache(directory, path, config)
+    else:
+        log.debug("Loaded %s from the config cache", filename)
+    return config
+
+
 def load_mission_config(filename: str) -> MissionConfig:
     """
     Load and validate a mission config file.
     """
-    data = load_config(filename)
-    return MissionConfig.from_dict(data, filename)
+    return _load(filename, MissionConfig, _parse_mission)
 
 
 def load_participant_config(filename: str) -> ParticipantConfig:
     """
     Load and validate a participant config file.
     """
-    data = load_config(filename)
-    return ParticipantConfig.from_dict(data, filename)
+    return _load(filename, ParticipantConfig, _parse_participant)
@@ -173,15 +173,18 @@ class MissionConfig:
         name = _require(data, 'name', filepath, '')
         description = _require(data, 'description', filepath, '')
         assets_data = _require_list(data, 'assets', filepath, '')
+        # The streaming loader validates items as it reads them
         assets = [
-            AssetConfig.from_dict(a, filepath, f"assets[{i}]")
+            a if isinstance(a, AssetConfig)
+            else AssetConfig.from_dict(a, filepath, f"assets[{i}]")
             for i, a in enumerate(assets_data)
         ]
         pois = []
         if data.get('POIs') is not None:
             pois_data = _require_list(data, 'POIs', filepath, '')
             pois = [
-                POIConfig.from_dict(poi, filepath, f"POIs[{i}]")
+                poi if isinstance(poi, POIConfig)
+                else POIConfig.from_dict(poi, filepath, f"POIs[{i}]")
                 for i, poi in enumerate(pois_data)
             ]
         return cls(
@@ -0,0 +1,3 @@
+"""
+In-process stand-ins for Docker and SMM, for load testing the runner
+"""
@@ -0,0 +1,734 @@
+"""
+In-memory Docker API
+Covers the parts of docker.DockerClient the services use: containers,
+networks, volumes, images and the events stream. Nothing runs; a started
+container with a healthcheck turns healthy after `boot_time` seconds and
+reports it on the events stream.
+"""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import secrets
+import threading
+from typing import Any, Iterable, Iterator
+
+import docker.errors
+import requests
+from docker.models.containers import ExecResult
+
+from .faults import Faults
+
+_CONFLICT = 409
+_NANOSECONDS = 1_000_000_000
+
+
+def _api_error(message: str) -> docker.errors.APIError:
+    return docker.errors.APIError(message)
+
+
+def _conflict(message: str) -> docker.errors.APIError:
+    response = requests.Response()
+    response.status_code = _CONFLICT
+    return docker.errors.APIError(
+        message,
+        response=response,
+        explanation=message)
+
+
+def _matches_labels(labels: dict[str, str], filters: dict[str, Any]) -> bool:
+    wanted = filters.get('label') or []
+    if isinstance(wanted, str):
+        wanted = [wanted]
+    for label in wanted:
+        key, has_value, value = str(label).partition('=')
+        if key not in labels or (has_value and labels[key] != value):
+            return False
+    return True
+
+
+class FakeImage:
+    # pylint: disable=R0903
+    """A pulled image."""
+
+    def __init__(self, name: str) -> None:
+        self.id = f'sha256:{secrets.token_hex(32)}'
+        self.tags = [name]
+
+
+class FakeVolume:
+    # pylint: disable=R0903
+    """A named volume."""
+
+    def __init__(
+            self,
+            client: FakeDockerClient,
+            name: str,
+            labels: dict[str, str]) -> None:
+        self.client = client
+        self.name = name
+        self.id = name
+        self.attrs: dict[str, Any] = {'Name': name, 'Labels': labels}
+
+    def remove(self, force: bool = False) -> None:
+        """
+        Remove this volume
+        """
+        # pylint: disable=unused-argument
+        self.client.faults.check('volume.remove', _api_error)
+        self.client.remove_volume(self)
+
+
+class FakeNetwork:
+    """A bridge network."""
+
+    def __init__(
+            self,
+            client: FakeDockerClient,
+            name: str,
+            labels: dict[str, str]) -> None:
+        self.client = client
+        self.name = name
+        self.id = secrets.token_hex(32)
+        self.attrs: dict[str, Any] = {'Name': name, 'Labels': labels}
+        self.containers: list[FakeContainer] = []
+
+    def connect(self, container: FakeContainer) -> None:
+        """
+        Attach `container` to this network
+        """
+        self.client.faults.check('network.connect', _api_error)
+        with self.client.lock:
+            if container in self.containers:
+                raise _conflict(
+                    f"endpoint with name {container.name} already exists "
+                    f"in network {self.name}")
+            self.containers.append(container)
+            container.networks.append(self)
+
+    def disconnect(
+            self,
+            container: FakeContainer,
+            force: bool = False) -> None:
+        """
+        Detach `container` from this network
+        """
+        # pylint: disable=unused-argument
+        self.client.faults.check('network.disconnect', _api_error)
+        with self.client.lock:
+            if container not in self.containers:
+                raise _api_error(
+                    f"container {container.name} is not connected to "
+                    f"network {self.name}")
+            self.containers.remove(container)
+            container.networks.remove(self)
+
+    def remove(self) -> None:
+        """
+        Remove this network; it must have no containers attached
+        """
+        self.client.faults.check('network.remove', _api_error)
+        self.client.remove_network(self)
+
+
+class FakeContainer:
+    # pylint: disable=R0902
+    """A container that only keeps state."""
+
+    def __init__(
+            self,
+            client: FakeDockerClient,
+            image: str,
+            name: str,
+            labels: dict[str, str],
+            environment: list[str],
+            ports: dict[str, Any],
+            healthcheck: dict[str, Any] | None) -> None:
+        # pylint: disable=R0913,R0917
+        self.client = client
+        self.id = secrets.token_hex(32)
+        self.name = name
+        self.image = image
+        self.labels = labels
+        self.status = 'created'
+        self.ports = ports
+        self.healthcheck = healthcheck
+        self.health: str | None = None
+        self.networks: list[FakeNetwork] = []
+        self._timer: threading.Timer | None = None
+        self.attrs: dict[str, Any] = {
+            'Id': self.id,
+            'Name': f'/{name}',
+            'Config': {
+                'Image': image,
+                'Env': list(environment),
+                'Labels': labels,
+            },
+            'State': {'Status': self.status},
+            'NetworkSettings': {'Ports': {}},
+        }
+
+    def reload(self) -> None:
+        """
+        Refresh attrs from the fake daemon
+        """
+        self.client.faults.check('container.reload', _api_error)
+        with self.client.lock:
+            self.client.require_container(self)
+            state: dict[str, Any] = {'Status': self.status}
+            if self.health is not None:
+                state['Health'] = {'Status': self.health}
+            self.attrs['State'] = state
+            self.attrs['Name'] = f'/{self.name}'
+
+    def start(self) -> None:
+        """
+        Start the container, publishing its ports
+        """
+        self.client.faults.check('container.start', _api_error)
+        with self.client.lock:
+            self.client.require_container(self)
+            if self.status == 'running':
+                return
+            self.status = 'running'
+            self.attrs['NetworkSettings']['Ports'] = {
+                port: [self.client.bind_port(binding)]
+                for port, binding in self.ports.items()
+            }
+            if self.healthcheck is not None:
+                self.health = 'starting'
+                self._schedule_health_check(self.client.boot_time)
+
+    def _schedule_health_check(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self._health_check)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _health_check(self) -> None:
+        """
+        Report healthy, and keep reporting it every healthcheck interval,
+        so a waiter that subscribed late still hears about it
+        """
+        with self.client.lock:
+            if self.status != 'running' or self.healthcheck is None:
+                return
+            self.health = 'healthy'
+            interval = self.healthcheck.get('interval') or _NANOSECONDS
+            self._schedule_health_check(interval / _NANOSECONDS)
+        self.client.publish(self, 'health_status: healthy')
+
+    def _halt(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.status == 'running':
+            self.status = 'exited'
+            self.health = None
+            self.client.publish(self, 'die')
+
+    def stop(self) -> None:
+        """
+        Stop the container
+        """
+        self.client.faults.check('container.stop', _api_error)
+        with self.client.lock:
+            self.client.require_container(self)
+            self._halt()
+
+    def remove(self, force: bool = False) -> None:
+        """
+        Remove the container, which must be stopped unless `force`
+        """
+        self.client.faults.check('container.remove', _api_error)
+        with self.client.lock:
+            self.client.require_container(self)
+            if self.status == 'running' and not force:
+                raise _conflict(
+                    f"cannot remove container {self.name}: container is "
+                    "running")
+            self._halt()
+            self.client.remove_container(self)
+
+    def rename(self, name: str) -> None:
+        """
+        Rename the container
+        """
+        self.client.faults.check('container.rename', _api_error)
+        self.client.rename_container(self, name)
+
+    def exec_run(self, cmd: list[str]) -> ExecResult:
+        """
+        Run a command; only pg_isready's answer depends on the container
+        """
+        self.client.faults.check('container.exec_run', _api_error)
+        with self.client.lock:
+            self.client.require_container(self)
+            if self.status != 'running':
+                raise _conflict(f"container {self.name} is not running")
+            if cmd and cmd[0] == 'pg_isready' and self.health != 'healthy':
+                return ExecResult(2, b'no response\n')
+        return ExecResult(0, b'')
+
+    def logs(self, tail: int | str = 'all') -> bytes:
+        """
+        Container output; fake containers never print anything
+        """
+        # pylint: disable=unused-argument
+        self.client.faults.check('container.logs', _api_error)
+        return b''
+
+
+class FakeEventStream:
+    """Docker events, delivered until closed."""
+
+    _CLOSED = object()
+
+    def __init__(self, client: FakeDockerClient, actions: list[str]) -> None:
+        self._client = client
+        self._actions = actions
+        self._queue: queue.Queue[Any] = queue.Queue()
+
+    def wants(self, action: str) -> bool:
+        """
+        Whether this stream's filters let `action` through
+        """
+        return not self._actions or action.partition(':')[0] in self._actions
+
+    def put(self, event: dict[str, Any]) -> None:
+        """
+        Deliver an event
+        """
+        self._queue.put(event)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        while True:
+            event = self._queue.get()
+            if event is self._CLOSED:
+                return
+            yield event
+
+    def close(self) -> None:
+        """
+        End the stream
+        """
+        self._client.unsubscribe(self)
+        self._queue.put(self._CLOSED)
+
+
+class _Containers:
+    """client.containers"""
+
+    def __init__(self, client: FakeDockerClient) -> None:
+        self._client = client
+
+    def create(
+            self,
+            image: str,
+            command: str | list[str] | None = None,
+            **kwargs: Any) -> FakeContainer:
+        """
+        Create a container from a pulled image
+        """
+        # pylint: disable=unused-argument
+        self._client.faults.check('containers.create', _api_error)
+        self._client.images.require(image)
+        container = FakeContainer(
+            self._client,
+            image,
+            kwargs.get('name') or f'fake-{secrets.token_hex(6)}',
+            dict(kwargs.get('labels') or {}),
+            list(kwargs.get('environment') or []),
+            dict(kwargs.get('ports') or {}),
+            kwargs.get('healthcheck'))
+        self._client.add_container(container)
+        return container
+
+    def run(
+            self,
+            image: str,
+            command: str | list[str] | None = None,
+            **kwargs: Any) -> bytes:
+        """
+        Run a container to completion and return its output
+        """
+        # pylint: disable=unused-argument
+        self._client.faults.check('containers.run', _api_error)
+        self._client.images.require(image)
+        for volume in kwargs.get('volumes') or {}:
+            self._client.volumes.get(volume)
+        return b''
+
+    def get(self, container_id: str) -> FakeContainer:
+        """
+        Find a container by name or id
+        """
+        self._client.faults.check('containers.get', _api_error)
+        return self._client.find_container(container_id)
+
+    def list(
+            self,
+            all: bool = False,  # pylint: disable=redefined-builtin
+            filters: dict[str, Any] | None = None) -> list[FakeContainer]:
+        """
+        Containers matching the label filters; running ones unless `all`
+        """
+        self._client.faults.check('containers.list', _api_error)
+        return [
+            container for container in self._client.all_containers()
+            if (all or container.status == 'running')
+            and _matches_labels(container.labels, filters or {})
+        ]
+
+
+class _Networks:
+    """client.networks"""
+
+    def __init__(self, client: FakeDockerClient) -> None:
+        self._client = client
+
+    def create(
+            self,
+            name: str,
+            driver: str | None = None,
+            labels: dict[str, str] | None = None,
+            **kwargs: Any) -> FakeNetwork:
+        """
+        Create a network
+        """
+        # pylint: disable=unused-argument
+        self._client.faults.check('networks.create', _api_error)
+        network = FakeNetwork(self._client, name, dict(labels or {}))
+        self._client.add_network(network)
+        return network
+
+    def get(self, network_id: str) -> FakeNetwork:
+        """
+        Find a network by name or id
+        """
+        self._client.faults.check('networks.get', _api_error)
+        return self._client.find_network(network_id)
+
+    def list(
+            self,
+            names: Iterable[str] | None = None,
+            filters: dict[str, Any] | None = None) -> list[FakeNetwork]:
+        """
+        Networks matching the names and label filters
+        """
+        self._client.faults.check('networks.list', _api_error)
+        wanted = set(names) if names is not None else None
+        return [
+            network for network in self._client.all_networks()
+            if (wanted is None or network.name in wanted)
+            and _matches_labels(network.attrs['Labels'], filters or {})
+        ]
+
+
+class _Volumes:
+    """client.volumes"""
+
+    def __init__(self, client: FakeDockerClient) -> None:
+        self._client = client
+
+    def create(
+            self,
+            name: str,
+            labels: dict[str, str] | None = None,
+            **kwargs: Any) -> FakeVolume:
+        """
+        Create a volume, or return the existing one with that name
+        """
+        # pylint: disable=unused-argument
+        self._client.faults.check('volumes.create', _api_error)
+        return self._client.add_volume(
+            FakeVolume(self._client, name, dict(labels or {})))
+
+    def get(self, name: str) -> FakeVolume:
+        """
+        Find a volume by name
+        """
+        self._client.faults.check('volumes.get', _api_error)
+        return self._client.find_volume(name)
+
+    def list(self, filters: dict[str, Any] | None = None) -> list[FakeVolume]:
+        """
+        Volumes matching the label filters
+        """
+        self._client.faults.check('volumes.list', _api_error)
+        return [
+            volume for volume in self._client.all_volumes()
+            if _matches_labels(volume.attrs['Labels'], filters or {})
+        ]
+
+
+class _Images:
+    """client.images"""
+
+    def __init__(self, client: FakeDockerClient) -> None:
+        self._client = client
+        self._images: dict[str, FakeImage] = {}
+
+    def pull(self, repository: str, tag: str | None = None) -> FakeImage:
+        """
+        Pull an image
+        """
+        self._client.faults.check('images.pull', _api_error)
+        name = f'{repository}:{tag}' if tag else repository
+        with self._client.lock:
+            return self._images.setdefault(name, FakeImage(name))
+
+    def get(self, name: str) -> FakeImage:
+        """
+        Find a pulled image
+        """
+        self._client.faults.check('images.get', _api_error)
+        return self.require(name)
+
+    def require(self, name: str) -> FakeImage:
+        """
+        The pulled image `name`, without counting an API call
+        """
+        with self._client.lock:
+            image = self._images.get(name)
+        if image is None:
+            raise docker.errors.ImageNotFound(f"No such image: {name}")
+        return image
+
+
+class FakeDockerClient:
+    # pylint: disable=R0902
+    """
+    A docker.DockerClient that keeps everything in memory
+    Calls are counted, delayed and failed as `faults` says. Failures are
+    docker.errors.APIError, as a real daemon would raise.
+    """
+    FIRST_HOST_PORT = 49153
+
+    def __init__(
+            self,
+            faults: Faults | None = None,
+            boot_time: float = 0.05) -> None:
+        self.faults = faults or Faults()
+        self.boot_time = boot_time
+        self.lock = threading.RLock()
+        # By name, and by id
+        self._containers: dict[str, FakeContainer] = {}
+        self._container_ids: dict[str, FakeContainer] = {}
+        self._networks: dict[str, FakeNetwork] = {}
+        self._network_ids: dict[str, FakeNetwork] = {}
+        self._volumes: dict[str, FakeVolume] = {}
+        self._streams: list[FakeEventStream] = []
+        self._host_ports = itertools.count(self.FIRST_HOST_PORT)
+        self.containers = _Containers(self)
+        self.networks = _Networks(self)
+        self.volumes = _Volumes(self)
+        self.images = _Images(self)
+
+    def events(
+            self,
+            decode: bool = False,
+            filters: dict[str, Any] | None = None) -> FakeEventStream:
+        """
+        Subscribe to container events
+        """
+        # pylint: disable=unused-argument
+        self.faults.check('events', _api_error)
+        actions = (filters or {}).get('event') or []
+        stream = FakeEventStream(
+            self,
+            [actions] if isinstance(actions, str) else list(actions))
+        with self.lock:
+            self._streams.append(stream)
+        return stream
+
+    def close(self) -> None:
+        """
+        End every events stream
+        """
+        with self.lock:
+            streams = list(self._streams)
+        for stream in streams:
+            stream.close()
+
+    def publish(self, container: FakeContainer, action: str) -> None:
+        """
+        Send a container event to every subscriber
+        """
+        event = {
+            'Type': 'container',
+            'Action': action,
+            'id': container.id,
+            'Actor': {'ID': container.id, 'Attributes': {
+                'name': container.name}},
+        }
+        with self.lock:
+            streams = [s for s in self._streams if s.wants(action)]
+        for stream in streams:
+            stream.put(event)
+
+    def unsubscribe(self, stream: FakeEventStream) -> None:
+        """
+        Stop sending events to `stream`
+        """
+        with self.lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def bind_port(self, binding: Any) -> dict[str, str]:
+        """
+        A host port binding for a published container port
+        """
+        host_ip = '0.0.0.0'
+        host_port = None
+        if isinstance(binding, tuple):
+            host_ip, host_port = binding
+        elif binding is not None:
+            host_port = binding
+        if host_port is None:
+            host_port = next(self._host_ports)
+        return {'HostIp': host_ip, 'HostPort': str(host_port)}
+
+    def add_container(self, container: FakeContainer) -> None:
+        """
+        Register a new container, refusing duplicate names
+        """
+        with self.lock:
+            if container.name in self._containers:
+                raise _conflict(
+                    f'Conflict. The container name "/{container.name}" is '
+                    'already in use')
+            self._containers[container.name] = container
+            self._container_ids[container.id] = container
+
+    def require_container(self, container: FakeContainer) -> None:
+        """
+        Raise NotFound if `container` has been removed
+        """
+        with self.lock:
+            if container.id not in self._container_ids:
+                raise docker.errors.NotFound(
+                    f"No such container: {container.name}")
+
+    def find_container(self, container_id: str) -> FakeContainer:
+        """
+        The container with this name or id
+        """
+        with self.lock:
+            container = (
+                self._containers.get(container_id)
+                or self._container_ids.get(container_id))
+        if container is None:
+            raise docker.errors.NotFound(
+                f"No such container: {container_id}")
+        return container
+
+    def all_containers(self) -> list[FakeContainer]:
+        """
+        Every container
+        """
+        with self.lock:
+            return list(self._containers.values())
+
+    def rename_container(self, container: FakeContainer, name: str) -> None:
+        """
+        Give `container` a new, unused name
+        """
+        with self.lock:
+            self.require_container(container)
+            if name in self._containers:
+                raise _conflict(
+                    f'Conflict. The container name "/{name}" is already '
+                    'in use')
+            del self._containers[container.name]
+            container.name = name
+            self._containers[name] = container
+
+    def remove_container(self, container: FakeContainer) -> None:
+        """
+        Forget `container` and detach it from its networks
+        """
+        with self.lock:
+            self._container_ids.pop(container.id, None)
+            self._containers.pop(container.name, None)
+            for network in container.networks:
+                network.containers.remove(container)
+            container.networks.clear()
+
+    def add_network(self, network: FakeNetwork) -> None:
+        """
+        Register a new network, refusing duplicate names
+        """
+        with self.lock:
+            if network.name in self._networks:
+                raise _conflict(f"network with name {network.name} already "
+                                "exists")
+            self._networks[network.name] = network
+            self._network_ids[network.id] = network
+
+    def find_network(self, network_id: str) -> FakeNetwork:
+        """
+        The network with this name or id
+        """
+        with self.lock:
+            network = (
+                self._networks.get(network_id)
+                or self._network_ids.get(network_id))
+        if network is None:
+            raise docker.errors.NotFound(f"network {network_id} not found")
+        return network
+
+    def all_networks(self) -> list[FakeNetwork]:
+        """
+        Every network
+        """
+        with self.lock:
+            return list(self._networks.values())
+
+    def remove_network(self, network: FakeNetwork) -> None:
+        """
+        Forget `network`, which must have nothing attached
+        """
+        with self.lock:
+            if network.id not in self._network_ids:
+                raise docker.errors.NotFound(
+                    f"network {network.name} not found")
+            if network.containers:
+                raise _api_error(
+                    f"error while removing network: network {network.name} "
+                    f"id {network.id} has active endpoints")
+            del self._network_ids[network.id]
+            del self._networks[network.name]
+
+    def add_volume(self, volume: FakeVolume) -> FakeVolume:
+        """
+        Register a volume, or return the one already using its name
+        """
+        with self.lock:
+            return self._volumes.setdefault(volume.name, volume)
+
+    def find_volume(self, name: str) -> FakeVolume:
+        """
+        The volume called `name`
+        """
+        with self.lock:
+            volume = self._volumes.get(name)
+        if volume is None:
+            raise docker.errors.NotFound(f"get {name}: no such volume")
+        return volume
+
+    def all_volumes(self) -> list[FakeVolume]:
+        """
+        Every volume
+        """
+        with self.lock:
+            return list(self._volumes.values())
+
+    def remove_volume(self, volume: FakeVolume) -> None:
+        """
+        Forget `volume`
+        """
+        with self.lock:
+            if self._volumes.pop(volume.name, None) is None:
+                raise docker.errors.NotFound(
+                    f"get {volume.name}: no such volume")
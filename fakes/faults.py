@@ -0,0 +1,94 @@
+"""
+Latency, failure injection and call counting for the fake backends
+"""
+
+from __future__ import annotations
+
+import collections
+import random
+import threading
+import time
+from typing import Callable
+
+
+class InjectedFault(Exception):
+    """Raised by a fake when a failure was asked for and no backend
+    specific error type was given."""
+
+
+class Faults:
+    # pylint: disable=R0902
+    """
+    How a fake backend misbehaves
+    Every fake call is counted under an operation name, then delayed by
+    the latency for that operation and possibly failed. Failures are
+    either random, at `failure_rate`, or queued for a named operation
+    with fail_next().
+    """
+    def __init__(
+            self,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            failure_rate: float = 0.0,
+            seed: int | None = None,
+            sleep: Callable[[float], None] = time.sleep) -> None:
+        # pylint: disable=R0913,R0917
+        if not 0.0 <= failure_rate <= 1.0:
+            raise ValueError(
+                f"failure rate must be between 0 and 1, not {failure_rate}")
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._latencies: dict[str, float] = {}
+        self._fail_next: collections.Counter[str] = collections.Counter()
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.failures: collections.Counter[str] = collections.Counter()
+
+    def set_latency(self, operation: str, seconds: float) -> None:
+        """
+        Delay every `operation` call by `seconds` instead of the default
+        """
+        with self._lock:
+            self._latencies[operation] = seconds
+
+    def fail_next(self, operation: str, count: int = 1) -> None:
+        """
+        Fail the next `count` calls of `operation`
+        """
+        with self._lock:
+            self._fail_next[operation] += count
+
+    def check(
+            self,
+            operation: str,
+            error: Callable[[str], Exception] = InjectedFault) -> None:
+        """
+        Record a call of `operation`, wait out its latency and raise
+        `error` if it is due to fail
+        """
+        with self._lock:
+            self.calls[operation] += 1
+            delay = self._latencies.get(operation, self.latency)
+            if self.jitter:
+                delay += self._random.uniform(0.0, self.jitter)
+            fail = self._fail_next[operation] > 0
+            if fail:
+                self._fail_next[operation] -= 1
+            elif self.failure_rate:
+                fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures[operation] += 1
+        if delay > 0:
+            self._sleep(delay)
+        if fail:
+            raise error(f"Injected failure in {operation}")
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Call counts so far, by operation
+        """
+        with self._lock:
+            return dict(sorted(self.calls.items()))
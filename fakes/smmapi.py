@@ -0,0 +1,505 @@
+"""
+In-memory Search Management Map
+Answers the SMM web requests smm_client makes for the runner, so the real
+smm_client objects can be used against it without a server. Only the
+endpoints the runner uses exist; anything else gets a 404.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import requests
+
+from smm_client.connection import SMMConnection
+
+from .faults import Faults
+
+_ID = re.compile(r'/\d+(?=/|$)')
+_USER = re.compile(r'/user/[^/]+/')
+
+
+class FakeResponse:
+    """The parts of requests.Response that smm_client reads."""
+
+    def __init__(
+            self,
+            status_code: int,
+            url: str,
+            payload: Any = None) -> None:
+        self.status_code = status_code
+        self.url = url
+        self.history: list[FakeResponse] = []
+        self._payload = payload
+
+    @property
+    def text(self) -> str:
+        """
+        The body, as JSON text
+        """
+        return json.dumps(self._payload)
+
+    def json(self) -> Any:
+        """
+        The decoded body
+        """
+        if self._payload is None:
+            raise ValueError(f"{self.status_code} response has no JSON body")
+        return self._payload
+
+
+@dataclass
+class _Organization:
+    name: str
+    members: dict[str, str] = field(default_factory=dict)
+    assets: set[int] = field(default_factory=set)
+
+
+@dataclass
+class _Mission:
+    name: str
+    description: str
+    organizations: dict[int, dict[str, bool]] = field(default_factory=dict)
+    assets: list[int] = field(default_factory=list)
+    # Asset id to its latest status value id
+    statuses: dict[int, int] = field(default_factory=dict)
+    pois: dict[int, str] = field(default_factory=dict)
+
+
+class FakeSMMServer:
+    # pylint: disable=R0902
+    """
+    The state of one SMM server
+    """
+    def __init__(self, url: str, admin_password: str) -> None:
+        self.url = url
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.users: dict[str, str] = {'admin': admin_password}
+        self.user_ids: dict[str, int] = {'admin': next(self._ids)}
+        self.asset_types: dict[int, str] = {}
+        self.assets: dict[int, str] = {}
+        self.organizations: dict[int, _Organization] = {}
+        self.status_values: dict[int, str] = {}
+        self.missions: dict[int, _Mission] = {}
+
+    def next_id(self) -> int:
+        """
+        A new primary key; every table shares one sequence
+        """
+        return next(self._ids)
+
+    def _admin_url(self, model: str, object_id: int) -> str:
+        return f'{self.url}/admin/{model}/{object_id}/change/'
+
+    def check_password(self, username: str, password: str) -> bool:
+        """
+        Whether `username` can log in with `password`
+        """
+        with self.lock:
+            return self.users.get(username) == password
+
+    def organization_id(self, name: str) -> int:
+        """
+        The id of the organisation called `name`
+        """
+        with self.lock:
+            for org_id, organization in self.organizations.items():
+                if organization.name == name:
+                    return org_id
+        raise KeyError(f"No organisation called {name}")
+
+    def add_mission_organization(self, mission_id: int, name: str) -> None:
+        """
+        Add an organisation to a mission, as a participant would
+        """
+        org_id = self.organization_id(name)
+        with self.lock:
+            self.missions[mission_id].organizations.setdefault(
+                org_id, {'add_organization': False})
+
+    def mission_asset_statuses(self, mission_id: int) -> dict[str, str]:
+        """
+        The latest status of every asset in the mission, by name
+        """
+        with self.lock:
+            mission = self.missions[mission_id]
+            return {
+                self.assets[asset_id]: self.status_values[value_id]
+                for asset_id, value_id in mission.statuses.items()
+            }
+
+    def handle(
+            self,
+            username: str,
+            method: str,
+            path: str,
+            data: dict[str, Any]) -> FakeResponse:
+        """
+        Answer one request from `username`
+        """
+        route = path.split('?', 1)[0]
+        for route_method, pattern, handler in _ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(route)
+            if match is not None:
+                respond: Callable[..., FakeResponse] = getattr(self, handler)
+                with self.lock:
+                    return respond(username, {
+                        **data, '_query': path.partition('?')[2]}, match)
+        return FakeResponse(404, f'{self.url}{path}')
+
+    # Handlers, called with the lock held
+
+    def _add_user(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        user_id = self.next_id()
+        self.users[data['username']] = data['password1']
+        self.user_ids[data['username']] = user_id
+        return FakeResponse(200, self._admin_url('auth/user', user_id))
+
+    def _asset_types(
+            self,
+            _username: str,
+            _data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        return FakeResponse(200, f'{self.url}/assets/assettypes/', {
+            'asset_types': [
+                {'id': type_id, 'name': name}
+                for type_id, name in self.asset_types.items()
+            ]})
+
+    def _add_asset_type(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        type_id = self.next_id()
+        self.asset_types[type_id] = data['name']
+        return FakeResponse(200, self._admin_url('assets/assettype', type_id))
+
+    def _add_asset(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        asset_id = self.next_id()
+        self.assets[asset_id] = data['name']
+        return FakeResponse(200, self._admin_url('assets/asset', asset_id))
+
+    def _status_values(
+            self,
+            _username: str,
+            _data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        return FakeResponse(200, f'{self.url}/mission/asset/status/values/', {
+            'values': [
+                {'id': value_id, 'name': name, 'description': name}
+                for value_id, name in self.status_values.items()
+            ]})
+
+    def _add_status_value(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        value_id = self.next_id()
+        self.status_values[value_id] = data['name']
+        return FakeResponse(
+            200,
+            self._admin_url('mission/missionassetstatusvalue', value_id))
+
+    def _organizations(
+            self,
+            username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        mine = 'only=mine' in data['_query']
+        return FakeResponse(200, f'{self.url}/organization/', {
+            'organizations': [
+                {'id': org_id, 'name': organization.name}
+                for org_id, organization in self.organizations.items()
+                if not mine or username in organization.members
+            ]})
+
+    def _add_organization(
+            self,
+            username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        org_id = self.next_id()
+        self.organizations[org_id] = _Organization(
+            data['name'],
+            members={username: 'A'})
+        return FakeResponse(200, f'{self.url}/organization/', {
+            'id': org_id,
+            'name': data['name'],
+        })
+
+    def _add_organization_member(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        organization = self.organizations.get(int(match['org']))
+        if organization is None:
+            return FakeResponse(404, self.url)
+        organization.members[match['user']] = data.get('role') or 'M'
+        return FakeResponse(200, self.url)
+
+    def _add_organization_asset(
+            self,
+            _username: str,
+            _data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        organization = self.organizations.get(int(match['org']))
+        if organization is None:
+            return FakeResponse(404, self.url)
+        organization.assets.add(int(match['asset']))
+        return FakeResponse(200, self.url)
+
+    def _add_mission(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            _match: re.Match[str]) -> FakeResponse:
+        mission_id = self.next_id()
+        self.missions[mission_id] = _Mission(
+            data['mission_name'],
+            data['mission_description'])
+        return FakeResponse(200, f'{self.url}/mission/{mission_id}/details/')
+
+    def _mission(self, match: re.Match[str]) -> _Mission | None:
+        return self.missions.get(int(match['mission']))
+
+    def _add_poi(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        if mission is None:
+            return FakeResponse(404, self.url)
+        poi_id = self.next_id()
+        mission.pois[poi_id] = data['label']
+        return FakeResponse(200, self.url, {
+            'features': [{'properties': {'pk': poi_id}}]})
+
+    def _mission_organizations(
+            self,
+            _username: str,
+            _data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        if mission is None:
+            return FakeResponse(404, self.url)
+        return FakeResponse(200, self.url, {
+            'organizations': [
+                {'organization': {
+                    'id': org_id,
+                    'name': self.organizations[org_id].name,
+                }}
+                for org_id in mission.organizations
+            ]})
+
+    def _add_mission_organization(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        org_id = int(data['organization'])
+        if mission is None or org_id not in self.organizations:
+            return FakeResponse(404, self.url)
+        mission.organizations.setdefault(org_id, {'add_organization': False})
+        return FakeResponse(200, self.url)
+
+    def _set_mission_organization(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        if mission is None or int(match['org']) not in mission.organizations:
+            return FakeResponse(404, self.url)
+        flags = mission.organizations[int(match['org'])]
+        for flag in ('add_organization', 'add_user'):
+            if flag in data:
+                flags[flag] = bool(data[flag])
+        return FakeResponse(200, self.url)
+
+    def _add_mission_asset(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        asset_id = int(data['asset'])
+        if mission is None or asset_id not in self.assets:
+            return FakeResponse(404, self.url)
+        if asset_id not in mission.assets:
+            mission.assets.append(asset_id)
+        return FakeResponse(200, self.url)
+
+    def _set_mission_asset_status(
+            self,
+            _username: str,
+            data: dict[str, Any],
+            match: re.Match[str]) -> FakeResponse:
+        mission = self._mission(match)
+        asset_id = int(match['asset'])
+        value_id = int(data['value_id'])
+        if (
+                mission is None
+                or asset_id not in mission.assets
+                or value_id not in self.status_values):
+            return FakeResponse(404, self.url)
+        mission.statuses[asset_id] = value_id
+        return FakeResponse(200, self.url)
+
+
+_MISSION = r'/mission/(?P<mission>\d+)'
+_ROUTES: list[tuple[str, re.Pattern[str], str]] = [
+    (method, re.compile(pattern), handler)
+    for method, pattern, handler in [
+        ('POST', r'/admin/auth/user/add/', '_add_user'),
+        ('GET', r'/assets/assettypes/', '_asset_types'),
+        ('POST', r'/admin/assets/assettype/add/',
+         '_add_asset_type'),
+        ('POST', r'/admin/assets/asset/add/', '_add_asset'),
+        ('GET', r'/mission/asset/status/values/',
+         '_status_values'),
+        ('POST', r'/admin/mission/missionassetstatusvalue/add/',
+         '_add_status_value'),
+        ('GET', r'/organization/', '_organizations'),
+        ('POST', r'/organization/', '_add_organization'),
+        ('POST', r'/organization/(?P<org>\d+)/user/(?P<user>[^/]+)/',
+         '_add_organization_member'),
+        ('POST', r'/organization/(?P<org>\d+)/assets/(?P<asset>\d+)/',
+         '_add_organization_asset'),
+        ('POST', r'/mission/new/', '_add_mission'),
+        ('POST', _MISSION + r'/data/pois/create/', '_add_poi'),
+        ('GET', _MISSION + r'/organizations/',
+         '_mission_organizations'),
+        ('POST', _MISSION + r'/organizations/',
+         '_add_mission_organization'),
+        ('POST', _MISSION + r'/organizations/(?P<org>\d+)/',
+         '_set_mission_organization'),
+        ('POST', _MISSION + r'/assets/', '_add_mission_asset'),
+        ('POST', _MISSION + r'/assets/(?P<asset>\d+)/status/',
+         '_set_mission_asset_status'),
+    ]
+]
+
+
+class _Session:
+    # pylint: disable=R0903
+    """Stands in for the requests.Session the connection pool closes."""
+
+    def close(self) -> None:
+        """
+        Nothing to close
+        """
+
+
+class FakeSMMConnection(SMMConnection):  # type: ignore[misc]
+    """
+    An SMMConnection answered by a FakeSMMServer instead of over HTTP
+    Requests from a user whose login failed get 403 responses.
+    """
+    def __init__(
+            self,
+            server: FakeSMMServer,
+            faults: Faults,
+            username: str,
+            password: str) -> None:
+        # pylint: disable=super-init-not-called
+        self.server = server
+        self.faults = faults
+        self.base_url = server.url
+        self.username = username
+        self.password = password
+        self.session = _Session()
+        self.authenticated = False
+        self.login()
+
+    def login(self) -> None:
+        self.faults.check('POST /accounts/login/', requests.ConnectionError)
+        self.authenticated = self.server.check_password(
+            self.username,
+            self.password)
+
+    def _request(
+            self,
+            method: str,
+            path: str,
+            data: Any = None) -> FakeResponse:
+        path = '/' + path.lstrip('/')
+        route = _ID.sub('/{id}', path.split('?', 1)[0])
+        self.faults.check(
+            f"{method} {_USER.sub('/user/{username}/', route)}",
+            requests.ConnectionError)
+        if not self.authenticated:
+            return FakeResponse(403, f'{self.base_url}{path}')
+        return self.server.handle(
+            self.username,
+            method,
+            path,
+            dict(data or {}))
+
+    def get(self, path: str | None = None) -> FakeResponse:
+        return self._request('GET', path or '/')
+
+    def get_json(self, path: str) -> Any:
+        return self._request('GET', path).json()
+
+    def post(self, path: str, data: Any = None) -> FakeResponse:
+        return self._request('POST', path, data)
+
+    def delete(self, path: str) -> FakeResponse:
+        return self._request('DELETE', path)
+
+
+class FakeSMMBackend:
+    """
+    Every fake SMM server, by base URL
+    Failures are requests.ConnectionError, as an unreachable server
+    would raise. The servers share one set of faults and call counts.
+    """
+    def __init__(self, faults: Faults | None = None) -> None:
+        self.faults = faults or Faults()
+        self._lock = threading.Lock()
+        self.servers: dict[str, FakeSMMServer] = {}
+
+    def serve(self, url: str, admin_password: str) -> FakeSMMServer:
+        """
+        Bring up an empty SMM server at `url`
+        """
+        server = FakeSMMServer(url, admin_password)
+        with self._lock:
+            self.servers[url] = server
+        return server
+
+    def connect(
+            self,
+            url: str,
+            username: str,
+            password: str) -> FakeSMMConnection:
+        """
+        Log in to the server at `url`; usable as an SMMConnectionPool
+        connection factory
+        """
+        with self._lock:
+            server = self.servers.get(url)
+        if server is None:
+            raise requests.ConnectionError(f"Nothing is serving {url}")
+        return FakeSMMConnection(server, self.faults, username, password)
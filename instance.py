@@ -6,12 +6,14 @@ from __future__ import annotations
 
 import logging
 
-import docker
-
 from configloader import load_participant_config
-from configmodels import ConfigError, ParticipantConfig
-from services.helpers import sanitize_docker_name
+from configmodels import ConfigError, MemberConfig, ParticipantConfig
+from services import metrics
+from services.helpers import run_in_parallel, sanitize_docker_name
+from services.pool import SMMPool
+from services.postgres import SharedPostgresServer
 from services.smm import SMMServer
+from services.template import DatabaseTemplate
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +26,8 @@ class Participant:
     """
     State for a participant
     """
+    PROVISION_WORKERS = 8
+
     def __init__(self, filename: str) -> None:
         config: ParticipantConfig = load_participant_config(filename)
         self.name = config.name
@@ -36,23 +40,46 @@ class Participant:
         self.members = config.members
         self.smm: SMMServer | None = None
 
-    def start(self, docker_client: docker.DockerClient) -> None:
+    def start(
+            self,
+            pool: SMMPool | None = None,
+            template: DatabaseTemplate | None = None,
+            shared_db: SharedPostgresServer | None = None) -> None:
         """
         Start the services for this participant
+        Claims a ready SMM stack from `pool` when one is given, otherwise
+        starts a new one. Its database lives on `shared_db` if set, or in
+        its own postgres server cloned from `template` if set.
         """
         log.info("Starting participant %s", self.name)
-        self.smm = SMMServer(f'{self.service_name}-smm', None, docker_client)
-        self.smm.start()
+        smm_name = f'{self.service_name}-smm'
+        with metrics.participant(smm_name):
+            if pool is not None:
+                with metrics.phase('pool_claim'):
+                    self.smm = pool.claim(smm_name)
+                return
+            with metrics.phase('provision'):
+                self.smm = SMMServer(
+                    smm_name,
+                    None,
+                    template=template,
+                    shared_db=shared_db)
+            self.smm.start()
 
     def setup(self) -> None:
         """
         Setup the participant(s) accounts in this instance
         """
         smm = require_smm(self)
+        with metrics.participant(smm.name), metrics.phase('setup'):
+            self._setup(smm)
+
+    def _setup(self, smm: SMMServer) -> None:
         log.info("Setting up accounts for participant %s", self.name)
         smm_admin = smm.get_web_connection()
         imt_org = smm_admin.create_organization('IMT')
-        for member in self.members:
+
+        def add_member(member: MemberConfig) -> None:
             user = smm_admin.create_user(
                 member.username,
                 member.password)
@@ -62,6 +89,9 @@ class Participant:
                 member.username,
                 self.name)
 
+        # Members are independent of each other once the org exists
+        run_in_parallel(add_member, self.members, self.PROVISION_WORKERS)
+
     def stop(self) -> None:
         """
         Stop the services for this participant
@@ -7,22 +7,32 @@ from __future__ import annotations
 
 import argparse
 import contextlib
+import functools
 import logging
+import math
+import os
 import signal
 import sys
-import time
 import types
-from concurrent.futures import ThreadPoolExecutor
-
-import docker
 
+from configloader import configure_cache
 from configmodels import ConfigError
 from instance import Participant, require_smm
 from mission import MissionRunner
-from services.helpers import pull_images
+from missionclock import MissionClock
+from scheduler import AsyncTickScheduler, TickScheduler
+from services import metrics, tracing
+from services.docker_client import (
+    close_docker_client,
+    configure_docker_client,
+    get_docker_client,
+)
+from services.helpers import pull_images, run_in_parallel
 from services.log import configure_logging
-from services.postgres import PostgresServer
+from services.pool import SMMPool
+from services.postgres import PostgresServer, SharedPostgresServer
 from services.smm import SMMServer
+from services.template import DatabaseTemplate
 
 log = logging.getLogger(__name__)
 
@@ -41,6 +51,20 @@ def arg_is_positive(value: str) -> int:
     return ivalue
 
 
+def arg_is_positive_float(value: str) -> float:
+    """
+    Make sure the argument is a positive number
+    """
+    try:
+        fvalue = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"{value} needs to be a positive number") from exc
+    if not math.isfinite(fvalue) or fvalue <= 0:
+        raise argparse.ArgumentTypeError(f"{value} must be positive")
+    return fvalue
+
+
 def _install_signal_handlers() -> None:
     def _handle(signum: int, _frame: types.FrameType | None) -> None:
         raise KeyboardInterrupt(f"Received signal {signum}")
@@ -48,23 +72,34 @@ def _install_signal_handlers() -> None:
     signal.signal(signal.SIGTERM, _handle)
 
 
-def _start_participant(participant_service: Participant) -> None:
-    try:
-        participant_client = docker.from_env()
-    except Exception:  # pylint: disable=broad-exception-caught
-        log.exception(
-            "Failed to create Docker client for participant %s",
-            participant_service.name)
-        raise
+def _export_metrics(
+        prometheus_file: str | None,
+        summary_file: str | None,
+        trace_file: str | None) -> None:
+    if trace_file:
+        tracing.TRACER.disable()
+        tracing.TRACER.write(trace_file)
+        log.info("Wrote trace to %s", trace_file)
+    if prometheus_file:
+        metrics.REGISTRY.write_prometheus(prometheus_file)
+        log.info("Wrote metrics to %s", prometheus_file)
+    if summary_file:
+        metrics.REGISTRY.write_summary(summary_file)
+        log.info("Wrote metrics summary to %s", summary_file)
+
+
+def _start_participant(
+        participant_service: Participant,
+        pool: SMMPool | None = None,
+        template: DatabaseTemplate | None = None,
+        shared_db: SharedPostgresServer | None = None) -> None:
     try:
-        participant_service.start(participant_client)
+        participant_service.start(pool, template, shared_db)
     except Exception:  # pylint: disable=broad-exception-caught
         log.exception(
             "Failed to start participant %s",
             participant_service.name)
         raise
-    finally:
-        participant_client.close()
 
 
 if __name__ == "__main__":
@@ -77,8 +112,14 @@ if __name__ == "__main__":
         '--time',
         default=120,
         type=arg_is_positive,
-        help="Time IMT Challenge for (in seconds)"
+        help="Time IMT Challenge for (in mission seconds)"
     )
+    parser.add_argument(
+        '--speedup',
+        default=1.0,
+        type=arg_is_positive_float,
+        help='Run mission time this many times faster than real time; '
+             'SITL vehicles are sped up to match')
     parser.add_argument(
         '-m',
         '--mission',
@@ -90,6 +131,60 @@ if __name__ == "__main__":
         required=True,
         action='append',
         help='load participant details from file')
+    parser.add_argument(
+        '--config-cache',
+        default=os.environ.get('IMT_CONFIG_CACHE'),
+        help='Keep validated mission and participant files in this '
+             'directory, so unchanged files load without parsing '
+             '(default: $IMT_CONFIG_CACHE)')
+    database_mode = parser.add_mutually_exclusive_group()
+    database_mode.add_argument(
+        '--db-template',
+        action='store_true',
+        help='Start each SMM database from a pre-migrated template')
+    database_mode.add_argument(
+        '--shared-db',
+        action='store_true',
+        help='Serve every SMM database from a single postgres server')
+    parser.add_argument(
+        '--pool-size',
+        type=arg_is_positive,
+        help='Keep this many SMM stacks warm for participants to claim; '
+             'ready stacks are left running for the next run')
+    parser.add_argument(
+        '--drain-pool',
+        action='store_true',
+        help='Remove the warm SMM stacks on exit')
+    parser.add_argument(
+        '--db-feed',
+        action='store_true',
+        help='Watch each SMM database for new mission organisations '
+             'instead of polling SMM (needs psycopg)')
+    parser.add_argument(
+        '--db-reads',
+        action='store_true',
+        help='Poll each SMM database directly with read-only queries '
+             'instead of the SMM API (needs psycopg)')
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'asyncio'],
+        default='threads',
+        help='How participants are ticked: a thread pool or asyncio '
+             'coroutines (for hundreds of participants)')
+    parser.add_argument(
+        '--metrics-port',
+        type=arg_is_positive,
+        help='Serve Prometheus metrics on this port while running')
+    parser.add_argument(
+        '--metrics-file',
+        help='Write Prometheus metrics to this file on exit')
+    parser.add_argument(
+        '--metrics-json',
+        help='Write a JSON summary of startup and tick timings on exit')
+    parser.add_argument(
+        '--trace',
+        help='Record every Docker and SMM call and write them to this '
+             'file on exit, for chrome://tracing or ui.perfetto.dev')
     parser.add_argument(
         '--keep',
         action='store_true',
@@ -109,8 +204,9 @@ if __name__ == "__main__":
 
     _install_signal_handlers()
 
+    configure_cache(args.config_cache)
     try:
-        runner = MissionRunner(args.mission)
+        runner = MissionRunner(args.mission, MissionClock(args.speedup))
         participant_services = [
             Participant(participant) for participant in args.participant
         ]
@@ -118,12 +214,63 @@ if __name__ == "__main__":
         log.error("%s", exc)
         sys.exit(1)
 
-    docker_client = docker.from_env()
+    if args.trace:
+        # Clients are only traced if they are created after this
+        tracing.TRACER.enable()
 
     n_workers = max(4, len(participant_services))
-    pull_images(docker_client, [PostgresServer.IMAGE, SMMServer.IMAGE])
+    # Every participant start, pool build and vehicle launch shares this
+    # client, so size its connection pool for all of them at once
+    configure_docker_client(max(32, 4 * n_workers))
+    docker_client = get_docker_client()
+
+    metrics_server: metrics.MetricsServer | None = None
+    if args.metrics_port:
+        metrics_server = metrics.MetricsServer(args.metrics_port)
+        metrics_server.start()
+
+    # Pull everything up front so asset launches never wait on a registry
+    with metrics.phase('pull_images'):
+        pull_images(
+            docker_client,
+            [PostgresServer.IMAGE, SMMServer.IMAGE, *runner.vehicle_images()])
+
+    db_template: DatabaseTemplate | None = None
+    if args.db_template:
+        db_template = DatabaseTemplate(docker_client)
+        with metrics.phase('db_template'):
+            db_template.ensure()
 
     with contextlib.ExitStack() as cleanup_stack:
+        # Registered first so it runs last, once everything is torn down
+        cleanup_stack.callback(
+            _export_metrics,
+            args.metrics_file,
+            args.metrics_json,
+            args.trace)
+        if metrics_server is not None:
+            cleanup_stack.callback(metrics_server.stop)
+        cleanup_stack.callback(close_docker_client)
+        shared_db_server: SharedPostgresServer | None = None
+        if args.shared_db:
+            shared_db_server = SharedPostgresServer(docker_client)
+            if not args.keep:
+                cleanup_stack.callback(shared_db_server.cleanup)
+            with metrics.phase('shared_db'):
+                shared_db_server.start()
+        smm_pool: SMMPool | None = None
+        if args.pool_size:
+            smm_pool = SMMPool(
+                args.pool_size,
+                docker_client,
+                template=db_template,
+                shared_db=shared_db_server)
+            with metrics.phase('smm_pool'):
+                smm_pool.start()
+            # Pool stacks cannot outlive the shared database server
+            cleanup_stack.callback(
+                smm_pool.stop,
+                drain=args.drain_pool or args.shared_db)
         if not args.keep:
             # ExitStack unwinds in reverse, so register participant cleanup
             # first and runner.stop last. Vehicle containers must go before
@@ -133,24 +280,33 @@ if __name__ == "__main__":
             cleanup_stack.callback(runner.stop)
 
         # Start all participant services in parallel
-        with ThreadPoolExecutor(max_workers=n_workers) as ex:
-            futures = [
-                ex.submit(_start_participant, p) for p in participant_services
-            ]
-            for f in futures:
-                f.result()
-
-        # Add each participant to the runner (serial — touches shared state)
-        for participant in participant_services:
-            runner.add_participant(require_smm(participant))
+        with metrics.phase('start_participants'):
+            run_in_parallel(
+                functools.partial(
+                    _start_participant,
+                    pool=smm_pool,
+                    template=db_template,
+                    shared_db=shared_db_server),
+                participant_services,
+                n_workers)
+
+        # Each participant only talks to its own SMM server
+        with metrics.phase('add_participants'):
+            runner.add_participants(
+                [require_smm(p) for p in participant_services],
+                n_workers)
 
         # Setup participant accounts in parallel
-        with ThreadPoolExecutor(max_workers=n_workers) as ex:
-            futures = [ex.submit(p.setup) for p in participant_services]
-            for f in futures:
-                f.result()
+        with metrics.phase('setup'):
+            run_in_parallel(
+                Participant.setup, participant_services, n_workers)
 
-        runner.create_mission()
+        with metrics.phase('create_mission'):
+            runner.create_mission(n_workers)
+        if args.db_reads:
+            runner.read_state_from_database()
+        if args.db_feed:
+            runner.watch_organizations()
 
         for participant in participant_services:
             smm = require_smm(participant)
@@ -162,7 +318,15 @@ if __name__ == "__main__":
         log.info("Ready. Lets go")
 
         # Run the IMT Challenge
-        start_time = time.time()
-        while time.time() - start_time < args.time:
-            time.sleep(1)
-            runner.time_tick()
+        scheduler: TickScheduler | AsyncTickScheduler
+        if args.engine == 'asyncio':
+            scheduler = AsyncTickScheduler(runner)
+        else:
+            scheduler = TickScheduler(runner, max_workers=n_workers)
+        stats = scheduler.run(runner.clock.to_wall(args.time))
+        if stats.missed_ticks or stats.overruns:
+            log.warning(
+                "Missed %d of %d ticks; participants over budget: %s",
+                stats.missed_ticks,
+                stats.ticks + stats.missed_ticks,
+                stats.overruns or "none")
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Load test the mission runner
+Runs the real MissionRunner, Participant and SMMServer code with Docker
+and SMM replaced by in-process fakes, then reports how long setup took,
+how long participants' ticks took and how many calls each backend saw.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import functools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import yaml
+
+from fakes.dockerapi import FakeDockerClient
+from fakes.faults import Faults
+from fakes.smmapi import FakeSMMBackend
+from instance import Participant, require_smm
+from mission import MissionRunner
+from missionclock import MissionClock
+from scheduler import AsyncTickScheduler, TickScheduler, TickStats
+from services.connection import SMMConnectionPool
+from services.docker_client import close_docker_client, use_docker_client
+from services.helpers import pull_images, run_in_parallel
+from services.log import configure_logging
+from services.postgres import PostgresServer, SharedPostgresServer
+from services.smm import SMMServer
+
+log = logging.getLogger(__name__)
+
+_ASSET_TYPES = ['Boat', 'Aircraft', 'Drone']
+
+
+@dataclasses.dataclass
+class LoadTestOptions:
+    # pylint: disable=R0902
+    """What to run and how badly the fakes behave."""
+
+    participants: int = 10
+    # Assets in the mission, so each participant gets this many
+    assets: int = 50
+    organizations: int = 5
+    members: int = 2
+    # Mission seconds
+    duration: float = 300.0
+    speedup: float = 60.0
+    response_time_mins: int = 1
+    # Organisations join within this fraction of the mission
+    join_window: float = 0.25
+    engine: str = 'threads'
+    shared_db: bool = False
+    docker_latency: float = 0.0
+    smm_latency: float = 0.0
+    jitter: float = 0.0
+    docker_failure_rate: float = 0.0
+    smm_failure_rate: float = 0.0
+    boot_time: float = 0.05
+    seed: int | None = None
+
+
+class LatencyRecorder:
+    """
+    Durations of calls to wrapped methods
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: list[float] = []
+
+    def wrap(self, obj: Any, name: str) -> None:
+        """
+        Time every call of `obj.name` from now on
+        """
+        method = getattr(obj, name)
+
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.samples.append(elapsed)
+        setattr(obj, name, timed)
+
+    def summary(self) -> dict[str, float]:
+        """
+        Count, mean, percentiles and maximum, in milliseconds
+        """
+        with self._lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return {'count': 0}
+
+        def percentile(fraction: float) -> float:
+            index = min(len(samples) - 1, int(fraction * len(samples)))
+            return samples[index] * 1000
+        return {
+            'count': len(samples),
+            'mean': statistics.fmean(samples) * 1000,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': samples[-1] * 1000,
+        }
+
+
+@dataclasses.dataclass
+class LoadReport:
+    # pylint: disable=R0902
+    """What happened during a load test."""
+
+    options: LoadTestOptions
+    # Phase name to wall seconds
+    setup: dict[str, float] = dataclasses.field(default_factory=dict)
+    tick_latency: dict[str, float] = dataclasses.field(default_factory=dict)
+    launch_latency: dict[str, float] = dataclasses.field(
+        default_factory=dict)
+    mission_seconds: float = 0.0
+    stats: TickStats = dataclasses.field(default_factory=TickStats)
+    assets_added: int = 0
+    assets_launched: int = 0
+    docker_calls: dict[str, int] = dataclasses.field(default_factory=dict)
+    smm_calls: dict[str, int] = dataclasses.field(default_factory=dict)
+    # The phase that failed and why
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        The report as plain data, for JSON
+        """
+        return dataclasses.asdict(self)
+
+    def format(self) -> str:
+        """
+        The report as text
+        """
+        def latency(summary: dict[str, float]) -> str:
+            if not summary.get('count'):
+                return 'none'
+            return (
+                f"n={summary['count']:.0f} mean={summary['mean']:.1f} "
+                f"p50={summary['p50']:.1f} p95={summary['p95']:.1f} "
+                f"p99={summary['p99']:.1f} max={summary['max']:.1f}")
+
+        def calls(counts: dict[str, int]) -> list[str]:
+            busiest = sorted(counts.items(), key=lambda item: -item[1])
+            return [f"  {count:8d} {name}" for name, count in busiest]
+
+        total_assets = self.options.participants * self.options.assets
+        lines = [
+            f"Participants: {self.options.participants}, assets: "
+            f"{total_assets} (added {self.assets_added}, launched "
+            f"{self.assets_launched})",
+            "Setup: " + ", ".join(
+                f"{phase} {seconds:.2f}s"
+                for phase, seconds in self.setup.items()),
+            f"Mission: {self.mission_seconds:.2f}s",
+            f"Ticks: {self.stats.ticks} run, {self.stats.missed_ticks} "
+            f"missed, over budget: {self.stats.overruns or 'none'}",
+            f"Tick latency (ms): {latency(self.tick_latency)}",
+            f"Launch latency (ms): {latency(self.launch_latency)}",
+            f"Docker calls: {sum(self.docker_calls.values())}",
+            *calls(self.docker_calls),
+            f"SMM calls: {sum(self.smm_calls.values())}",
+            *calls(self.smm_calls),
+        ]
+        if self.error is not None:
+            lines.append(f"Failed: {self.error}")
+        return '\n'.join(lines)
+
+
+def _write_configs(
+        directory: str,
+        options: LoadTestOptions) -> tuple[str, list[str]]:
+    """
+    Generate the mission and participant files
+    """
+    mission = {
+        'name': 'Load test',
+        'description': 'Generated by loadtest.py',
+        'assets': [
+            {
+                'name': f'Asset {index}',
+                'type': _ASSET_TYPES[index % len(_ASSET_TYPES)],
+                'organization': f'Org {index % options.organizations}',
+                'responseTimeMins': options.response_time_mins,
+                'baseLocation': {'latitude': -43.5, 'longitude': 172.5},
+            }
+            for index in range(options.assets)
+        ],
+    }
+    mission_file = os.path.join(directory, 'mission.yml')
+    with open(mission_file, 'w', encoding='utf-8') as file:
+        yaml.safe_dump(mission, file)
+    participant_files = []
+    for index in range(options.participants):
+        participant_file = os.path.join(directory, f'team{index}.yml')
+        with open(participant_file, 'w', encoding='utf-8') as file:
+            yaml.safe_dump({
+                'name': f'Team {index}',
+                'members': [
+                    {'username': f'member{member}', 'password': 'secret'}
+                    for member in range(options.members)
+                ],
+            }, file)
+        participant_files.append(participant_file)
+    return mission_file, participant_files
+
+
+def _serve(smm: SMMServer, backend: FakeSMMBackend) -> None:
+    """
+    Put a fake SMM behind a started SMM stack
+    """
+    backend.serve(f'http://localhost:{smm.port}', smm.admin_password)
+    smm.connections = SMMConnectionPool(backend.connect)
+
+
+class _Players:
+    """
+    Participants adding organisations to their missions over time
+    """
+    def __init__(
+            self,
+            runner: MissionRunner,
+            backend: FakeSMMBackend,
+            options: LoadTestOptions) -> None:
+        self._clock = runner.clock
+        self._stop = threading.Event()
+        rand = random.Random(options.seed)
+        start = runner.clock.now()
+        window = options.duration * options.join_window
+        organizations = sorted(
+            {asset.organization for asset in runner.config.assets})
+        self._joins = sorted(
+            (
+                start + rand.uniform(0, window),
+                f'http://localhost:{participant.smm.port}',
+                int(participant.mission_id or 0),
+                organization,
+            )
+            for participant in runner.participants
+            for organization in organizations)
+        self._backend = backend
+        self._thread = threading.Thread(target=self._run, name='players')
+
+    def start(self) -> None:
+        """
+        Start adding organisations
+        """
+        self._thread.start()
+
+    def _run(self) -> None:
+        for join_time, url, mission_id, organization in self._joins:
+            if self._stop.wait(
+                    max(0.0, self._clock.wall_seconds_until(join_time))):
+                return
+            self._backend.servers[url].add_mission_organization(
+                mission_id,
+                organization)
+
+    def stop(self) -> None:
+        """
+        Stop adding organisations
+        """
+        self._stop.set()
+        self._thread.join()
+
+
+@contextlib.contextmanager
+def _phase(report: LoadReport, name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        report.error = f"{name}: {exc}"
+        raise
+    finally:
+        report.setup[name] = time.perf_counter() - start
+
+
+def _scheduler(
+        runner: MissionRunner,
+        options: LoadTestOptions,
+        max_workers: int) -> TickScheduler | AsyncTickScheduler:
+    if options.engine == 'asyncio':
+        return AsyncTickScheduler(runner)
+    return TickScheduler(runner, max_workers=max_workers)
+
+
+def _run(
+        options: LoadTestOptions,
+        report: LoadReport,
+        client: FakeDockerClient,
+        backend: FakeSMMBackend,
+        cleanup: contextlib.ExitStack) -> None:
+    # pylint: disable=R0914
+    """
+    The same steps as letsgo.py, timed
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        mission_file, participant_files = _write_configs(directory, options)
+        runner = MissionRunner(mission_file, MissionClock(options.speedup))
+        participants = [Participant(name) for name in participant_files]
+    n_workers = max(4, len(participants))
+    pull_images(
+        client,
+        [PostgresServer.IMAGE, SMMServer.IMAGE, *runner.vehicle_images()])
+
+    shared_db: SharedPostgresServer | None = None
+    if options.shared_db:
+        shared_db = SharedPostgresServer(client)
+        cleanup.callback(shared_db.cleanup)
+        with _phase(report, 'shared_db'):
+            shared_db.start()
+    for participant in participants:
+        cleanup.callback(participant.cleanup)
+    cleanup.callback(runner.stop)
+
+    with _phase(report, 'start'):
+        run_in_parallel(
+            functools.partial(Participant.start, shared_db=shared_db),
+            participants,
+            n_workers)
+    for participant in participants:
+        _serve(require_smm(participant), backend)
+    smms = [require_smm(p) for p in participants]
+    with _phase(report, 'add_participants'):
+        runner.add_participants(smms, n_workers)
+    with _phase(report, 'setup'):
+        run_in_parallel(Participant.setup, participants, n_workers)
+    with _phase(report, 'create_mission'):
+        runner.create_mission(n_workers)
+
+    ticks = LatencyRecorder()
+    launches = LatencyRecorder()
+    for mission_participant in runner.participants:
+        ticks.wrap(mission_participant, 'check_added_organizations')
+        for asset in mission_participant.assets.values():
+            launches.wrap(asset, 'time_tick')
+    players = _Players(runner, backend, options)
+    players.start()
+    cleanup.callback(players.stop)
+
+    scheduler = _scheduler(runner, options, n_workers)
+    start = time.perf_counter()
+    try:
+        scheduler.run(runner.clock.to_wall(options.duration))
+    except Exception as exc:
+        report.error = f"mission: {exc}"
+        raise
+    finally:
+        report.mission_seconds = time.perf_counter() - start
+        report.stats = scheduler.stats
+        report.tick_latency = ticks.summary()
+        report.launch_latency = launches.summary()
+        assets = [
+            asset
+            for participant in runner.participants
+            for asset in participant.assets.values()
+        ]
+        report.assets_added = sum(a.added_time is not None for a in assets)
+        report.assets_launched = sum(
+            a.launch_time is not None for a in assets)
+
+
+def run_load_test(options: LoadTestOptions) -> LoadReport:
+    """
+    Run a whole mission against fakes and report on it
+    Failures, injected or not, end the run early; the report says which
+    phase failed.
+    """
+    docker_faults = Faults(
+        latency=options.docker_latency,
+        jitter=options.jitter,
+        failure_rate=options.docker_failure_rate,
+        seed=options.seed)
+    smm_faults = Faults(
+        latency=options.smm_latency,
+        jitter=options.jitter,
+        failure_rate=options.smm_failure_rate,
+        seed=options.seed)
+    client = FakeDockerClient(docker_faults, boot_time=options.boot_time)
+    backend = FakeSMMBackend(smm_faults)
+    report = LoadReport(options)
+    use_docker_client(client)
+    try:
+        with contextlib.ExitStack() as cleanup:
+            cleanup.callback(close_docker_client)
+            _run(options, report, client, backend, cleanup)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        if report.error is None:
+            report.error = str(exc)
+        log.error("Load test failed: %s", report.error, exc_info=True)
+    report.docker_calls = docker_faults.snapshot()
+    report.smm_calls = smm_faults.snapshot()
+    return report
+
+
+def _options(argv: list[str] | None = None) -> tuple[LoadTestOptions, bool]:
+    parser = argparse.ArgumentParser(
+        prog='imt-challenge-loadtest',
+        description='Run a mission against fake Docker and SMM backends',
+    )
+    defaults = LoadTestOptions()
+    parser.add_argument(
+        '-n', '--participants', type=int, default=defaults.participants)
+    parser.add_argument(
+        '-a', '--assets', type=int, default=defaults.assets,
+        help='Assets in the mission, per participant')
+    parser.add_argument(
+        '--organizations', type=int, default=defaults.organizations)
+    parser.add_argument(
+        '-t', '--duration', type=float, default=defaults.duration,
+        help='Mission length, in mission seconds')
+    parser.add_argument(
+        '--speedup', type=float, default=defaults.speedup,
+        help='Mission seconds per real second')
+    parser.add_argument(
+        '--engine', choices=['threads', 'asyncio'], default=defaults.engine)
+    parser.add_argument('--shared-db', action='store_true')
+    parser.add_argument(
+        '--docker-latency', type=float, default=defaults.docker_latency,
+        help='Seconds added to every Docker call')
+    parser.add_argument(
+        '--smm-latency', type=float, default=defaults.smm_latency,
+        help='Seconds added to every SMM request')
+    parser.add_argument(
+        '--jitter', type=float, default=defaults.jitter,
+        help='Up to this many random seconds added on top')
+    parser.add_argument(
+        '--docker-failure-rate', type=float,
+        default=defaults.docker_failure_rate,
+        help='Fraction of Docker calls that fail')
+    parser.add_argument(
+        '--smm-failure-rate', type=float, default=defaults.smm_failure_rate,
+        help='Fraction of SMM requests that fail')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument(
+        '--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='Log the runner too')
+    args = parser.parse_args(argv)
+    configure_logging(quiet=not args.verbose)
+    options = LoadTestOptions(**{
+        option.name: getattr(args, option.name)
+        for option in dataclasses.fields(LoadTestOptions)
+        if hasattr(args, option.name)
+    })
+    return options, args.json
+
+
+def main(
+        argv: list[str] | None = None,
+        out: Callable[[str], None] = print) -> int:
+    """
+    Run a load test from the command line
+    """
+    options, as_json = _options(argv)
+    report = run_load_test(options)
+    if as_json:
+        out(json.dumps(report.as_dict(), indent=2))
+    else:
+        out(report.format())
+    return 0 if report.error is None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,14 @@ Mission Config and Control
 
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
-import time
+import operator
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from typing import TYPE_CHECKING, Any, TypedDict
+from typing import TYPE_CHECKING, Any, Callable, Iterable, TypedDict
 
 from smm_client.missions import SMMMission
 from smm_client.organizations import SMMOrganization
@@ -15,13 +19,26 @@ from smm_client.types import SMMPoint
 
 from configloader import load_mission_config
 from configmodels import AssetConfig, MissionConfig, POIConfig
-from services.helpers import get_random_secret, sanitize_account_name
+from missionclock import REAL_TIME, MissionClock
+from services import metrics
+from services.helpers import (
+    get_random_secret,
+    run_in_parallel,
+    sanitize_account_name,
+)
+from services.smmdb import (
+    SMMStateReader,
+    StateReadError,
+    open_mission_org_feed,
+    reader_connection_info,
+)
 from services.vehicle import Vehicle
 
 if TYPE_CHECKING:
     from services.smm import SMMServer
+    from services.smmdb import MissionOrgFeed
     from smm_client.connection import SMMConnection
-    from smm_client.assets import SMMAsset, SMMAssetType
+    from smm_client.assets import SMMAsset
     from smm_client.missions import SMMMissionOrganization
 
 log = logging.getLogger(__name__)
@@ -51,31 +68,59 @@ MISSION_ASSET_STATUSES = [
     MAS_RTB]
 
 
-def smm_get_or_create_asset_type(
-        smm_conn: SMMConnection,
-        asset_type: str) -> SMMAssetType:
+class LaunchExecutor:
     """
-    Find the asset type object on the server
-    Otherwise, create the asset type
+    Run vehicle launches on a bounded pool of background threads
+    Participant ticks submit launches and the runner later collects the
+    results, so a slow Docker call never holds up other participants'
+    checks.
     """
-    asset_types = smm_conn.get_asset_types()
-    for asset_type_obj in asset_types:
-        if asset_type_obj.name == asset_type:
-            return asset_type_obj
-    return smm_conn.create_asset_type(asset_type, asset_type)
+    MAX_WORKERS = 8
 
+    def __init__(self, max_workers: int = MAX_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='launch')
+        self._lock = threading.Lock()
+        self._pending: dict[Future[None], str] = {}
 
-def smm_get_or_create_organization(
-        smm_conn: SMMConnection,
-        org_name: str) -> SMMOrganization:
-    """
-    Find or create the organization on the server
-    """
-    organizations = smm_conn.get_organizations()
-    for organization in organizations:
-        if organization.name == org_name:
-            return organization
-    return smm_conn.create_organization(org_name)
+    def submit(self, name: str, launch: Callable[[], None]) -> None:
+        """
+        Queue `launch` to run in the background
+        """
+        future = self._executor.submit(launch)
+        with self._lock:
+            self._pending[future] = name
+
+    def collect(self) -> None:
+        """
+        Forget finished launches, logging every one that failed and
+        re-raising the first
+        """
+        with self._lock:
+            finished = {
+                future: self._pending.pop(future)
+                for future in [f for f in self._pending if f.done()]
+            }
+        first: BaseException | None = None
+        for future, name in finished.items():
+            exc = future.exception()
+            if exc is None:
+                log.debug("Launched %s", name)
+                continue
+            log.error("Failed to launch %s", name, exc_info=exc)
+            if first is None:
+                first = exc
+        if first is not None:
+            raise first
+
+    def shutdown(self) -> None:
+        """
+        Cancel queued launches and wait for running ones to finish
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._pending.clear()
 
 
 class VehicleDocker:
@@ -88,14 +133,18 @@ class VehicleDocker:
         smm: SMMServer,
         username: str,
         password: str,
+        speedup: float = 1.0,
     ) -> None:
+        # pylint: disable=R0913,R0917
         self.config = config
         self.smm = smm
         self.username = username
         self.password = password
+        self.speedup = speedup
         self._vehicle: Vehicle | None = None
 
-    def _map_vehicle_type(self, type_name: str) -> str:
+    @staticmethod
+    def map_vehicle_type(type_name: str) -> str:
         """
         Convert a type name into a Ardupilot simulator type
         """
@@ -105,11 +154,14 @@ class VehicleDocker:
             return "Plane"
         return "Copter"
 
-    def start(self) -> None:
+    def prepare(self) -> None:
         """
-        Start this vehicle
+        Create the vehicle's network and containers without starting them,
+        so launching it later only has to start the containers
         """
-        vehicle_type = self._map_vehicle_type(self.config.type)
+        if self._vehicle is not None:
+            return
+        vehicle_type = self.map_vehicle_type(self.config.type)
         self._vehicle = Vehicle(
             self.config.name,
             vehicle_type,
@@ -117,8 +169,20 @@ class VehicleDocker:
             self.username,
             self.password,
             lat=self.config.base_location.latitude,
-            lon=self.config.base_location.longitude)
-        self._vehicle.start()
+            lon=self.config.base_location.longitude,
+            speedup=self.speedup)
+
+    def start(self) -> None:
+        """
+        Start this vehicle, creating it first if it was not prepared
+        """
+        with metrics.participant(self.smm.name), \
+                metrics.LAUNCH_SECONDS.time(participant=self.smm.name):
+            self.prepare()
+            if self._vehicle is None:
+                raise RuntimeError(
+                    f"Vehicle for {self.config.name} was not created")
+            self._vehicle.start()
 
     def stop(self) -> None:
         """
@@ -142,9 +206,11 @@ class ParticipantAsset:
         smm_connection: SMMConnection,
         smm_username: str,
         smm_password: str,
+        clock: MissionClock = REAL_TIME,
     ) -> None:
         # pylint: disable=R0913,R0917
         self.parent = parent
+        self.clock = clock
         self.config = config
         self.smm_asset = smm_asset
         self.smm_connection = smm_connection
@@ -152,24 +218,43 @@ class ParticipantAsset:
         self.smm_password = smm_password
         self.added_time: float | None = None
         self.launch_time: float | None = None
+        self._mission: SMMMission | None = None
         self.vehicle_manager = VehicleDocker(
             self.config,
             self.parent.smm,
             self.smm_username,
-            self.smm_password)
+            self.smm_password,
+            speedup=clock.speedup)
 
     def add_to_mission(self) -> None:
         """
         Add this asset to a mission
         """
         log.info("Adding asset %s to mission", self.config.name)
-        mission = SMMMission(self.smm_connection, self.parent.mission_id, "")
+        mission = self._get_mission()
         mission.add_asset(self.smm_asset)
         mission.set_asset_status(
             self.smm_asset,
             self.parent.mission_asset_statuses[MAS_AWAITING_CREW],
             "")
-        self.added_time = time.time()
+        self.added_time = self.clock.now()
+
+    def _get_mission(self) -> SMMMission:
+        """
+        Get the mission as seen by this asset's account
+        """
+        if self._mission is None:
+            self._mission = SMMMission(
+                self.smm_connection,
+                self.parent.mission_id,
+                "")
+        return self._mission
+
+    def prepare(self) -> None:
+        """
+        Pre-create the vehicle for this asset
+        """
+        self.vehicle_manager.prepare()
 
     def stop(self) -> None:
         """
@@ -177,33 +262,44 @@ class ParticipantAsset:
         """
         self.vehicle_manager.stop()
 
+    def launch_deadline(self) -> float | None:
+        """
+        When this asset is due to launch, once it is in the mission
+        """
+        if self.added_time is None:
+            return None
+        return self.added_time + self.config.response_time_mins * 60
+
     def should_launch(self) -> bool:
         """
         Should this asset be launched now?
         """
-        if self.added_time is None:
+        deadline = self.launch_deadline()
+        if deadline is None:
             return False
         if self.launch_time is not None:
             return False
-        now = time.time()
-        return now - self.added_time >= (self.config.response_time_mins * 60)
+        return self.clock.now() >= deadline
 
     def time_tick(self) -> None:
         """
         Check if anything needs doing
         """
-        if self.should_launch():
+        deadline = self.launch_deadline()
+        if deadline is not None and self.should_launch():
             log.info("Launching asset %s", self.config.name)
-            mission = SMMMission(
-                self.smm_connection,
-                self.parent.mission_id,
-                "")
+            mission = self._get_mission()
             mission.set_asset_status(
                 self.smm_asset,
                 self.parent.mission_asset_statuses[MAS_AWAITING_TASKING],
                 "")
-            self.launch_time = time.time()
-            self.vehicle_manager.start()
+            self.launch_time = self.clock.now()
+            metrics.LAUNCH_DELAY_SECONDS.observe(
+                self.launch_time - deadline,
+                participant=self.parent.smm.name)
+            self.parent.parent.launcher.submit(
+                self.config.name,
+                self.vehicle_manager.start)
 
 
 class MissionRunnerParticipant:
@@ -212,6 +308,8 @@ class MissionRunnerParticipant:
     Manage a Participant in a Mission
     This keeps track of state of a current participants mission
     """
+    PROVISION_WORKERS = 8
+
     def __init__(self, parent: MissionRunner, smm: SMMServer) -> None:
         self.parent = parent
         self.smm = smm
@@ -222,6 +320,20 @@ class MissionRunnerParticipant:
         self.asset_accounts: dict[str, UserAccountAsset] = {}
         self.organization_admins: dict[str, Any] = {}
         self.mission_org_list: list[SMMMissionOrganization] = []
+        self._mission: SMMMission | None = None
+        # Built on first use, once every asset has been set up
+        self._pending_by_org: dict[str, list[ParticipantAsset]] | None = None
+        self._pending_lock = threading.Lock()
+        self.feed: MissionOrgFeed | None = None
+        self._feed_synced_generation = 0
+        self.state_reader: SMMStateReader | None = None
+        # Organisation names as last read from the database
+        self._seen_org_names: set[str] | None = None
+        # Assets added to the mission and not yet launched, as a heap of
+        # (launch deadline, sequence, asset)
+        self._launches: list[tuple[float, int, ParticipantAsset]] = []
+        self._launches_lock = threading.Lock()
+        self._launch_sequence = itertools.count()
 
     def get_user_account_asset(self, asset: str) -> UserAccountAsset:
         """
@@ -248,7 +360,8 @@ class MissionRunnerParticipant:
         smm_admin = self.smm.get_web_connection()
         for status in MISSION_ASSET_STATUSES:
             self.mission_asset_statuses[status] = \
-                smm_admin.get_or_create_mission_asset_status_value(
+                self.smm.lookups.mission_asset_status(
+                    smm_admin,
                     status,
                     status)
 
@@ -256,9 +369,11 @@ class MissionRunnerParticipant:
             self,
             asset: AssetConfig,
             smm_admin: SMMConnection,
-            smm_imt_challenge: SMMConnection) -> None:
+            smm_imt_challenge: SMMConnection) -> ParticipantAsset:
         """
         Setup the asset in SMM
+        Each step needs the one before, so only whole assets run in
+        parallel with each other.
         """
         asset_account = self.get_user_account_asset(asset.name)
         asset_smm_account = smm_admin.create_user(
@@ -267,11 +382,11 @@ class MissionRunnerParticipant:
         asset_smm = smm_admin.create_asset(
             asset_smm_account,
             asset.name,
-            smm_get_or_create_asset_type(smm_admin, asset.type))
+            self.smm.lookups.asset_type(smm_admin, asset.type))
         smm_asset = self.smm.get_web_connection(
             asset_account['username'],
             asset_account['password'])
-        organization = smm_get_or_create_organization(
+        organization = self.smm.lookups.organization(
             smm_imt_challenge,
             asset.organization)
         organization.add_member(asset_smm_account, role='A')
@@ -281,13 +396,14 @@ class MissionRunnerParticipant:
             organization.name)
         org_asset_user.add_asset(asset_smm)
         organization.add_member(asset_smm_account, role='M')
-        self.assets[asset.name] = ParticipantAsset(
+        return ParticipantAsset(
             self,
             asset,
             asset_smm,
             smm_asset,
             asset_account['username'],
-            asset_account['password'])
+            asset_account['password'],
+            clock=self.parent.clock)
 
     def add_assets(self) -> None:
         """
@@ -298,8 +414,32 @@ class MissionRunnerParticipant:
             smm_imt_challenge = self.smm.get_web_connection(
                 'imt-challenge',
                 self.runner_password)
-            for asset in self.parent.config.assets:
-                self._setup_asset(asset, smm_admin, smm_imt_challenge)
+            assets = run_in_parallel(
+                lambda asset: self._setup_asset(
+                    asset,
+                    smm_admin,
+                    smm_imt_challenge),
+                self.parent.config.assets,
+                self.PROVISION_WORKERS)
+            for participant_asset in assets:
+                self.assets[participant_asset.config.name] = participant_asset
+            self.prepare_assets()
+
+    def prepare_assets(self) -> None:
+        """
+        Create every asset's vehicle containers up front, stopped, so a
+        launch during a tick is only a matter of starting them
+        """
+        try:
+            run_in_parallel(
+                operator.methodcaller('prepare'),
+                self.assets.values(),
+                self.PROVISION_WORKERS)
+        except Exception:
+            # This participant is not yet known to the runner, so nothing
+            # else would remove the vehicles already created
+            self.stop()
+            raise
 
     def _add_poi_to_mission(self, mission: SMMMission, poi: POIConfig) -> bool:
         """
@@ -322,6 +462,11 @@ class MissionRunnerParticipant:
         """
         Create the mission and populate it with the starting data
         """
+        with metrics.participant(self.smm.name):
+            with metrics.phase('create_mission'):
+                self._create_mission()
+
+    def _create_mission(self) -> None:
         smm_imt_challenge = self._get_smm_imt_challenge()
         mission = smm_imt_challenge.create_mission(
             self.parent.config.name,
@@ -345,37 +490,194 @@ class MissionRunnerParticipant:
         """
         Get the specific mission we are monitoring
         """
-        return SMMMission(conn, self.mission_id, self.parent.config.name)
+        if self._mission is None or self._mission.connection is not conn:
+            self._mission = SMMMission(
+                conn,
+                self.mission_id,
+                self.parent.config.name)
+        return self._mission
+
+    def _pending_assets_by_org(self) -> dict[str, list[ParticipantAsset]]:
+        """
+        Assets not yet in the mission, by the organisation that adds them
+        """
+        if self._pending_by_org is None:
+            self._pending_by_org = {}
+            for asset in self.parent.config.assets:
+                participant_asset = self.assets[asset.name]
+                if participant_asset.added_time is None:
+                    self._pending_by_org.setdefault(
+                        asset.organization, []).append(participant_asset)
+        return self._pending_by_org
+
+    def organizations_added(self, org_names: Iterable[str]) -> None:
+        """
+        Add the assets that organisations new to the mission bring with
+        them. Safe to call more than once for the same organisation.
+        If adding an asset fails, it and the assets after it stay pending
+        and the error is raised, so the next check tries them again.
+        """
+        with self._pending_lock:
+            pending = self._pending_assets_by_org()
+            assets = [
+                asset
+                for org_name in org_names
+                for asset in pending.pop(org_name, [])
+            ]
+        in_mission = self._database_asset_statuses() if assets else {}
+        for index, asset in enumerate(assets):
+            try:
+                if asset.added_time is None:
+                    if in_mission and asset.config.name in in_mission:
+                        # An earlier attempt got as far as setting its
+                        # status, so adding it again would fail
+                        asset.added_time = self.parent.clock.now()
+                    else:
+                        asset.add_to_mission()
+                self._schedule_launch(asset)
+            except Exception:
+                self._restore_pending(assets[index:])
+                raise
+
+    def _restore_pending(self, assets: list[ParticipantAsset]) -> None:
+        with self._pending_lock:
+            pending = self._pending_assets_by_org()
+            for asset in assets:
+                pending.setdefault(asset.config.organization, []).append(asset)
 
     def check_added_organizations(self) -> None:
         """
         Check if any new organizations have been added to the mission
         """
+        with metrics.POLL_SECONDS.time(participant=self.smm.name):
+            self._check_added_organizations()
+
+    def _check_added_organizations(self) -> None:
+        feed = self.feed
+        generation = None
+        if feed is not None and feed.live:
+            generation = feed.generation
+            if generation == self._feed_synced_generation:
+                # The feed reports additions as they happen
+                return
+        # Catch up on anything the feed missed, or poll while it is down
+        self._poll_organizations()
+        if generation is not None:
+            self._feed_synced_generation = generation
+
+    def _poll_organizations(self) -> None:
+        if self.state_reader is not None and self._check_from_database():
+            return
         smm_imt_challenge = self._get_smm_imt_challenge()
         mission = self._get_mission(smm_imt_challenge)
         mission_orgs = mission.get_organizations()
+        mission_org_names = {org.organization.name for org in mission_orgs}
         if len(mission_orgs) > len(self.mission_org_list):
             # New organization(s) have been added
-            new_orgs = []
-            for org in mission_orgs:
-                found = any(
-                    org.organization.name == org_have.organization.name
-                    for org_have in self.mission_org_list
-                )
-                if not found:
-                    new_orgs.append(org.organization)
+            known = {org.organization.name for org in self.mission_org_list}
             # Might need to add assets in response to this
-            for asset in self.parent.config.assets:
-                if self.assets[asset.name].added_time is None:
-                    for org in new_orgs:
-                        if asset.organization == org.name:
-                            self.assets[asset.name].add_to_mission()
+            self.organizations_added(mission_org_names - known)
         self.mission_org_list = mission_orgs
 
+    def _check_from_database(self) -> bool:
+        """
+        Look for new organisations with a direct database query instead
+        of SMM's API. Returns False if the database could not be read.
+        """
+        if self.state_reader is None or self.mission_id is None:
+            return False
+        try:
+            rows = self.state_reader.mission_organizations(
+                int(self.mission_id))
+        except StateReadError:
+            log.warning(
+                "%s: database read failed, asking SMM instead",
+                self.smm.name,
+                exc_info=True)
+            return False
+        names = {name for _, name in rows}
+        if self._seen_org_names is None:
+            self._seen_org_names = {
+                org.organization.name for org in self.mission_org_list}
+        self.organizations_added(names - self._seen_org_names)
+        self._seen_org_names = names
+        return True
+
+    def _database_asset_statuses(self) -> dict[str, str]:
+        """
+        Status of every asset already in the mission, by name, when
+        reading from the database; empty otherwise
+        """
+        if self.state_reader is None or self.mission_id is None:
+            return {}
+        try:
+            return dict(self.state_reader.asset_statuses(
+                int(self.mission_id)))
+        except StateReadError:
+            log.warning(
+                "%s: database read failed, adding assets regardless",
+                self.smm.name,
+                exc_info=True)
+            return {}
+
+    def read_state_from_database(self) -> None:
+        """
+        Answer tick-time queries from the SMM database directly
+        """
+        self.state_reader = SMMStateReader(reader_connection_info(self.smm))
+
+    def watch_organizations(self) -> None:
+        """
+        Learn about organisations added to the mission straight from the
+        SMM database, instead of polling SMM every tick. Polling resumes
+        whenever the feed is down.
+        """
+        self.feed = open_mission_org_feed(self.smm, self._on_org_added)
+
+    def _on_org_added(self, mission_id: int, org_name: str) -> None:
+        if self.mission_id is None or int(self.mission_id) != mission_id:
+            return
+        log.debug("%s: organisation %s joined", self.smm.name, org_name)
+        self.organizations_added([org_name])
+
+    def _schedule_launch(self, asset: ParticipantAsset) -> None:
+        deadline = asset.launch_deadline()
+        if deadline is None:
+            return
+        with self._launches_lock:
+            heapq.heappush(
+                self._launches,
+                (deadline, next(self._launch_sequence), asset))
+
+    def next_launch_deadline(self) -> float | None:
+        """
+        The mission time at which the next asset is due to launch
+        """
+        with self._launches_lock:
+            return self._launches[0][0] if self._launches else None
+
+    def due_assets(self) -> list[ParticipantAsset]:
+        """
+        Take the assets in the mission that are ready to launch; the
+        caller is expected to launch them
+        """
+        now = self.parent.clock.now()
+        due = []
+        with self._launches_lock:
+            while self._launches and self._launches[0][0] <= now:
+                due.append(heapq.heappop(self._launches)[2])
+        return [asset for asset in due if asset.should_launch()]
+
     def stop(self) -> None:
         """
         Stop/Cleanup anything related to this participant
         """
+        if self.feed is not None:
+            self.feed.close()
+            self.feed = None
+        if self.state_reader is not None:
+            self.state_reader.close()
+            self.state_reader = None
         for _, asset in self.assets.items():
             asset.stop()
 
@@ -383,17 +685,44 @@ class MissionRunnerParticipant:
         """
         Do the required per-tick checks
         """
-        for _, asset in self.assets.items():
+        for asset in self.due_assets():
             asset.time_tick()
 
+    def tick(self) -> None:
+        """
+        Everything this participant does in one mission tick
+        """
+        self.check_added_organizations()
+        self.time_tick()
+
 
 class MissionRunner:
     """
     Runner for a Mission
+    Each participant only talks to its own SMM server, so participants are
+    provisioned in parallel; only the participant list is shared.
     """
-    def __init__(self, filename: str) -> None:
+    MAX_WORKERS = 32
+
+    def __init__(
+            self,
+            filename: str,
+            clock: MissionClock = REAL_TIME) -> None:
         self.config: MissionConfig = load_mission_config(filename)
+        self.clock = clock
         self.participants: list[MissionRunnerParticipant] = []
+        self._participants_lock = threading.Lock()
+        self.launcher = LaunchExecutor()
+
+    def vehicle_images(self) -> list[str]:
+        """
+        Docker images needed to launch every asset in this mission
+        """
+        images: dict[str, None] = {}
+        for asset_type in {asset.type for asset in self.config.assets}:
+            vehicle_type = VehicleDocker.map_vehicle_type(asset_type)
+            images.update(dict.fromkeys(Vehicle.images(vehicle_type)))
+        return sorted(images)
 
     def add_participant(self, smm: SMMServer) -> None:
         """
@@ -401,32 +730,91 @@ class MissionRunner:
         """
         log.info("Adding participant %s to mission runner", smm.name)
         participant = MissionRunnerParticipant(self, smm)
-        participant.add_imt_login()
-        participant.setup_mission_asset_statuses()
-        participant.add_assets()
-        self.participants.append(participant)
+        with metrics.participant(smm.name):
+            with metrics.phase('add_imt_login'):
+                participant.add_imt_login()
+            with metrics.phase('setup_mission_asset_statuses'):
+                participant.setup_mission_asset_statuses()
+            with metrics.phase('add_assets'):
+                participant.add_assets()
+        with self._participants_lock:
+            self.participants.append(participant)
+
+    def add_participants(
+            self,
+            smms: Iterable[SMMServer],
+            max_workers: int = MAX_WORKERS) -> None:
+        """
+        Add several participants at once
+        """
+        run_in_parallel(self.add_participant, smms, max_workers)
 
-    def create_mission(self) -> None:
+    def create_mission(self, max_workers: int = MAX_WORKERS) -> None:
         """
         Create the mission in participants server(s)
         """
         log.info("Creating mission '%s'", self.config.name)
-        for participant in self.participants:
-            participant.create_mission()
+        run_in_parallel(
+            operator.methodcaller('create_mission'),
+            self.participants,
+            max_workers)
 
     def stop(self) -> None:
         """
         Stop this mission
         """
         log.debug("Stopping mission runner")
+        # No launch may recreate a vehicle after it has been removed
+        self.launcher.shutdown()
         for participant in self.participants:
             participant.stop()
         log.debug("Mission runner stopped")
 
+    def watch_organizations(self) -> None:
+        """
+        Switch every participant to the database change feed, leaving
+        any participant whose database cannot be reached on polling
+        """
+        for participant in self.participants:
+            try:
+                participant.watch_organizations()
+            except RuntimeError as exc:
+                log.warning(
+                    "%s: no database feed, polling instead: %s",
+                    participant.smm.name,
+                    exc)
+
+    def read_state_from_database(self) -> None:
+        """
+        Poll every participant's database directly instead of SMM's API,
+        leaving any participant whose database cannot be reached on HTTP
+        """
+        for participant in self.participants:
+            try:
+                participant.read_state_from_database()
+            except RuntimeError as exc:
+                log.warning(
+                    "%s: no database reads, using SMM instead: %s",
+                    participant.smm.name,
+                    exc)
+
+    def next_launch_deadline(self) -> float | None:
+        """
+        The mission time at which the next asset in any participant's
+        mission is due to launch
+        """
+        deadlines = [
+            deadline for deadline in (
+                participant.next_launch_deadline()
+                for participant in self.participants)
+            if deadline is not None
+        ]
+        return min(deadlines, default=None)
+
     def time_tick(self) -> None:
         """
         Increment the mission time
         """
+        self.launcher.collect()
         for participant in self.participants:
-            participant.check_added_organizations()
-            participant.time_tick()
+            participant.tick()
@@ -0,0 +1,79 @@
+"""
+Mission clock
+Mission time can run faster than real time, so a long scenario can be
+rehearsed in minutes. Response times, launch deadlines and the length of
+the mission are all in mission seconds; only the tick scheduler works in
+real seconds.
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class MissionClock:
+    """
+    Mission time, running `speedup` times faster than the wall clock
+    Times are on the same scale as time.time(), and the two agree when
+    the clock is created.
+    """
+    def __init__(self, speedup: float = 1.0) -> None:
+        if speedup <= 0:
+            raise ValueError(f"speedup must be positive, not {speedup}")
+        self.speedup = speedup
+        self._epoch = time.time()
+
+    def now(self) -> float:
+        """
+        The current mission time
+        """
+        return self._epoch + (time.time() - self._epoch) * self.speedup
+
+    def to_wall(self, mission_seconds: float) -> float:
+        """
+        How many real seconds `mission_seconds` of mission time take
+        """
+        return mission_seconds / self.speedup
+
+    def wall_seconds_until(self, mission_time: float) -> float:
+        """
+        Real seconds from now until `mission_time`
+        """
+        return self.to_wall(mission_time - self.now())
+
+
+class SteppingClock(MissionClock):
+    """
+    A mission clock that only moves when told to, for tests
+    sleep() and monotonic() let it drive a TickScheduler without waiting.
+    """
+    def __init__(self, start: float = 0.0, speedup: float = 1.0) -> None:
+        super().__init__(speedup)
+        self._now = start
+        self._wall = 0.0
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, mission_seconds: float) -> None:
+        """
+        Move mission time forward
+        """
+        self._now += mission_seconds
+        self._wall += self.to_wall(mission_seconds)
+
+    def monotonic(self) -> float:
+        """
+        Real time as seen by a scheduler using this clock
+        """
+        return self._wall
+
+    def sleep(self, wall_seconds: float) -> None:
+        """
+        Let `wall_seconds` of real time pass instantly
+        """
+        self.advance(wall_seconds * self.speedup)
+
+
+# For anything not told which mission it belongs to
+REAL_TIME = MissionClock()
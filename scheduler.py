@@ -0,0 +1,362 @@
+"""
+Mission tick scheduler
+Ticks run on a fixed grid measured from the start of the mission, so the
+time a tick takes never pushes later ticks back. Each tick runs every
+participant at once, and a participant that takes too long is reported
+and left to finish rather than holding up the others.
+Two engines are available: TickScheduler runs each participant's tick on
+a worker thread, AsyncTickScheduler runs them as coroutines.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import math
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from services import metrics
+
+if TYPE_CHECKING:
+    from mission import (
+        MissionRunner,
+        MissionRunnerParticipant,
+        ParticipantAsset,
+    )
+
+log = logging.getLogger(__name__)
+
+
+def _next_launch(
+        runner: MissionRunner,
+        now: float,
+        poll_at: float) -> float | None:
+    """
+    When, on the scheduler's clock, the next launch is due, if that is
+    before the next poll at `poll_at`
+    """
+    deadline = runner.next_launch_deadline()
+    if deadline is None:
+        return None
+    # Launch deadlines are in mission time
+    wake = now + max(0.0, runner.clock.wall_seconds_until(deadline))
+    return wake if wake < poll_at else None
+
+
+def _launch_assets(assets: list[ParticipantAsset]) -> None:
+    for asset in assets:
+        asset.time_tick()
+
+
+def _tick_participant(participant: MissionRunnerParticipant) -> None:
+    name = participant.smm.name
+    with metrics.participant(name):
+        with metrics.PARTICIPANT_TICK_SECONDS.time(participant=name):
+            participant.tick()
+
+
+@dataclass
+class TickStats:
+    """Counts of what the scheduler had to skip or cut short."""
+
+    ticks: int = 0
+    missed_ticks: int = 0
+    # Participant name to the number of ticks it ran over budget
+    overruns: dict[str, int] = field(default_factory=dict)
+
+    def next_tick(
+            self,
+            tick: int,
+            last_tick: int,
+            elapsed: float,
+            period: float) -> int:
+        """
+        The next grid point still in the future after `tick` finished
+        `elapsed` seconds into the mission. Grid points that have already
+        passed are skipped and counted, so the mission ends on time
+        instead of stretching.
+        """
+        self.ticks += 1
+        next_tick = max(tick + 1, math.floor(elapsed / period) + 1)
+        if next_tick > tick + 1:
+            missed = min(next_tick, last_tick + 1) - tick - 1
+            self.missed_ticks += missed
+            metrics.MISSED_TICKS.inc(missed)
+            log.warning(
+                "Tick %d overran the %.1fs period, skipping %d tick(s)",
+                tick,
+                period,
+                missed)
+        return next_tick
+
+    def overrun(self, name: str, budget: float) -> None:
+        """
+        Record a participant running past its tick budget
+        """
+        self.overruns[name] = self.overruns.get(name, 0) + 1
+        metrics.TICK_OVERRUNS.inc(participant=name)
+        log.warning(
+            "Participant %s exceeded its %.1fs tick budget",
+            name,
+            budget)
+
+
+class TickScheduler:
+    # pylint: disable=R0902,R0903
+    """
+    Run a mission's ticks at a fixed rate
+    """
+    def __init__(
+            self,
+            runner: MissionRunner,
+            period: float = 1.0,
+            budget: float | None = None,
+            max_workers: int = 32,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep) -> None:
+        # pylint: disable=R0913,R0917
+        self.runner = runner
+        self.period = period
+        self.budget = budget if budget is not None else period
+        self.max_workers = max_workers
+        self.stats = TickStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._running: dict[str, Future[None]] = {}
+        # Launches started between ticks; these never hold up a poll
+        self._launching: dict[str, Future[None]] = {}
+
+    def run(self, duration: float) -> TickStats:
+        """
+        Tick every `period` seconds until `duration` seconds have passed
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='tick')
+        try:
+            start = self._clock()
+            last_tick = math.floor(duration / self.period)
+            tick = 1
+            while tick <= last_tick:
+                deadline = start + tick * self.period
+                self._launch_until(executor, deadline)
+                self._sleep(max(0.0, deadline - self._clock()))
+                with metrics.TICK_SECONDS.time():
+                    self._tick(executor, deadline + self.budget)
+                tick = self.stats.next_tick(
+                    tick,
+                    last_tick,
+                    self._clock() - start,
+                    self.period)
+        finally:
+            # Do not wait for participants stuck past the end of the mission
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self.stats
+
+    def _launch_until(
+            self,
+            executor: ThreadPoolExecutor,
+            poll_at: float) -> None:
+        """
+        Sleep to each launch deadline before `poll_at` and launch the
+        assets that are due, instead of waiting for the next tick
+        """
+        while True:
+            wake = _next_launch(self.runner, self._clock(), poll_at)
+            if wake is None:
+                return
+            self._sleep(max(0.0, wake - self._clock()))
+            launched = False
+            for participant in self.runner.participants:
+                name = participant.smm.name
+                if name in self._running or name in self._launching:
+                    # Still busy, and will launch them when it is done
+                    continue
+                due = participant.due_assets()
+                if due:
+                    self._launching[name] = executor.submit(
+                        _launch_assets, due)
+                    launched = True
+            if not launched:
+                return
+
+    def _collect_launches(self) -> None:
+        """
+        Forget finished launches, re-raising any failure
+        """
+        for name, future in list(self._launching.items()):
+            if future.done():
+                del self._launching[name]
+                future.result()
+
+    def _tick(self, executor: ThreadPoolExecutor, budget_end: float) -> None:
+        """
+        Run one tick for every participant, waiting until `budget_end`
+        """
+        self.runner.launcher.collect()
+        self._collect_launches()
+        started: dict[Future[None], str] = {}
+        for participant in self.runner.participants:
+            name = participant.smm.name
+            if name in self._running:
+                # Still busy with an earlier tick, already reported
+                continue
+            future = executor.submit(_tick_participant, participant)
+            self._running[name] = future
+            started[future] = name
+        wait(
+            self._running.values(),
+            timeout=max(0.0, budget_end - self._clock()))
+        for name, future in list(self._running.items()):
+            if not future.done():
+                if future in started:
+                    self.stats.overrun(name, self.budget)
+                continue
+            del self._running[name]
+            future.result()
+
+
+class AsyncTickScheduler:
+    # pylint: disable=R0902,R0903
+    """
+    Run a mission's ticks at a fixed rate with asyncio
+    Every participant's tick is a coroutine, and so is each asset launch
+    within it, so polling one SMM server never waits on another. The
+    smm_client and docker-py calls underneath are blocking, so they run
+    on a thread pool until they have async versions.
+    """
+    def __init__(
+            self,
+            runner: MissionRunner,
+            period: float = 1.0,
+            budget: float | None = None,
+            max_workers: int = 64,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Awaitable[None]] = asyncio.sleep) -> None:
+        # pylint: disable=R0913,R0917
+        self.runner = runner
+        self.period = period
+        self.budget = budget if budget is not None else period
+        self.max_workers = max_workers
+        self.stats = TickStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._executor: ThreadPoolExecutor | None = None
+        self._running: dict[str, asyncio.Task[None]] = {}
+        # Launches started between ticks; these never hold up a poll
+        self._launching: dict[str, asyncio.Task[None]] = {}
+
+    def run(self, duration: float) -> TickStats:
+        """
+        Tick every `period` seconds until `duration` seconds have passed
+        """
+        return asyncio.run(self._run(duration))
+
+    async def _run(self, duration: float) -> TickStats:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='tick')
+        try:
+            start = self._clock()
+            last_tick = math.floor(duration / self.period)
+            tick = 1
+            while tick <= last_tick:
+                deadline = start + tick * self.period
+                await self._launch_until(deadline)
+                await self._sleep(max(0.0, deadline - self._clock()))
+                with metrics.TICK_SECONDS.time():
+                    await self._tick(deadline + self.budget)
+                tick = self.stats.next_tick(
+                    tick,
+                    last_tick,
+                    self._clock() - start,
+                    self.period)
+        finally:
+            for task in [*self._running.values(), *self._launching.values()]:
+                task.cancel()
+            self._running.clear()
+            self._launching.clear()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return self.stats
+
+    async def _offload(self, func: Callable[[], None]) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, contextvars.copy_context().run, func)
+
+    async def _launch(self, assets: list[ParticipantAsset]) -> None:
+        await asyncio.gather(*(
+            self._offload(asset.time_tick) for asset in assets))
+
+    async def _tick_participant(
+            self,
+            participant: MissionRunnerParticipant) -> None:
+        name = participant.smm.name
+        with metrics.participant(name), \
+                metrics.PARTICIPANT_TICK_SECONDS.time(participant=name):
+            await self._offload(participant.check_added_organizations)
+            # Deciding to launch is only a clock check, so only the assets
+            # that are due need a thread
+            await self._launch(participant.due_assets())
+
+    async def _launch_until(self, poll_at: float) -> None:
+        """
+        Sleep to each launch deadline before `poll_at` and launch the
+        assets that are due, instead of waiting for the next tick
+        """
+        while True:
+            wake = _next_launch(self.runner, self._clock(), poll_at)
+            if wake is None:
+                return
+            await self._sleep(max(0.0, wake - self._clock()))
+            launched = False
+            for participant in self.runner.participants:
+                name = participant.smm.name
+                if name in self._running or name in self._launching:
+                    continue
+                due = participant.due_assets()
+                if due:
+                    self._launching[name] = asyncio.create_task(
+                        self._launch(due))
+                    launched = True
+            if not launched:
+                return
+
+    def _collect_launches(self) -> None:
+        """
+        Forget finished launches, re-raising any failure
+        """
+        for name, task in list(self._launching.items()):
+            if task.done():
+                del self._launching[name]
+                task.result()
+
+    async def _tick(self, budget_end: float) -> None:
+        """
+        Run one tick for every participant, waiting until `budget_end`
+        """
+        self.runner.launcher.collect()
+        self._collect_launches()
+        started: set[asyncio.Task[None]] = set()
+        for participant in self.runner.participants:
+            name = participant.smm.name
+            if name in self._running:
+                continue
+            task = asyncio.create_task(self._tick_participant(participant))
+            self._running[name] = task
+            started.add(task)
+        if self._running:
+            await asyncio.wait(
+                self._running.values(),
+                timeout=max(0.0, budget_end - self._clock()))
+        for name, task in list(self._running.items()):
+            if not task.done():
+                if task in started:
+                    self.stats.overrun(name, self.budget)
+                continue
+            del self._running[name]
+            task.result()
@@ -0,0 +1,166 @@
+"""
+Pooled SMM connections
+Logging in to SMM costs two requests and a new TCP connection, so
+authenticated sessions are kept and reused for as long as the server
+keeps accepting them.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+import requests
+import requests.adapters
+
+from smm_client.connection import SMMConnection
+
+from .tracing import trace_smm
+
+log = logging.getLogger(__name__)
+
+
+class PooledSMMConnection(SMMConnection):  # type: ignore[misc]
+    """
+    An SMMConnection that keeps its HTTP connections alive and logs in
+    again when the server has expired its session
+    """
+    session: requests.Session
+    LOGIN_PATH = '/accounts/login/'
+    # Expired sessions are sent to the admin's own login page by admin
+    # views, and to LOGIN_PATH by everything else
+    LOGIN_REDIRECT_PATHS = frozenset(('/accounts/login', '/admin/login'))
+    POOL_SIZE = 16
+
+    def __init__(
+            self,
+            url: str,
+            username: str,
+            password: str,
+            pool_size: int = POOL_SIZE) -> None:
+        self._login_lock = threading.Lock()
+        self._pool_size = pool_size
+        super().__init__(url, username, password)
+
+    def _mount_adapter(self, session: requests.Session) -> None:
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    def _url(self, path: str | None) -> str:
+        return f'{self.base_url}/{path}' if path else self.base_url
+
+    @staticmethod
+    def _csrf_headers(session: requests.Session) -> dict[str, str]:
+        return {'X-CSRFToken': session.cookies['csrftoken'] or ''}
+
+    def login(self, expired: requests.Session | None = None) -> None:
+        """
+        Log in with a fresh session and start using it.
+        `expired` is the session a request was redirected to the login
+        page with; if another thread has already replaced it, there is
+        nothing to do. The old session is not closed, as other threads
+        may still have requests in flight on it.
+        """
+        with self._login_lock:
+            if expired is not None and self.session is not expired:
+                return
+            session = requests.Session()
+            self._mount_adapter(session)
+            session.get(self._url(None))
+            session.post(
+                self._url(self.LOGIN_PATH),
+                data={'username': self.username, 'password': self.password},
+                headers=self._csrf_headers(session))
+            self.session = session
+
+    def _is_login_redirect(self, response: requests.Response) -> bool:
+        return bool(response.history) and (
+            urlparse(response.url).path.rstrip('/')
+            in self.LOGIN_REDIRECT_PATHS)
+
+    def _send(
+            self,
+            request: Callable[[requests.Session], requests.Response],
+    ) -> requests.Response:
+        """
+        Make a request, logging in again and retrying once if the
+        session has expired. A request sent with an expired session is
+        redirected to the login page without being processed, so it is
+        safe to repeat.
+        """
+        session = self.session
+        response = request(session)
+        if self._is_login_redirect(response):
+            log.debug("SMM session for %s expired, logging in", self.username)
+            self.login(session)
+            response = request(self.session)
+        return response
+
+    def get(self, path: str | None = None) -> requests.Response:
+        return self._send(lambda session: session.get(self._url(path)))
+
+    def get_json(self, path: str) -> Any:
+        return self._send(lambda session: session.get(
+            self._url(path),
+            headers={'Accept': 'application/json'})).json()
+
+    def post(self, path: str, data: Any = None) -> requests.Response:
+        return self._send(lambda session: session.post(
+            self._url(path),
+            data=data,
+            headers=self._csrf_headers(session)))
+
+    def delete(self, path: str) -> requests.Response:
+        return self._send(lambda session: session.delete(
+            self._url(path),
+            headers=self._csrf_headers(session)))
+
+
+class SMMConnectionPool:
+    """
+    Authenticated connections to SMM servers, one per (server, username)
+    """
+    def __init__(
+            self,
+            connection_factory: Callable[[str, str, str], SMMConnection] = (
+                PooledSMMConnection)) -> None:
+        self._connection_factory = connection_factory
+        self._lock = threading.Lock()
+        self._connections: dict[tuple[str, str], SMMConnection] = {}
+
+    def get(self, url: str, username: str, password: str) -> SMMConnection:
+        """
+        Return a logged in connection for `username` on the server at
+        `url`, reusing an earlier one with the same password
+        """
+        key = (url, username)
+        with self._lock:
+            connection = self._connections.get(key)
+        if connection is not None and connection.password == password:
+            return connection
+        # Log in outside the lock so other users are not held up
+        connection = self._connection_factory(url, username, password)
+        trace_smm(connection)
+        with self._lock:
+            existing = self._connections.get(key)
+            if existing is None or existing.password != password:
+                self._connections[key] = connection
+                return connection
+        # Another thread logged in first
+        connection.session.close()
+        return existing
+
+    def close(self) -> None:
+        """
+        Close and forget every connection
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.session.close()
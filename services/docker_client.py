@@ -0,0 +1,84 @@
+"""
+Process-wide Docker client
+Every service shares one DockerClient, so its HTTP connection pool to the
+daemon is reused instead of opening a new session per participant or
+vehicle. docker-py clients are safe to share between threads as long as
+the connection pool is large enough for the threads using it.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+import docker
+
+from .tracing import trace_docker
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_SIZE = 32
+
+
+class _SharedClient:
+    # pylint: disable=R0903
+    """
+    Holder for the shared client and its settings.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.client: docker.DockerClient | None = None
+        self.max_pool_size = DEFAULT_MAX_POOL_SIZE
+
+
+_SHARED = _SharedClient()
+
+
+def configure_docker_client(max_pool_size: int) -> None:
+    """
+    Set the connection pool size for the shared client.
+    Must be called before the client is first used.
+    """
+    with _SHARED.lock:
+        if _SHARED.client is not None:
+            raise RuntimeError(
+                "The shared Docker client has already been created")
+        _SHARED.max_pool_size = max_pool_size
+
+
+def use_docker_client(client: docker.DockerClient) -> None:
+    """
+    Share `client` instead of connecting to the daemon, e.g. a fake one
+    for load tests. Must be called before the client is first used.
+    """
+    with _SHARED.lock:
+        if _SHARED.client is not None:
+            raise RuntimeError(
+                "The shared Docker client has already been created")
+        _SHARED.client = client
+
+
+def get_docker_client() -> docker.DockerClient:
+    """
+    Return the shared Docker client, creating it on first use.
+    """
+    with _SHARED.lock:
+        if _SHARED.client is None:
+            _SHARED.client = docker.from_env(
+                max_pool_size=_SHARED.max_pool_size)
+            trace_docker(_SHARED.client)
+            log.debug(
+                "Created shared Docker client with %d connections",
+                _SHARED.max_pool_size)
+        return _SHARED.client
+
+
+def close_docker_client() -> None:
+    """
+    Close the shared Docker client; the next use creates a new one.
+    """
+    with _SHARED.lock:
+        client = _SHARED.client
+        _SHARED.client = None
+    if client is not None:
+        client.close()
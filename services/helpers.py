@@ -4,36 +4,53 @@ String helpers
 
 from __future__ import annotations
 
+import base64
+import contextvars
+import hashlib
 import logging
 import random
 import re
 import secrets
 import string
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Callable
+from typing import Callable, Iterable, TypeVar
 
 import docker
 import docker.errors
 import docker.models.containers
 import docker.models.networks
+import docker.models.volumes
 
 log = logging.getLogger(__name__)
 
+_T = TypeVar('_T')
+_R = TypeVar('_R')
+
 _SECRET_ALPHABET = string.ascii_letters + string.digits + "-_"
 _DOCKER_NAME_INVALID_CHARS = re.compile(r"[^a-z0-9_.-]+")
 _MAX_IMAGE_PULL_WORKERS = 8
 _DOCKER_CONFLICT_STATUS = 409
 _DOCKER_ACTIVE_ENDPOINTS_MESSAGE = "active endpoints"
+# Django upgrades the hash to its own iteration count on the first login
+_DJANGO_PBKDF2_ITERATIONS = 100000
 
 
-def _is_endpoint_conflict(exc: docker.errors.APIError) -> bool:
+def _is_conflict(exc: docker.errors.APIError) -> bool:
     """
-    Return True for Docker network conflicts caused by attached endpoints.
+    Return True for Docker 409 Conflict responses.
     """
     response = getattr(exc, "response", None)
     status_code = getattr(response, "status_code", None)
-    if status_code == _DOCKER_CONFLICT_STATUS:
+    return bool(status_code == _DOCKER_CONFLICT_STATUS)
+
+
+def _is_endpoint_conflict(exc: docker.errors.APIError) -> bool:
+    """
+    Return True for Docker network conflicts caused by attached endpoints.
+    """
+    if _is_conflict(exc):
         return True
     explanation = getattr(exc, "explanation", "")
     details = f"{explanation} {' '.join(str(arg) for arg in exc.args)}"
@@ -74,6 +91,26 @@ def remove_network(network: docker.models.networks.Network | None) -> None:
             getattr(exc, "explanation", exc))
 
 
+def remove_volume(volume: docker.models.volumes.Volume | None) -> None:
+    """
+    Remove a docker volume, tolerating volumes that have already been
+    removed or are still in use by a container.
+    """
+    if volume is None:
+        return
+    try:
+        volume.remove(force=True)
+    except docker.errors.NotFound:
+        pass
+    except docker.errors.APIError as exc:
+        if not _is_conflict(exc):
+            raise
+        log.warning(
+            "Skipping removal of volume %s: %s",
+            volume.name,
+            getattr(exc, "explanation", exc))
+
+
 def log_container_logs_on_timeout(
         container: docker.models.containers.Container | None,
         name: str,
@@ -99,6 +136,18 @@ def log_container_logs_on_timeout(
             exc_info=True)
 
 
+def container_environment(
+        container: docker.models.containers.Container) -> dict[str, str]:
+    """
+    Return a container's configured environment as a dict.
+    """
+    env: dict[str, str] = {}
+    for entry in container.attrs.get('Config', {}).get('Env') or []:
+        key, _, value = str(entry).partition('=')
+        env[key] = value
+    return env
+
+
 def get_random_string(length: int) -> str:
     """
     Get a random string of ascii chars (non-secret, e.g. account names).
@@ -114,17 +163,38 @@ def get_random_secret(length: int = 32) -> str:
     return ''.join(secrets.choice(_SECRET_ALPHABET) for _ in range(length))
 
 
+def django_password_hash(password: str) -> str:
+    """
+    Hash a password the way Django's default PBKDF2 hasher stores it
+    """
+    salt = get_random_secret(22)
+    digest = hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode(),
+        salt.encode(),
+        _DJANGO_PBKDF2_ITERATIONS)
+    return (
+        f'pbkdf2_sha256${_DJANGO_PBKDF2_ITERATIONS}${salt}$'
+        f'{base64.b64encode(digest).decode()}')
+
+
 def wait_until(
         predicate: Callable[[], bool],
         timeout: float = 120.0,
         interval: float = 1.0,
-        description: str = "condition") -> None:
+        description: str = "condition",
+        initial_interval: float | None = None,
+        wake: threading.Event | None = None) -> None:
+    # pylint: disable=R0913,R0917
     """
     Poll `predicate()` until it returns truthy, or raise TimeoutError
     once `timeout` seconds have elapsed. Sleeps `interval` seconds
     between polls.
+    With `initial_interval`, polling starts that fast and the gap doubles
+    up to `interval`. With `wake`, a sleep ends early when it is set.
     """
     deadline = time.monotonic() + timeout
+    delay = interval if initial_interval is None else initial_interval
     while True:
         if predicate():
             return
@@ -132,23 +202,47 @@ def wait_until(
         if remaining <= 0:
             raise TimeoutError(
                 f"Timed out after {timeout:.0f}s waiting for {description}")
-        time.sleep(min(interval, remaining))
+        if wake is None:
+            time.sleep(min(delay, remaining))
+        elif wake.wait(min(delay, remaining)):
+            wake.clear()
+        delay = min(delay * 2, interval)
+
+
+def run_in_parallel(
+        func: Callable[[_T], _R],
+        items: Iterable[_T],
+        max_workers: int) -> list[_R]:
+    """
+    Call `func` on every item using at most `max_workers` threads.
+    Waits for every call to finish, then returns the results in item
+    order or raises the first failure in item order.
+    Each call sees the caller's context variables.
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(
+            max_workers=min(len(items), max_workers)) as ex:
+        futures = [
+            ex.submit(contextvars.copy_context().run, func, item)
+            for item in items
+        ]
+    return [f.result() for f in futures]
 
 
 def pull_images(client: docker.DockerClient, images: list[str]) -> None:
     """
     Pull all images in parallel. Blocks until all pulls complete.
+    Duplicate images are only pulled once.
     The shared Docker client is only used for independent image pull calls.
     """
+    images = list(dict.fromkeys(images))
     if not images:
         log.debug("No images to pull")
         return
     log.info("Pulling %d image(s): %s", len(images), ", ".join(images))
-    max_workers = min(len(images), _MAX_IMAGE_PULL_WORKERS)
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(client.images.pull, image) for image in images]
-        for f in futures:
-            f.result()
+    run_in_parallel(client.images.pull, images, _MAX_IMAGE_PULL_WORKERS)
     log.debug("All images pulled")
 
 
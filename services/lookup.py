@@ -0,0 +1,156 @@
+"""
+SMM lookup cache
+Asset types, organisations and mission asset status values rarely change
+once a mission is set up, so each SMM server keeps one copy of them
+instead of listing them again for every asset.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, TypeVar, cast
+
+from smm_client.assets import SMMAssetType
+from smm_client.organizations import SMMOrganization
+
+if TYPE_CHECKING:
+    from smm_client.connection import SMMConnection
+    from smm_client.missions import SMMMissionAssetStatusValue
+
+log = logging.getLogger(__name__)
+
+_T = TypeVar('_T')
+
+
+class SMMLookupCache:
+    """
+    Name to id lookups for one SMM server
+    Each table is fetched on first use and updated when this cache creates
+    an entry. Anything created behind its back needs invalidate().
+    Returned objects are bound to the connection passed in, so the caller's
+    credentials are used for any follow-up requests.
+    Requests are made under a lock for the table or name being fetched,
+    so callers only wait for others looking up the same thing.
+    """
+    def __init__(self) -> None:
+        # Guards the dicts below, never held across a request
+        self._lock = threading.Lock()
+        self._request_locks: dict[
+            tuple[tuple[str, ...], str | None], threading.Lock] = {}
+        # Organisation listings depend on the user asking, so their
+        # table is keyed on the username too
+        self._tables: dict[tuple[str, ...], dict[str, Any]] = {}
+
+    def _request_lock(
+            self,
+            table: tuple[str, ...],
+            name: str | None = None) -> threading.Lock:
+        with self._lock:
+            return self._request_locks.setdefault(
+                (table, name), threading.Lock())
+
+    def _entries(
+            self,
+            table: tuple[str, ...],
+            fetch: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """
+        Return the cached entries of `table`, fetching them if needed
+        """
+        with self._lock:
+            entries = self._tables.get(table)
+        if entries is not None:
+            return entries
+        with self._request_lock(table):
+            with self._lock:
+                entries = self._tables.get(table)
+            if entries is None:
+                entries = fetch()
+                with self._lock:
+                    self._tables[table] = entries
+        return entries
+
+    def _lookup(
+            self,
+            table: tuple[str, ...],
+            name: str,
+            fetch: Callable[[], dict[str, _T]],
+            create: Callable[[], _T]) -> _T:
+        """
+        Find `name` in `table`, creating it if needed
+        """
+        entries = self._entries(table, fetch)
+        with self._lock:
+            if name in entries:
+                return cast(_T, entries[name])
+        with self._request_lock(table, name):
+            with self._lock:
+                if name in entries:
+                    return cast(_T, entries[name])
+            log.debug("Creating %s %s", table[0], name)
+            value = create()
+            with self._lock:
+                entries[name] = value
+            return value
+
+    def asset_type(
+            self,
+            connection: SMMConnection,
+            name: str) -> SMMAssetType:
+        """
+        Find the asset type called `name`, creating it if needed
+        """
+        asset_type_id = self._lookup(
+            ('asset type',),
+            name,
+            lambda: {
+                asset_type.name: asset_type.id
+                for asset_type in connection.get_asset_types()
+            },
+            lambda: connection.create_asset_type(name, name).id)
+        return SMMAssetType(connection, asset_type_id, name)
+
+    def organization(
+            self,
+            connection: SMMConnection,
+            name: str) -> SMMOrganization:
+        """
+        Find the organisation called `name` among those the connection's
+        user belongs to, creating it if needed
+        """
+        organization_id = self._lookup(
+            ('organisation', connection.username),
+            name,
+            lambda: {
+                organization.name: organization.id
+                for organization in connection.get_organizations()
+            },
+            lambda: connection.create_organization(name).id)
+        return SMMOrganization(connection, organization_id, name)
+
+    def mission_asset_status(
+            self,
+            connection: SMMConnection,
+            name: str,
+            description: str) -> SMMMissionAssetStatusValue:
+        """
+        Find the mission asset status value called `name`, creating it if
+        needed
+        """
+        return self._lookup(
+            ('mission asset status',),
+            name,
+            lambda: {
+                status.name: status
+                for status in connection.get_mission_asset_status_values()
+            },
+            lambda: connection.create_mission_asset_status_value(
+                name,
+                description))
+
+    def invalidate(self) -> None:
+        """
+        Forget everything, so the next lookup fetches fresh lists
+        """
+        with self._lock:
+            self._tables.clear()
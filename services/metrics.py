@@ -0,0 +1,474 @@
+"""
+Runtime metrics
+Startup phases, ticks, polls and launches record how long they took in a
+process-wide registry. The registry can be served or written in the
+Prometheus text format, and summarised as JSON when the run ends.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import contextlib
+import contextvars
+import http.server
+import json
+import logging
+import math
+import os
+import threading
+import time
+import types
+from typing import Any, Iterator
+
+log = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond polls up to slow image pulls
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_PARTICIPANT: contextvars.ContextVar[str] = contextvars.ContextVar(
+    'participant', default='')
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f'{{{pairs}}}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf'
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(abc.ABC):
+    """
+    A named metric with one series per combination of label values
+    """
+    TYPE = ''
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        try:
+            if len(labels) == len(self.labels):
+                return tuple(map(labels.__getitem__, self.labels))
+        except KeyError:
+            pass
+        raise ValueError(
+            f"{self.name} needs labels {', '.join(self.labels)}")
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        """
+        Forget every recorded value
+        """
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """
+        Prometheus sample lines for every series
+        """
+
+    @abc.abstractmethod
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Every series as a JSON-friendly dict
+        """
+
+
+class Counter(_Metric):
+    """
+    A count that only goes up
+    """
+    TYPE = 'counter'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Add `amount` to the series for `labels`
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        The current count for `labels`
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{_format_labels(self.labels, key)} '
+            f'{_format_value(value)}'
+            for key, value in values
+        ]
+
+    def summary(self) -> list[dict[str, Any]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            {'labels': dict(zip(self.labels, key)), 'value': value}
+            for key, value in values
+        ]
+
+
+class _Series:
+    # pylint: disable=R0903
+    """
+    Observations for one histogram series
+    """
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+
+class Histogram(_Metric):
+    """
+    A distribution of durations, in seconds
+    """
+    TYPE = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = (*sorted(buckets), math.inf)
+        self._series: dict[LabelValues, _Series] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record one observation for `labels`
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.counts[index] += 1
+            series.count += 1
+            series.total += value
+            series.minimum = min(series.minimum, value)
+            series.maximum = max(series.maximum, value)
+
+    def time(self, **labels: str) -> _Timer:
+        """
+        Observe how long the block takes, whether or not it raises
+        """
+        return _Timer(self, labels)
+
+    def count(self, **labels: str) -> int:
+        """
+        How many observations have been made for `labels`
+        """
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series.count if series is not None else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+            for key, values in series:
+                cumulative = 0
+                for bound, count in zip(self.buckets, values.counts):
+                    cumulative += count
+                    labels = _format_labels(
+                        (*self.labels, 'le'), (*key, _format_value(bound)))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labels, key)
+                lines.append(
+                    f'{self.name}_sum{labels} {_format_value(values.total)}')
+                lines.append(f'{self.name}_count{labels} {values.count}')
+        return lines
+
+    def summary(self) -> list[dict[str, Any]]:
+        with self._lock:
+            series = sorted(self._series.items())
+            return [
+                {
+                    'labels': dict(zip(self.labels, key)),
+                    'count': values.count,
+                    'sum': values.total,
+                    'mean': values.total / values.count,
+                    'min': values.minimum,
+                    'max': values.maximum,
+                }
+                for key, values in series
+            ]
+
+
+class _Timer:
+    """
+    Context manager observing the time spent in its block
+    """
+    __slots__ = ('_histogram', '_labels', '_start')
+
+    def __init__(self, histogram: Histogram, labels: dict[str, str]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc: BaseException | None,
+            traceback: types.TracebackType | None) -> None:
+        self._histogram.observe(
+            time.perf_counter() - self._start, **self._labels)
+
+
+class MetricsRegistry:
+    """
+    A set of metrics that are exported together
+    """
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def counter(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = ()) -> Counter:
+        """
+        Register a new counter
+        """
+        counter = Counter(name, documentation, labels)
+        self._register(counter)
+        return counter
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Register a new histogram
+        """
+        histogram = Histogram(name, documentation, labels, buckets)
+        self._register(histogram)
+        return histogram
+
+    def reset(self) -> None:
+        """
+        Forget every recorded value, keeping the metrics
+        """
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.TYPE}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Every metric's series, by metric name
+        """
+        return {
+            name: metric.summary()
+            for name, metric in self._metrics.items()
+        }
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the Prometheus text format to `path`, replacing it in one
+        step so a textfile collector never reads half a file
+        """
+        partial = f'{path}.tmp'
+        with open(partial, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(partial, path)
+
+    def write_summary(self, path: str) -> None:
+        """
+        Write the JSON summary to `path`
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, indent=2)
+            file.write('\n')
+
+
+REGISTRY = MetricsRegistry()
+
+PHASE_SECONDS = REGISTRY.histogram(
+    'imt_phase_seconds',
+    'Time spent in each startup phase, per participant where it applies',
+    ('phase', 'participant'))
+TICK_SECONDS = REGISTRY.histogram(
+    'imt_tick_seconds',
+    'Time for every participant to finish one scheduler tick')
+PARTICIPANT_TICK_SECONDS = REGISTRY.histogram(
+    'imt_participant_tick_seconds',
+    "Time for one participant's tick",
+    ('participant',))
+POLL_SECONDS = REGISTRY.histogram(
+    'imt_poll_seconds',
+    'Time to check a mission for newly added organisations',
+    ('participant',))
+LAUNCH_DELAY_SECONDS = REGISTRY.histogram(
+    'imt_launch_delay_seconds',
+    'Mission seconds between an asset falling due and it launching',
+    ('participant',))
+LAUNCH_SECONDS = REGISTRY.histogram(
+    'imt_launch_seconds',
+    'Time to start the containers for one vehicle',
+    ('participant',))
+MISSED_TICKS = REGISTRY.counter(
+    'imt_missed_ticks_total',
+    'Ticks skipped because an earlier tick overran')
+TICK_OVERRUNS = REGISTRY.counter(
+    'imt_tick_overruns_total',
+    'Ticks in which a participant ran past its budget',
+    ('participant',))
+
+
+@contextlib.contextmanager
+def participant(name: str) -> Iterator[None]:
+    """
+    Label startup phases in this block with participant `name`
+    """
+    token = _PARTICIPANT.set(name)
+    try:
+        yield
+    finally:
+        _PARTICIPANT.reset(token)
+
+
+def current_participant() -> str:
+    """
+    The participant set by the innermost `participant` block, or ''
+    """
+    return _PARTICIPANT.get()
+
+
+def phase(name: str) -> _Timer:
+    """
+    Time a startup phase for the current participant, if any
+    """
+    return PHASE_SECONDS.time(phase=name, participant=_PARTICIPANT.get())
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve the registry at /metrics
+        """
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header(
+            'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # pylint: disable=redefined-builtin
+        log.debug(format, *args)
+
+
+class MetricsServer:
+    """
+    Serve a registry for Prometheus to scrape, on a background thread
+    """
+    def __init__(
+            self,
+            port: int,
+            host: str = '127.0.0.1',
+            registry: MetricsRegistry = REGISTRY) -> None:
+        handler = type('Handler', (_Handler,), {'registry': registry})
+        self._server = http.server.ThreadingHTTPServer((host, port), handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        """
+        The port being served, useful when asked for port 0
+        """
+        return int(self._server.server_address[1])
+
+    def start(self) -> None:
+        """
+        Start serving
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name='metrics',
+            daemon=True)
+        self._thread.start()
+        log.info("Serving metrics on http://localhost:%d/metrics", self.port)
+
+    def stop(self) -> None:
+        """
+        Stop serving
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
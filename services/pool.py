@@ -0,0 +1,358 @@
+"""
+Pool of pre-started SMM stacks
+Building an SMM stack (network, postgres, SMM) and waiting for it to
+become ready is the slowest part of starting a participant. The pool keeps
+`size` stacks running ahead of time so a participant can claim one
+without waiting.
+
+Every resource in a pool stack, including its cloned database volume, is
+labelled with POOL_LABEL set to the stack's original SMM container name.
+Claiming a stack renames the SMM container, so a stack is unclaimed while
+its container name still matches the label. Unclaimed stacks left running
+by an earlier run are adopted by the next pool; stopped or expired ones are
+garbage collected.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+import docker.errors
+import docker.models.containers
+
+from .helpers import (
+    get_random_string,
+    remove_container,
+    remove_network,
+    remove_volume,
+)
+from .postgres import SharedPostgresServer
+from .smm import SMMServer
+from .template import DatabaseTemplate
+
+log = logging.getLogger(__name__)
+
+POOL_LABEL = 'imt-challenge.pool'
+POOL_CREATED_LABEL = 'imt-challenge.pool-created'
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no pooled SMM stack becomes available in time."""
+
+
+class SMMPool:
+    # pylint: disable=R0902
+    """
+    Keep a number of ready SMM stacks warm for participants to claim
+    """
+    NAME_PREFIX = 'imt-pool'
+    # A stack with no SMM container yet is only stale after this long
+    BUILD_GRACE = 10 * 60
+
+    def __init__(
+            self,
+            size: int,
+            docker_client: docker.DockerClient,
+            max_age: float = 12 * 60 * 60,
+            check_interval: float = 30.0,
+            retry_delay: float = 10.0,
+            template: DatabaseTemplate | None = None,
+            shared_db: SharedPostgresServer | None = None) -> None:
+        # pylint: disable=R0913,R0917
+        if size <= 0:
+            raise ValueError(f"pool size must be positive, not {size}")
+        self.size = size
+        self.docker_client = docker_client
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.retry_delay = retry_delay
+        self.template = template
+        self.shared_db = shared_db
+        self._ready: collections.deque[SMMServer] = collections.deque()
+        self._building = 0
+        self._building_names: set[str] = set()
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._builders = ThreadPoolExecutor(
+            max_workers=size,
+            thread_name_prefix='smm-pool-build')
+        self._thread: threading.Thread | None = None
+
+    def _new_member_name(self) -> str:
+        return f'{self.NAME_PREFIX}-{get_random_string(8)}-smm'
+
+    def _build(self) -> None:
+        """
+        Build and start one pool member, then mark it ready.
+        """
+        name = self._new_member_name()
+        labels = {
+            POOL_LABEL: name,
+            POOL_CREATED_LABEL: str(int(time.time())),
+        }
+        with self._cond:
+            self._building_names.add(name)
+        smm: SMMServer | None = None
+        try:
+            smm = SMMServer(
+                name,
+                None,
+                self.docker_client,
+                labels=labels,
+                template=self.template,
+                shared_db=self.shared_db)
+            smm.start()
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Failed to build pool member %s", name)
+            if smm is not None:
+                smm.cleanup()
+            else:
+                self._remove_stack(name)
+            # Back off so a broken daemon or image does not spin the pool
+            with self._cond:
+                self._building_names.discard(name)
+                self._cond.wait(timeout=self.retry_delay)
+                self._building -= 1
+                self._cond.notify_all()
+            return
+        log.info("Pool member %s ready on port %s", name, smm.port)
+        with self._cond:
+            self._building_names.discard(name)
+            self._building -= 1
+            self._ready.append(smm)
+            self._cond.notify_all()
+
+    def _refill(self) -> None:
+        """
+        Start building enough members to bring the pool back up to size.
+        """
+        with self._cond:
+            if self._stopping:
+                return
+            missing = self.size - len(self._ready) - self._building
+            if missing <= 0:
+                return
+            self._building += missing
+        log.debug("Refilling SMM pool with %d member(s)", missing)
+        for _ in range(missing):
+            self._builders.submit(self._build)
+
+    def _run(self) -> None:
+        """
+        Background loop: keep the pool full and collect stale members.
+        """
+        while True:
+            self._refill()
+            try:
+                self.collect_garbage()
+            except docker.errors.APIError:
+                log.warning("SMM pool garbage collection failed",
+                            exc_info=True)
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(timeout=self.check_interval)
+                if self._stopping:
+                    return
+
+    def _pool_containers(self) -> list[docker.models.containers.Container]:
+        return list(self.docker_client.containers.list(
+            all=True,
+            filters={'label': POOL_LABEL}))
+
+    def _remove_stack(self, member: str) -> None:
+        """
+        Remove every container, network and volume labelled as part of
+        `member`, and its database in the shared server if there is one.
+        """
+        label = f'{POOL_LABEL}={member}'
+        for container in self.docker_client.containers.list(
+                all=True, filters={'label': label}):
+            remove_container(container)
+        networks = list(self.docker_client.networks.list(
+            filters={'label': label}))
+        if self.shared_db is not None:
+            self.shared_db.release_name(
+                member,
+                next(
+                    (net for net in networks if net.name == f'{member}-net'),
+                    None))
+        for network in networks:
+            remove_network(network)
+        for volume in self.docker_client.volumes.list(
+                filters={'label': label}):
+            remove_volume(volume)
+
+    def _is_expired(
+            self,
+            labels: dict[str, str],
+            max_age: float | None = None) -> bool:
+        try:
+            created = float(labels.get(POOL_CREATED_LABEL, ''))
+        except ValueError:
+            return True
+        if max_age is None:
+            max_age = self.max_age
+        return time.time() - created > max_age
+
+    def adopt(self) -> int:
+        """
+        Add running, unclaimed stacks left by an earlier run to the pool.
+        Returns the number of stacks adopted.
+        """
+        with self._cond:
+            known = {smm.name for smm in self._ready}
+        adopted = 0
+        for container in self._pool_containers():
+            member = container.labels.get(POOL_LABEL)
+            if (
+                    container.name != member
+                    or member in known
+                    or container.status != 'running'
+                    or self._is_expired(container.labels)):
+                continue
+            try:
+                smm = SMMServer.from_container(
+                    container, self.docker_client, self.shared_db)
+            except (docker.errors.APIError, KeyError, RuntimeError):
+                log.debug("Cannot adopt pool member %s", member,
+                          exc_info=True)
+                continue
+            if not smm.is_running():
+                continue
+            with self._cond:
+                if len(self._ready) + self._building >= self.size:
+                    break
+                self._ready.append(smm)
+                self._cond.notify_all()
+            adopted += 1
+            log.info("Adopted pool member %s on port %s", member, smm.port)
+        return adopted
+
+    def collect_garbage(self) -> int:
+        """
+        Remove unclaimed pool stacks that have stopped or expired.
+        Returns the number of stacks removed.
+        """
+        with self._cond:
+            ready = list(self._ready)
+        stale = [
+            smm for smm in ready
+            if not smm.is_running() or self._is_expired(smm.labels)
+        ]
+        with self._cond:
+            for smm in stale:
+                if smm in self._ready:
+                    self._ready.remove(smm)
+            known = {smm.name for smm in self._ready}
+            if stale:
+                self._cond.notify_all()
+        for smm in stale:
+            log.info("Removing stale pool member %s", smm.name)
+            smm.cleanup()
+        removed = len(stale)
+        stacks: dict[str, list[docker.models.containers.Container]] = {}
+        for container in self._pool_containers():
+            member = container.labels.get(POOL_LABEL)
+            if member is not None:
+                stacks.setdefault(member, []).append(container)
+        for member, containers in stacks.items():
+            if member in known or not self._is_stale_stack(member, containers):
+                continue
+            log.info("Removing stale pool stack %s", member)
+            self._remove_stack(member)
+            removed += 1
+        return removed
+
+    def _is_stale_stack(
+            self,
+            member: str,
+            containers: list[docker.models.containers.Container]) -> bool:
+        """
+        Decide whether a pool stack found on the Docker host can be removed.
+        Claimed stacks (renamed SMM container) are never stale.
+        """
+        with self._cond:
+            if member in self._building_names:
+                return False
+        names = {container.name for container in containers}
+        if not names <= {member, f'{member}-db-server'}:
+            return False
+        if self._is_expired(containers[0].labels):
+            return True
+        smm = next((c for c in containers if c.name == member), None)
+        if smm is None:
+            # Possibly still being built by another process
+            return self._is_expired(
+                containers[0].labels, self.BUILD_GRACE)
+        return smm.status not in ('created', 'running')
+
+    def start(self) -> None:
+        """
+        Collect stale stacks, adopt usable ones and start refilling.
+        """
+        self.collect_garbage()
+        self.adopt()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='smm-pool',
+            daemon=True)
+        self._thread.start()
+
+    def _take(self, deadline: float) -> SMMServer:
+        with self._cond:
+            while not self._ready:
+                remaining = deadline - time.monotonic()
+                if self._stopping or remaining <= 0:
+                    raise PoolExhaustedError(
+                        "No pooled SMM stack became available")
+                self._cond.wait(timeout=remaining)
+            smm = self._ready.popleft()
+            # Wake the refill loop now a slot has been freed
+            self._cond.notify_all()
+            return smm
+
+    def claim(self, name: str, timeout: float = 300.0) -> SMMServer:
+        """
+        Take a ready SMM stack from the pool and rename it to `name`.
+        Blocks until a stack is ready or `timeout` seconds pass.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            smm = self._take(deadline)
+            if smm.is_running():
+                break
+            log.warning("Discarding stopped pool member %s", smm.name)
+            smm.cleanup()
+        try:
+            smm.rename(name)
+        except docker.errors.APIError:
+            smm.cleanup()
+            raise
+        log.info("Claimed pooled SMM %s on port %s", name, smm.port)
+        return smm
+
+    def stop(self, drain: bool = False) -> None:
+        """
+        Stop refilling the pool.
+        Ready stacks are left running for the next run unless `drain`.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Members already being built finish and stay warm for next time
+        self._builders.shutdown(wait=True, cancel_futures=True)
+        if drain:
+            with self._cond:
+                ready = list(self._ready)
+                self._ready.clear()
+            for smm in ready:
+                smm.cleanup()
@@ -5,22 +5,48 @@ Postgres server
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
 
 import docker
 import docker.errors
 import docker.models.containers
 import docker.models.networks
 
+from . import metrics
 from .helpers import (
+    container_environment,
     get_random_secret,
     log_container_logs_on_timeout,
     remove_container,
-    wait_until,
+    remove_network,
+    remove_volume,
 )
+from .readiness import ContainerExitedError, healthcheck, shared_monitor
+
+if TYPE_CHECKING:
+    from .template import DatabaseTemplate
 
 log = logging.getLogger(__name__)
 
+_SQL_IDENTIFIER_INVALID_CHARS = re.compile(r"[^a-z0-9_]+")
+# Postgres silently truncates longer identifiers
+_MAX_IDENTIFIER_LENGTH = 63
+
+
+@dataclass
+class DatabaseAllocation:
+    """Connection details for one SMM database."""
+
+    host: str
+    name: str
+    user: str
+    password: str
+
 
 class PostgresServer:
     """
@@ -28,16 +54,33 @@ class PostgresServer:
     This server will have the postgis extension
     """
     IMAGE = 'postgis/postgis:17-3.5'
+    DATA_DIR = '/var/lib/postgresql/data'
+    PORT = 5432
 
     def __init__(
             self,
             name: str,
             network: docker.models.networks.Network,
             db_name: str,
-            docker_client: docker.DockerClient) -> None:
+            docker_client: docker.DockerClient,
+            labels: dict[str, str] | None = None,
+            data_volume: str | None = None,
+            template: DatabaseTemplate | None = None,
+            command: list[str] | None = None) -> None:
+        # pylint: disable=R0913,R0917
         self.postgres_pass = get_random_secret(10)
         self.name = name
         self._db_name = db_name
+        self.docker_client = docker_client
+        # A cloned template already has a password, reset it after start
+        self._reset_password = template is not None
+        self._owned_volume: str | None = None
+        if template is not None:
+            data_volume = template.clone(f'{name}-data', labels)
+            self._owned_volume = data_volume
+        volumes = {}
+        if data_volume is not None:
+            volumes[data_volume] = {'bind': self.DATA_DIR, 'mode': 'rw'}
         self.instance: docker.models.containers.Container | None
         self.instance = docker_client.containers.create(
             self.IMAGE,
@@ -46,17 +89,63 @@ class PostgresServer:
             environment=[
                 f'POSTGRES_PASSWORD={self.postgres_pass}',
                 f'POSTGRES_DB={self._db_name}'
-            ]
+            ],
+            labels=labels or {},
+            volumes=volumes,
+            command=command,
+            # Loopback only, for the runner's direct database access
+            ports={f'{self.PORT}/tcp': ('127.0.0.1', None)},
+            healthcheck=healthcheck(['CMD', *self._ready_command()]),
         )
         network.connect(self.instance)
         log.debug("Created postgres container %s", name)
 
+    @classmethod
+    def from_container(
+            cls,
+            instance: docker.models.containers.Container) -> PostgresServer:
+        """
+        Wrap an existing postgres container created by a previous run.
+        """
+        env = container_environment(instance)
+        server = cls.__new__(cls)
+        server.postgres_pass = env.get('POSTGRES_PASSWORD', '')
+        server.name = instance.name
+        server._db_name = env.get('POSTGRES_DB', 'postgres')
+        server.docker_client = instance.client
+        server._reset_password = False
+        server._owned_volume = cls._cloned_volume(instance)
+        server.instance = instance
+        return server
+
+    @classmethod
+    def _cloned_volume(
+            cls,
+            instance: docker.models.containers.Container) -> str | None:
+        """
+        The data volume cloned for this container from a template, which
+        goes when the container does
+        """
+        for mount in instance.attrs.get('Mounts', []):
+            if (
+                    mount.get('Type') == 'volume'
+                    and mount.get('Destination') == cls.DATA_DIR
+                    and mount.get('Name') == f'{instance.name}-data'):
+                return str(mount['Name'])
+        return None
+
     def get_password(self) -> str:
         """
         Get the password for this postgres server
         """
         return self.postgres_pass
 
+    def _ready_command(self) -> list[str]:
+        # TCP, so the entrypoint's socket-only init server is not ready
+        return [
+            'pg_isready', '-h', '127.0.0.1',
+            '-U', 'postgres', '-d', self._db_name]
+
     def _is_ready(self) -> bool:
         """
         Return True once `pg_isready` reports the server accepts connections.
@@ -64,8 +153,7 @@ class PostgresServer:
         if self.instance is None:
             return False
         try:
-            result = self.instance.exec_run(
-                ['pg_isready', '-U', 'postgres', '-d', self._db_name])
+            result = self.instance.exec_run(self._ready_command())
         except docker.errors.APIError:
             return False
         return bool(result.exit_code == 0)
@@ -76,13 +164,16 @@ class PostgresServer:
         Raises TimeoutError if the server is not ready in time.
         """
         log.debug("Waiting for postgres %s to accept connections", self.name)
+        if self.instance is None:
+            raise RuntimeError(
+                f"Postgres {self.name} container has not been created")
         try:
-            wait_until(
+            shared_monitor().wait_ready(
+                self.instance,
                 self._is_ready,
                 timeout=timeout,
-                interval=1.0,
                 description=f"postgres {self.name} to accept connections")
-        except TimeoutError:
+        except (TimeoutError, ContainerExitedError):
             log_container_logs_on_timeout(
                 self.instance,
                 self.name,
@@ -93,16 +184,121 @@ class PostgresServer:
 
     def start(self) -> None:
         """
-        Start this instance
+        Start this instance and wait until it is ready
+        """
+        self.launch()
+        self.wait_ready()
+
+    def launch(self) -> None:
+        """
+        Start the container without waiting for postgres to boot,
+        so callers can do other work in the meantime.
         """
         if self.instance is None:
             raise RuntimeError(
                 f"Postgres {self.name} container has not been created")
         log.info("Starting postgres %s", self.name)
-        self.instance.start()
-        self._wait_for_startup()
+        with metrics.phase('postgres_launch'):
+            self.instance.start()
+
+    def wait_ready(self) -> None:
+        """
+        Wait for a launched instance to accept connections with this
+        server's password.
+        """
+        with metrics.phase('postgres_ready'):
+            self._wait_for_startup()
+            if self._reset_password:
+                self._set_password()
         log.info("Postgres %s ready", self.name)
 
+    def _set_password(self) -> None:
+        """
+        Give the postgres user this server's password.
+        Used when the data directory came from a template, where
+        POSTGRES_PASSWORD is ignored because the database already exists.
+        """
+        self.run_sql(
+            f"ALTER USER postgres WITH PASSWORD '{self.postgres_pass}'")
+        self._reset_password = False
+
+    def run_sql(self, *statements: str, database: str | None = None) -> None:
+        """
+        Run SQL statements as the postgres superuser over the local socket.
+        Each statement runs in its own transaction.
+        """
+        if self.instance is None:
+            raise RuntimeError(
+                f"Postgres {self.name} container has not been created")
+        command = [
+            'psql', '-U', 'postgres', '-d', database or self._db_name,
+            '-v', 'ON_ERROR_STOP=1',
+        ]
+        for statement in statements:
+            command.extend(['-c', statement])
+        result = self.instance.exec_run(command)
+        if result.exit_code != 0:
+            raise RuntimeError(
+                f"SQL failed on postgres {self.name}: "
+                f"{result.output.decode(errors='replace')}")
+
+    @staticmethod
+    def reader_name(database: str) -> str:
+        """
+        The read-only role for `database`
+        """
+        digest = hashlib.sha256(database.encode()).hexdigest()[:16]
+        return f'imt_reader_{digest}'
+
+    def create_reader(
+            self,
+            database: str,
+            tables: Iterable[str]) -> tuple[str, str]:
+        """
+        Create a login role that can only read `tables` in `database`,
+        or give the existing one a new password.
+        Returns the role's name and password.
+        """
+        role = self.reader_name(database)
+        password = get_random_secret(16)
+        self.run_sql(
+            "DO $$ BEGIN "
+            f"IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '{role}') "
+            f"THEN CREATE ROLE {role}; END IF; END $$",
+            f"ALTER ROLE {role} LOGIN PASSWORD '{password}'",
+            f"ALTER ROLE {role} SET default_transaction_read_only = on",
+            f"GRANT CONNECT ON DATABASE {database} TO {role}",
+            f"GRANT USAGE ON SCHEMA public TO {role}",
+            f"GRANT SELECT ON {', '.join(tables)} TO {role}",
+            database=database)
+        return role, password
+
+    def host_port(self) -> int:
+        """
+        The port on 127.0.0.1 where this server can be reached from the
+        host. Servers adopted from older runs may not publish one.
+        """
+        if self.instance is None:
+            raise RuntimeError(
+                f"Postgres {self.name} container has not been created")
+        self.instance.reload()
+        bindings = self.instance.attrs.get(
+            'NetworkSettings', {}).get('Ports', {}).get(f'{self.PORT}/tcp')
+        if not bindings:
+            raise RuntimeError(
+                f"Postgres {self.name} does not publish port {self.PORT}")
+        return int(bindings[0]['HostPort'])
+
+    def allocation(self) -> DatabaseAllocation:
+        """
+        Connection details for the database this server was created with.
+        """
+        return DatabaseAllocation(
+            host=self.name,
+            name=self._db_name,
+            user='postgres',
+            password=self.postgres_pass)
+
     def stop(self) -> None:
         """
         Stop this instance
@@ -127,4 +323,178 @@ class PostgresServer:
         log.debug("Cleaning up postgres %s", self.name)
         remove_container(self.instance)
         self.instance = None
+        if self._owned_volume is not None:
+            try:
+                remove_volume(
+                    self.docker_client.volumes.get(self._owned_volume))
+            except docker.errors.NotFound:
+                pass
+            self._owned_volume = None
         log.debug("Postgres %s cleanup complete", self.name)
+
+
+class SharedPostgresServer:
+    """
+    A single postgres server holding one database and role per SMM.
+    The server joins each SMM's database network when a database is
+    allocated, so participants stay isolated from each other's networks.
+    """
+    NAME = 'imt-shared-db-server'
+    MAX_CONNECTIONS = 500
+
+    def __init__(
+            self,
+            docker_client: docker.DockerClient,
+            name: str | None = None) -> None:
+        self.name = name or self.NAME
+        self.docker_client = docker_client
+        self._lock = threading.Lock()
+        self.net: docker.models.networks.Network | None
+        try:
+            self.net = docker_client.networks.get(f'{self.name}-net')
+        except docker.errors.NotFound:
+            self.net = docker_client.networks.create(
+                f'{self.name}-net',
+                driver='bridge')
+        self.server: PostgresServer | None
+        try:
+            # Left by a --keep or crashed run, possibly with pooled stacks'
+            # databases still in it
+            self.server = PostgresServer.from_container(
+                docker_client.containers.get(self.name))
+            log.info("Reusing shared postgres %s", self.name)
+        except docker.errors.NotFound:
+            self.server = PostgresServer(
+                self.name,
+                self.net,
+                'postgres',
+                docker_client,
+                command=[
+                    'postgres',
+                    '-c', f'max_connections={self.MAX_CONNECTIONS}'])
+
+    def _require_server(self) -> PostgresServer:
+        if self.server is None or self.server.instance is None:
+            raise RuntimeError(
+                f"Shared postgres {self.name} has been cleaned up")
+        return self.server
+
+    def start(self) -> None:
+        """
+        Start the shared server and wait for it to accept connections.
+        """
+        self._require_server().start()
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        """
+        A role and database name for `name`. Cleaning can make different
+        names equal and postgres truncates long names, so a hash of the
+        original name keeps each identifier distinct.
+        """
+        cleaned = _SQL_IDENTIFIER_INVALID_CHARS.sub(
+            '_', name.lower()).strip('_')
+        suffix = hashlib.sha256(name.encode()).hexdigest()[:8]
+        room = _MAX_IDENTIFIER_LENGTH - len(f'smm__{suffix}')
+        return f'smm_{cleaned[:room].rstrip("_")}_{suffix}'
+
+    @staticmethod
+    def _drop_statements(
+            database: str,
+            user: str | None = None) -> tuple[str, ...]:
+        """
+        SQL removing a database, its reader role and its owning role.
+        """
+        return (
+            f"DROP DATABASE IF EXISTS {database} WITH (FORCE)",
+            f"DROP ROLE IF EXISTS {PostgresServer.reader_name(database)}",
+            f"DROP ROLE IF EXISTS {user or database}")
+
+    def allocate(
+            self,
+            name: str,
+            network: docker.models.networks.Network) -> DatabaseAllocation:
+        """
+        Create a database and owning role for `name`, and attach the
+        server to `network` so the SMM on that network can reach it.
+        """
+        server = self._require_server()
+        identifier = self._identifier(name)
+        password = get_random_secret(16)
+        with self._lock:
+            # A crashed earlier run may have left this name's database
+            server.run_sql(
+                *self._drop_statements(identifier),
+                f"CREATE ROLE {identifier} LOGIN PASSWORD '{password}'",
+                f"CREATE DATABASE {identifier} OWNER {identifier} "
+                "TEMPLATE template_postgis")
+            network.connect(server.instance)
+        log.debug("Allocated shared database %s", identifier)
+        return DatabaseAllocation(
+            host=self.name,
+            name=identifier,
+            user=identifier,
+            password=password)
+
+    def release(
+            self,
+            allocation: DatabaseAllocation,
+            network: docker.models.networks.Network | None) -> None:
+        """
+        Drop an allocated database and role, and leave its network.
+        """
+        if self.server is None or self.server.instance is None:
+            return
+        with self._lock:
+            if network is not None:
+                try:
+                    network.disconnect(self.server.instance, force=True)
+                except docker.errors.APIError:
+                    log.debug(
+                        "Failed to disconnect %s from %s",
+                        self.name,
+                        network.name,
+                        exc_info=True)
+            try:
+                self.server.run_sql(*self._drop_statements(
+                    allocation.name, allocation.user))
+            except (RuntimeError, docker.errors.APIError):
+                log.warning(
+                    "Failed to drop shared database %s",
+                    allocation.name,
+                    exc_info=True)
+        log.debug("Released shared database %s", allocation.name)
+
+    def release_name(
+            self,
+            name: str,
+            network: docker.models.networks.Network | None) -> None:
+        """
+        Release the database allocated for `name`, for callers that only
+        know the name, such as stacks left behind by an earlier run.
+        """
+        identifier = self._identifier(name)
+        self.release(
+            DatabaseAllocation(
+                host=self.name,
+                name=identifier,
+                user=identifier,
+                password=''),
+            network)
+
+    def stop(self) -> None:
+        """
+        Stop the shared server
+        """
+        if self.server is not None:
+            self.server.stop()
+
+    def cleanup(self) -> None:
+        """
+        Remove the shared server and its network.
+        """
+        if self.server is not None:
+            self.server.cleanup()
+            self.server = None
+        remove_network(self.net)
+        self.net = None
@@ -0,0 +1,189 @@
+"""
+Container readiness
+Containers are created with a Docker HEALTHCHECK. A single Docker events
+stream, shared by every service in the process, reports health changes
+and exits, so a waiting service wakes as soon as its container turns
+healthy or exits. The healthcheck keeps running for the container's whole
+life, so it runs rarely; during startup the service's own readiness
+probe, fast at first and backing off to once a second, finds the
+container ready well before the first healthcheck does.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable
+
+import docker
+import docker.errors
+import docker.models.containers
+
+from .docker_client import get_docker_client
+from .helpers import wait_until
+
+log = logging.getLogger(__name__)
+
+_NANOSECONDS = 1_000_000_000
+
+
+def healthcheck(
+        test: list[str],
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        retries: int = 3,
+        start_period: float = 120.0) -> dict[str, Any]:
+    """
+    Build a Docker healthcheck definition; times are in seconds.
+    Failures during `start_period` do not count against `retries`.
+    docker-py cannot set a separate start interval, so `interval` is the
+    steady-state one.
+    """
+    return {
+        'test': test,
+        'interval': int(interval * _NANOSECONDS),
+        'timeout': int(timeout * _NANOSECONDS),
+        'retries': retries,
+        'start_period': int(start_period * _NANOSECONDS),
+    }
+
+
+class ContainerExitedError(RuntimeError):
+    """Raised when a container exits while waiting for it to be ready."""
+
+
+class _Waiter:
+    # pylint: disable=R0903
+    """
+    Readiness state for one container, updated from the events stream.
+    """
+    def __init__(self) -> None:
+        self.wake = threading.Event()
+        self.healthy = False
+        self.exited = False
+
+
+class ReadinessMonitor:
+    """
+    Wait for containers to become ready using Docker health events
+    """
+    FIRST_PROBE_INTERVAL = 0.02
+    # Healthchecks run rarely, so probes find most containers ready first
+    MAX_PROBE_INTERVAL = 1.0
+
+    def __init__(
+            self,
+            client_factory: Callable[[], docker.DockerClient] = (
+                get_docker_client)) -> None:
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._waiters: dict[str, _Waiter] = {}
+        self._thread: threading.Thread | None = None
+        self._stream: Any = None
+
+    def start(self) -> None:
+        """
+        Start the events subscriber if it is not already running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name='docker-events',
+                daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            client = self._client_factory()
+            self._stream = client.events(
+                decode=True,
+                filters={
+                    'type': 'container',
+                    'event': ['health_status', 'die'],
+                })
+        except docker.errors.DockerException:
+            log.warning(
+                "Docker events unavailable, falling back to polling",
+                exc_info=True)
+            return
+        try:
+            for event in self._stream:
+                self._dispatch(event)
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.debug("Docker events stream closed", exc_info=True)
+
+    def _dispatch(self, event: dict[str, Any]) -> None:
+        container_id = event.get('id') or event.get('Actor', {}).get('ID')
+        action = str(event.get('Action') or event.get('status') or '')
+        with self._lock:
+            waiter = self._waiters.get(str(container_id))
+        if waiter is None:
+            return
+        if action == 'die':
+            waiter.exited = True
+        elif action.partition(':')[2].strip() == 'healthy':
+            waiter.healthy = True
+        else:
+            return
+        waiter.wake.set()
+
+    def wait_ready(
+            self,
+            container: docker.models.containers.Container,
+            probe: Callable[[], bool],
+            timeout: float,
+            description: str) -> None:
+        """
+        Block until `container` reports healthy or `probe()` succeeds.
+        Raises TimeoutError after `timeout` seconds and
+        ContainerExitedError if the container exits first.
+        """
+        self.start()
+        waiter = _Waiter()
+        with self._lock:
+            self._waiters[container.id] = waiter
+
+        def ready() -> bool:
+            if waiter.exited:
+                raise ContainerExitedError(
+                    f"Container exited while waiting for {description}")
+            return waiter.healthy or probe()
+
+        try:
+            wait_until(
+                ready,
+                timeout=timeout,
+                interval=self.MAX_PROBE_INTERVAL,
+                description=description,
+                initial_interval=self.FIRST_PROBE_INTERVAL,
+                wake=waiter.wake)
+        finally:
+            with self._lock:
+                self._waiters.pop(container.id, None)
+
+    def close(self) -> None:
+        """
+        Stop the events subscriber.
+        """
+        stream = self._stream
+        if stream is not None:
+            stream.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_SHARED: dict[str, ReadinessMonitor] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_monitor() -> ReadinessMonitor:
+    """
+    Return the process-wide readiness monitor.
+    """
+    with _SHARED_LOCK:
+        if 'monitor' not in _SHARED:
+            _SHARED['monitor'] = ReadinessMonitor()
+        return _SHARED['monitor']
@@ -8,7 +8,7 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any
+from typing import TYPE_CHECKING, Any
 import urllib.error
 import urllib.request
 
@@ -17,16 +17,26 @@ import docker.errors
 import docker.models.containers
 import docker.models.networks
 
-from smm_client.connection import SMMConnection
-
+from . import metrics
+from .connection import SMMConnectionPool
+from .docker_client import get_docker_client
 from .helpers import (
+    container_environment,
+    django_password_hash,
     get_random_secret,
     log_container_logs_on_timeout,
     remove_container,
     remove_network,
-    wait_until,
 )
-from .postgres import PostgresServer
+from .lookup import SMMLookupCache
+from .postgres import DatabaseAllocation, PostgresServer
+from .readiness import ContainerExitedError, healthcheck, shared_monitor
+
+if TYPE_CHECKING:
+    from smm_client.connection import SMMConnection
+
+    from .postgres import SharedPostgresServer
+    from .template import DatabaseTemplate
 
 log = logging.getLogger(__name__)
 
@@ -44,16 +54,28 @@ class SMMServer:
             self,
             name: str,
             network: docker.models.networks.Network | None,
-            docker_client: docker.DockerClient,
-            admin_email: str | None = None) -> None:
+            docker_client: docker.DockerClient | None = None,
+            admin_email: str | None = None,
+            labels: dict[str, str] | None = None,
+            template: DatabaseTemplate | None = None,
+            db_volume: str | None = None,
+            shared_db: SharedPostgresServer | None = None) -> None:
+        # pylint: disable=R0913,R0917
+        if docker_client is None:
+            docker_client = get_docker_client()
         self.port: int | None = None
         self.name = name
         self.external_network = network
         self.internal_port = 8080
         self.db_net: docker.models.networks.Network | None = None
         self.postgres: PostgresServer | None = None
+        self.shared_db = shared_db
+        self.database: DatabaseAllocation | None = None
         self.instance: docker.models.containers.Container | None = None
         self.docker_client = docker_client
+        self.labels = labels or {}
+        self.lookups = SMMLookupCache()
+        self.connections = SMMConnectionPool()
         self.admin_email = (
             admin_email
             or os.environ.get('IMT_ADMIN_EMAIL')
@@ -64,14 +86,67 @@ class SMMServer:
         except docker.errors.NotFound:
             self.db_net = docker_client.networks.create(
                 f'{name}-net',
-                driver='bridge')
+                driver='bridge',
+                labels=self.labels)
             log.debug("Created network %s-net", name)
-        self.postgres = PostgresServer(
-            f'{name}-db-server',
-            self.db_net,
-            'smm',
-            docker_client)
+        if shared_db is not None:
+            self.database = shared_db.allocate(name, self.db_net)
+            template = None
+        else:
+            self.postgres = PostgresServer(
+                f'{name}-db-server',
+                self.db_net,
+                'smm',
+                docker_client,
+                labels=self.labels,
+                data_volume=db_volume,
+                template=template)
+            self.database = self.postgres.allocation()
         self.admin_password = get_random_secret(10)
+        # The superuser already exists in a cloned database, with the
+        # template's password
+        self._reset_admin_password = template is not None
+
+    @classmethod
+    def from_container(
+            cls,
+            instance: docker.models.containers.Container,
+            docker_client: docker.DockerClient,
+            shared_db: SharedPostgresServer | None = None) -> SMMServer:
+        """
+        Wrap an already running SMM stack (SMM container, its postgres
+        container or shared database, and database network) created by a
+        previous run.
+        """
+        env = container_environment(instance)
+        server = cls.__new__(cls)
+        server.name = instance.name
+        server.external_network = None
+        server.internal_port = 8080
+        server.instance = instance
+        server.docker_client = docker_client
+        server.labels = dict(instance.labels)
+        server.lookups = SMMLookupCache()
+        server.connections = SMMConnectionPool()
+        server.admin_email = env.get(
+            'DJANGO_SUPERUSER_EMAIL', cls.DEFAULT_ADMIN_EMAIL)
+        server.admin_password = env.get('DJANGO_SUPERUSER_PASSWORD', '')
+        server._reset_admin_password = False
+        server.db_net = docker_client.networks.get(f'{server.name}-net')
+        server.database = DatabaseAllocation(
+            host=env['DB_HOST'],
+            name=env['DB_NAME'],
+            user=env['DB_USER'],
+            password=env['DB_PASS'])
+        server.shared_db = None
+        server.postgres = None
+        if shared_db is not None and env['DB_HOST'] == shared_db.name:
+            server.shared_db = shared_db
+        else:
+            server.postgres = PostgresServer.from_container(
+                docker_client.containers.get(env['DB_HOST']))
+        server.port = server._resolve_host_port()
+        return server
 
     def _is_web_ready(self) -> bool:
         """
@@ -94,13 +169,16 @@ class SMMServer:
             "Waiting for SMM %s web server on port %s",
             self.name,
             self.port)
+        if self.instance is None:
+            raise RuntimeError(
+                f"SMM {self.name} container has not been created")
         try:
-            wait_until(
+            shared_monitor().wait_ready(
+                self.instance,
                 self._is_web_ready,
                 timeout=timeout,
-                interval=1.0,
                 description=f"SMM {self.name} web server on port {self.port}")
-        except TimeoutError:
+        except (TimeoutError, ContainerExitedError):
             log_container_logs_on_timeout(
                 self.instance,
                 self.name,
@@ -149,27 +227,25 @@ class SMMServer:
                 f"SMM {self.name} host port binding for {binding_key} "
                 "is not an integer") from exc
 
-    def start(self) -> None:
+    def _create_instance(
+            self,
+            database: DatabaseAllocation,
+    ) -> docker.models.containers.Container:
         """
-        Start this instance, and the related database server.
-        Images are pre-pulled by the caller; only postgres startup runs here.
+        Create the SMM container and attach it to its networks.
+        Nothing here needs the database to be up yet.
         """
-        if self.postgres is None:
-            raise RuntimeError(f"SMM {self.name} has no postgres server")
         if self.db_net is None:
             raise RuntimeError(f"SMM {self.name} has no database network")
-        log.info("Starting SMM %s", self.name)
-        self._ensure_image_available()
-        self.postgres.start()
-        self.instance = self.docker_client.containers.create(
+        instance = self.docker_client.containers.create(
             self.IMAGE,
             detach=True,
             name=self.name,
             environment=[
-                f'DB_HOST={self.postgres.name}',
-                f'DB_PASS={self.postgres.get_password()}',
-                'DB_USER=postgres',
-                'DB_NAME=smm',
+                f'DB_HOST={database.host}',
+                f'DB_PASS={database.password}',
+                f'DB_USER={database.user}',
+                f'DB_NAME={database.name}',
                 'DJANGO_SUPERUSER_USERNAME=admin',
                 f'DJANGO_SUPERUSER_PASSWORD={self.admin_password}',
                 f'DJANGO_SUPERUSER_EMAIL={self.admin_email}',
@@ -177,18 +253,90 @@ class SMMServer:
             ports={
                 f'{self.internal_port}/tcp': None,
             },
+            labels=self.labels,
+            healthcheck=healthcheck([
+                'CMD', 'python3', '-c',
+                'import urllib.request; urllib.request.urlopen('
+                f'"http://localhost:{self.internal_port}/", timeout=2)']),
         )
-        self.db_net.connect(self.instance)
+        self.instance = instance
+        self.db_net.connect(instance)
         if self.external_network is not None:
-            self.external_network.connect(self.instance)
+            self.external_network.connect(instance)
         log.debug("Created SMM container %s", self.name)
-        self.instance.start()
-        self.instance.reload()
-        self.port = self._resolve_host_port()
-        log.debug("SMM %s started on port %s", self.name, self.port)
-        self._wait_for_web_startup()
+        return instance
+
+    def start(self) -> None:
+        """
+        Start this instance, and the related database server.
+        Images are pre-pulled by the caller; only postgres startup runs here.
+        A shared database server is started by its owner, not here.
+        The SMM container is created and wired up while postgres boots;
+        only starting it waits for the database.
+        """
+        if self.database is None:
+            raise RuntimeError(f"SMM {self.name} has no database")
+        log.info("Starting SMM %s", self.name)
+        with metrics.participant(self.name):
+            self._ensure_image_available()
+            if self.postgres is not None:
+                self.postgres.launch()
+            with metrics.phase('smm_create'):
+                instance = self._create_instance(self.database)
+            if self.postgres is not None:
+                self.postgres.wait_ready()
+                if self._reset_admin_password:
+                    self._set_admin_password(self.postgres)
+            with metrics.phase('smm_launch'):
+                instance.start()
+                instance.reload()
+                self.port = self._resolve_host_port()
+            log.debug("SMM %s started on port %s", self.name, self.port)
+            with metrics.phase('smm_ready'):
+                self._wait_for_web_startup()
         log.info("SMM %s ready on port %s", self.name, self.port)
 
+    def _set_admin_password(self, postgres: PostgresServer) -> None:
+        """
+        Give the admin account cloned from the template this server's
+        password, before SMM starts
+        """
+        password_hash = django_password_hash(self.admin_password)
+        postgres.run_sql(
+            f"UPDATE auth_user SET password = '{password_hash}'"
+            " WHERE username = 'admin'")
+        self._reset_admin_password = False
+
+    def is_running(self) -> bool:
+        """
+        Return True if both the SMM and postgres containers are running.
+        """
+        containers = [self.instance]
+        if self.postgres is not None:
+            containers.append(self.postgres.instance)
+        for container in containers:
+            if container is None:
+                return False
+            try:
+                container.reload()
+            except docker.errors.NotFound:
+                return False
+            if container.status != 'running':
+                return False
+        return True
+
+    def rename(self, name: str) -> None:
+        """
+        Rename the SMM container.
+        The database network and postgres container keep their names.
+        """
+        if self.instance is None:
+            raise RuntimeError(
+                f"SMM {self.name} container has not been created")
+        self.instance.rename(name)
+        log.debug("Renamed SMM %s to %s", self.name, name)
+        self.name = name
+
     def stop(self) -> None:
         """
         Stop this instance, and the related database server
@@ -212,11 +360,15 @@ class SMMServer:
         Idempotent and tolerant of partial/failed starts.
         """
         log.debug("Cleaning up SMM %s", self.name)
+        self.connections.close()
         remove_container(self.instance)
         self.instance = None
         if self.postgres is not None:
             self.postgres.cleanup()
             self.postgres = None
+        if self.shared_db is not None and self.database is not None:
+            self.shared_db.release(self.database, self.db_net)
+            self.database = None
         remove_network(self.db_net)
         self.db_net = None
         log.debug("SMM %s cleanup complete", self.name)
@@ -227,10 +379,11 @@ class SMMServer:
             password: str | None = None) -> SMMConnection:
         """
         Return an SMMConnection object connected to this server
+        Connections are shared, so callers must not log them out.
         """
         actual_password = password if password is not None \
             else self.admin_password
-        return SMMConnection(
+        return self.connections.get(
             f'http://localhost:{self.port}',
             username,
             actual_password)
@@ -0,0 +1,300 @@
+"""
+Direct access to an SMM database
+The runner owns every SMM database server, so it can watch SMM's tables
+itself instead of asking the web server over HTTP.
+Needs the optional psycopg package: pip install 'psycopg[binary]'
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+try:
+    import psycopg
+except ImportError:  # pragma: no cover - depends on the environment
+    psycopg = None
+
+if TYPE_CHECKING:
+    from .postgres import PostgresServer
+    from .smm import SMMServer
+
+log = logging.getLogger(__name__)
+
+MISSION_ORG_CHANNEL = 'imt_mission_org'
+
+# SMM's Django tables for mission organisations and organisations
+_MISSION_ORG_TRIGGER_SQL = (
+    f"""
+    CREATE OR REPLACE FUNCTION imt_notify_mission_org() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{MISSION_ORG_CHANNEL}', json_build_object(
+            'mission', NEW.mission_id,
+            'organization', (
+                SELECT name FROM organization_organization
+                WHERE id = NEW.organization_id)
+        )::text);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS imt_mission_org_notify "
+    "ON mission_missionorganization",
+    "CREATE TRIGGER imt_mission_org_notify "
+    "AFTER INSERT ON mission_missionorganization "
+    "FOR EACH ROW EXECUTE FUNCTION imt_notify_mission_org()",
+)
+
+
+_MISSION_ORGANIZATIONS_SQL = """
+    SELECT o.id, o.name
+    FROM mission_missionorganization mo
+    JOIN organization_organization o ON o.id = mo.organization_id
+    WHERE mo.mission_id = %s
+    ORDER BY mo.id
+"""
+
+# Latest status of every asset in the mission
+_MISSION_ASSET_STATUSES_SQL = """
+    SELECT DISTINCT ON (s.asset_id) a.name, v.name
+    FROM mission_missionassetstatus s
+    JOIN assets_asset a ON a.id = s.asset_id
+    JOIN mission_missionassetstatusvalue v ON v.id = s.status_id
+    WHERE s.mission_id = %s
+    ORDER BY s.asset_id, s.since DESC
+"""
+
+# Every table SMMStateReader's role may read
+_READ_TABLES = (
+    'mission_missionorganization',
+    'organization_organization',
+    'mission_missionassetstatus',
+    'assets_asset',
+    'mission_missionassetstatusvalue',
+)
+
+
+class StateReadError(RuntimeError):
+    """Raised when the SMM database cannot be read."""
+
+
+def _require_psycopg() -> None:
+    if psycopg is None:
+        raise RuntimeError(
+            "Direct SMM database access needs psycopg: "
+            "pip install 'psycopg[binary]'")
+
+
+def database_server(smm: SMMServer) -> PostgresServer:
+    """
+    The postgres server holding `smm`'s database
+    """
+    if smm.postgres is not None:
+        return smm.postgres
+    if smm.shared_db is not None and smm.shared_db.server is not None:
+        return smm.shared_db.server
+    raise RuntimeError(f"SMM {smm.name} has no database server")
+
+
+def connection_info(smm: SMMServer) -> dict[str, Any]:
+    """
+    psycopg connection parameters for `smm`'s database, from the host
+    """
+    if smm.database is None:
+        raise RuntimeError(f"SMM {smm.name} has no database")
+    server = database_server(smm)
+    return {
+        'host': '127.0.0.1',
+        'port': server.host_port(),
+        'dbname': smm.database.name,
+        'user': 'postgres',
+        'password': server.get_password(),
+    }
+
+
+class MissionOrgFeed:
+    """
+    Report organisations as they are added to missions, using a trigger
+    and LISTEN/NOTIFY
+    The listener reconnects if the connection drops. `generation` goes up
+    on every connect, and whenever a notification could not be handled,
+    so a consumer can tell when notifications may have been missed and
+    it needs to catch up another way.
+    """
+    RECONNECT_DELAY = 1.0
+    # How often the listener checks whether it has been closed
+    WAIT_TIMEOUT = 1.0
+
+    def __init__(
+            self,
+            conninfo: dict[str, Any],
+            on_added: Callable[[int, str], None]) -> None:
+        _require_psycopg()
+        self._conninfo = conninfo
+        self._on_added = on_added
+        self.generation = 0
+        self._live = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def live(self) -> bool:
+        """
+        True while the listener is connected
+        """
+        return self._live.is_set()
+
+    def start(self) -> None:
+        """
+        Start listening in the background
+        """
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"smmdb-feed-{self._conninfo['dbname']}",
+            daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except psycopg.Error:
+                log.warning(
+                    "Lost the database feed for %s, falling back to polling",
+                    self._conninfo['dbname'],
+                    exc_info=True)
+            finally:
+                self._live.clear()
+            self._stop.wait(self.RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        with psycopg.connect(**self._conninfo, autocommit=True) as conn:
+            conn.execute(f'LISTEN {MISSION_ORG_CHANNEL}')
+            self.generation += 1
+            self._live.set()
+            while not self._stop.is_set():
+                for notify in conn.notifies(timeout=self.WAIT_TIMEOUT):
+                    self._dispatch(notify.payload)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            self._on_added(int(data['mission']), str(data['organization']))
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.exception("Failed to handle mission organisation %s", payload)
+            # Have the consumer catch up, which retries this one too
+            self.generation += 1
+
+    def close(self) -> None:
+        """
+        Stop listening
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.WAIT_TIMEOUT + 5)
+            self._thread = None
+
+
+def open_mission_org_feed(
+        smm: SMMServer,
+        on_added: Callable[[int, str], None]) -> MissionOrgFeed:
+    """
+    Install the notify trigger in `smm`'s database and start a feed that
+    calls `on_added(mission_id, organization_name)` for every
+    organisation added to a mission
+    """
+    _require_psycopg()
+    conninfo = connection_info(smm)
+    database_server(smm).run_sql(
+        *_MISSION_ORG_TRIGGER_SQL,
+        database=conninfo['dbname'])
+    feed = MissionOrgFeed(conninfo, on_added)
+    feed.start()
+    return feed
+
+
+def reader_connection_info(smm: SMMServer) -> dict[str, Any]:
+    """
+    psycopg connection parameters for `smm`'s database, as a role that
+    can only read the tables SMMStateReader queries
+    """
+    conninfo = connection_info(smm)
+    user, password = database_server(smm).create_reader(
+        conninfo['dbname'], _READ_TABLES)
+    return {**conninfo, 'user': user, 'password': password}
+
+
+class SMMStateReader:
+    """
+    Read-only queries against an SMM database, for state the runner
+    checks every tick. Writes still go through SMM over HTTP.
+    Connect with reader_connection_info(); read-only transactions are
+    only a second line of defence, since a session can turn them off.
+    Connections are kept open and shared between threads, at most
+    `size` of them at a time.
+    """
+    POOL_SIZE = 2
+
+    def __init__(
+            self,
+            conninfo: dict[str, Any],
+            size: int = POOL_SIZE) -> None:
+        _require_psycopg()
+        self._conninfo = {
+            **conninfo,
+            'options': '-c default_transaction_read_only=on',
+        }
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: queue.LifoQueue[Any] = queue.LifoQueue()
+
+    def _query(self, sql: str, *params: Any) -> list[tuple[Any, ...]]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            try:
+                if conn is None:
+                    conn = psycopg.connect(**self._conninfo, autocommit=True)
+                rows = conn.execute(sql, params).fetchall()
+            except psycopg.Error as exc:
+                if conn is not None:
+                    conn.close()
+                raise StateReadError(
+                    f"Failed to read {self._conninfo['dbname']}: "
+                    f"{exc}") from exc
+            self._idle.put(conn)
+            return [tuple(row) for row in rows]
+
+    def mission_organizations(self, mission_id: int) -> list[tuple[int, str]]:
+        """
+        (id, name) of every organisation in the mission, oldest first
+        """
+        return [
+            (int(org_id), str(name))
+            for org_id, name in self._query(
+                _MISSION_ORGANIZATIONS_SQL, mission_id)
+        ]
+
+    def asset_statuses(self, mission_id: int) -> list[tuple[str, str]]:
+        """
+        (asset name, status name) of every asset in the mission
+        """
+        return [
+            (str(asset), str(status))
+            for asset, status in self._query(
+                _MISSION_ASSET_STATUSES_SQL, mission_id)
+        ]
+
+    def close(self) -> None:
+        """
+        Close every idle connection
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,141 @@
+"""
+Golden database template for SMM
+A fresh SMM container spends most of its startup running Django
+migrations and creating the superuser against an empty database. The
+template runs that once, keeps the resulting postgres data directory in a
+docker volume, and every later PostgresServer starts from a copy of it.
+
+The template volume is keyed by the SMM and postgres image IDs, so a new
+image automatically builds a new template and old templates are removed.
+Every clone has the template's admin account, so each SMM sets its own
+admin password after its database starts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+
+import docker
+import docker.errors
+import docker.models.volumes
+
+from .helpers import remove_volume
+from .postgres import PostgresServer
+from .smm import SMMServer
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_LABEL = 'imt-challenge.db-template'
+
+
+class DatabaseTemplate:
+    """
+    Postgres data directory snapshot of a migrated SMM database
+    """
+    VOLUME_PREFIX = 'imt-smm-template'
+    # Bumped when templates built by older versions must not be reused
+    FORMAT = '2'
+
+    def __init__(self, docker_client: docker.DockerClient) -> None:
+        self.docker_client = docker_client
+        self.key = self._compute_key()
+        self.volume_name = f'{self.VOLUME_PREFIX}-{self.key}'
+        self.ready = False
+
+    def _compute_key(self) -> str:
+        """
+        Key the template on the exact SMM and postgres images in use.
+        """
+        digest = hashlib.sha256(self.FORMAT.encode())
+        for image in (SMMServer.IMAGE, PostgresServer.IMAGE):
+            digest.update(self.docker_client.images.get(image).id.encode())
+        return digest.hexdigest()[:16]
+
+    def _get_volume(self, name: str) -> docker.models.volumes.Volume | None:
+        try:
+            return self.docker_client.volumes.get(name)
+        except docker.errors.NotFound:
+            return None
+
+    def _remove_stale_templates(self) -> None:
+        """
+        Remove template volumes built from images that are no longer used.
+        """
+        for volume in self.docker_client.volumes.list(
+                filters={'label': TEMPLATE_LABEL}):
+            if volume.name != self.volume_name:
+                log.info("Removing stale database template %s", volume.name)
+                remove_volume(volume)
+
+    def _build(self) -> None:
+        """
+        Run SMM once against an empty database, then snapshot the data.
+        """
+        scratch = f'{self.volume_name}-build'
+        remove_volume(self._get_volume(scratch))
+        log.info("Building database template %s", self.volume_name)
+        smm = SMMServer(
+            scratch,
+            None,
+            self.docker_client,
+            db_volume=scratch)
+        try:
+            smm.start()
+            # A clean postgres shutdown leaves a consistent data directory
+            smm.stop()
+        finally:
+            smm.cleanup()
+        try:
+            self._copy(scratch, self.volume_name, {TEMPLATE_LABEL: self.key})
+        finally:
+            remove_volume(self._get_volume(scratch))
+        log.info("Database template %s ready", self.volume_name)
+
+    def _copy(
+            self,
+            source: str,
+            destination: str,
+            labels: dict[str, str] | None = None) -> None:
+        """
+        Copy the contents of one volume into a new volume.
+        The postgres image is already pulled, so it does the copy.
+        A partial copy is removed, so it is never mistaken for a whole one.
+        """
+        volume = self.docker_client.volumes.create(
+            destination, labels=labels or {})
+        try:
+            self.docker_client.containers.run(
+                PostgresServer.IMAGE,
+                ['cp', '-a', '/source/.', '/destination/'],
+                volumes={
+                    source: {'bind': '/source', 'mode': 'ro'},
+                    destination: {'bind': '/destination', 'mode': 'rw'},
+                },
+                remove=True)
+        except BaseException:
+            remove_volume(volume)
+            raise
+
+    def ensure(self) -> None:
+        """
+        Make sure the template for the current images exists.
+        """
+        if self._get_volume(self.volume_name) is None:
+            self._build()
+        else:
+            log.info("Using database template %s", self.volume_name)
+        self.ready = True
+        self._remove_stale_templates()
+
+    def clone(self, name: str, labels: dict[str, str] | None = None) -> str:
+        """
+        Create a new volume `name` holding a copy of the template.
+        Label it like the stack using it, so the stack's cleanup finds it.
+        """
+        if not self.ready:
+            raise RuntimeError(
+                f"Database template {self.volume_name} has not been built")
+        self._copy(self.volume_name, name, labels)
+        log.debug("Cloned database template into %s", name)
+        return name
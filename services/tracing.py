@@ -0,0 +1,254 @@
+"""
+Call tracing
+When enabled, every Docker API call and SMM HTTP request is recorded as a
+span with its thread, participant, start and end, and written out in the
+Chrome trace event format for chrome://tracing or https://ui.perfetto.dev.
+Clients are only wrapped while tracing is enabled, so a run without
+tracing pays nothing for it.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import types
+from typing import Any, Callable
+
+import requests
+
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+_NUMERIC_PATH_PART = re.compile(r'/\d+(?=/|$)')
+
+
+def _fixed_name(name: str) -> Callable[..., str]:
+    def span_name(*_args: Any, **_kwargs: Any) -> str:
+        return name
+    return span_name
+
+
+def _smm_name(verb: str) -> Callable[..., str]:
+    """
+    Name SMM requests by their path, with ids replaced so the same kind
+    of request always has the same name
+    """
+    def span_name(*args: Any, **kwargs: Any) -> str:
+        path = args[0] if args else kwargs.get('path')
+        return f'{verb} {_NUMERIC_PATH_PART.sub("/{id}", path or "/")}'
+    return span_name
+
+
+class _Span:
+    """
+    Context manager recording one span
+    """
+    __slots__ = ('_tracer', '_name', '_category', '_start')
+
+    def __init__(self, tracer: Tracer, name: str, category: str) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._start = 0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc: BaseException | None,
+            traceback: types.TracebackType | None) -> None:
+        self._tracer.record(
+            self._name,
+            self._category,
+            self._start,
+            time.perf_counter_ns(),
+            exc_type.__name__ if exc_type is not None else None)
+
+
+class _NoSpan:
+    """
+    Context manager that records nothing, for when tracing is off
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Collect spans from every thread in the process
+    """
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+        self._origin = time.perf_counter_ns()
+
+    def enable(self) -> None:
+        """
+        Start recording; only clients wrapped after this are traced
+        """
+        with self._lock:
+            self._events.clear()
+            self._threads.clear()
+            self._origin = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stop recording new spans, keeping the ones already recorded
+        """
+        self.enabled = False
+
+    def span(self, name: str, category: str) -> _Span | _NoSpan:
+        """
+        Record the block as a span, if tracing is enabled
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, category)
+
+    def record(
+            self,
+            name: str,
+            category: str,
+            start_ns: int,
+            end_ns: int,
+            error: str | None = None) -> None:
+        # pylint: disable=R0913,R0917
+        """
+        Record a finished span for the current thread and participant
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        args = {'participant': metrics.current_participant()}
+        if error is not None:
+            args['error'] = error
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - self._origin) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+            if thread.ident is not None:
+                self._threads.setdefault(thread.ident, thread.name)
+
+    def events(self) -> list[dict[str, Any]]:
+        """
+        Every recorded span, after a name for each thread that made one
+        """
+        pid = os.getpid()
+        with self._lock:
+            names = [
+                {
+                    'name': 'thread_name',
+                    'ph': 'M',
+                    'pid': pid,
+                    'tid': tid,
+                    'args': {'name': name},
+                }
+                for tid, name in self._threads.items()
+            ]
+            return names + list(self._events)
+
+    def write(self, path: str) -> None:
+        """
+        Write the trace as Chrome trace event JSON
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'traceEvents': self.events(), 'displayTimeUnit': 'ms'},
+                file)
+
+    def wrap(
+            self,
+            func: Callable[..., Any],
+            category: str,
+            name: Callable[..., str]) -> Callable[..., Any]:
+        """
+        Wrap `func` so each call is a span named by calling `name` with
+        the same arguments
+        """
+        @functools.wraps(func)
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except BaseException as exc:
+                error = type(exc).__name__
+                raise
+            finally:
+                self.record(
+                    name(*args, **kwargs),
+                    category,
+                    start,
+                    time.perf_counter_ns(),
+                    error)
+        return traced
+
+
+TRACER = Tracer()
+
+
+def span(name: str, category: str) -> _Span | _NoSpan:
+    """
+    Record the block as a span on the process-wide tracer
+    """
+    return TRACER.span(name, category)
+
+
+def trace_docker(client: Any) -> None:
+    """
+    Trace every docker-py API call `client` makes, if tracing is enabled.
+    Calls are named after the low-level APIClient method, which every
+    high-level model call goes through.
+    """
+    api = getattr(client, 'api', None)
+    if not TRACER.enabled or api is None:
+        return
+    # APIClient is also a requests.Session; its HTTP methods sit under
+    # the API methods and would only repeat them
+    session_names = set(dir(requests.Session))
+    for name in dir(type(api)):
+        if name.startswith('_') or name in session_names:
+            continue
+        if not isinstance(getattr(type(api), name), types.FunctionType):
+            continue
+        setattr(api, name, TRACER.wrap(
+            getattr(api, name), 'docker', _fixed_name(f'docker.{name}')))
+
+
+def trace_smm(connection: Any) -> None:
+    """
+    Trace every request an SMM connection makes, if tracing is enabled
+    """
+    if not TRACER.enabled:
+        return
+    for method in ('get', 'get_json', 'post', 'delete'):
+        verb = 'GET' if method == 'get_json' else method.upper()
+        setattr(connection, method, TRACER.wrap(
+            getattr(connection, method), 'smm', _smm_name(verb)))
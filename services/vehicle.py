@@ -12,6 +12,7 @@ import docker.errors
 import docker.models.containers
 import docker.models.networks
 
+from services.docker_client import get_docker_client
 from services.helpers import (
     remove_container, remove_network, sanitize_docker_name)
 
@@ -24,7 +25,23 @@ if TYPE_CHECKING:
 class Vehicle:
     """
     Generic Autopiloted vehicle
+    Images are pre-pulled by the caller, see images().
     """
+    SITL_IMAGE = 'sparlane/ardupilot-sitl:{aircraft_type}-latest'
+    MAVPROXY_IMAGE = 'sparlane/mavproxy:latest'
+    SMM_MAVLINK_IMAGE = 'canterburyairpatrol/smm-mavlink:latest'
+
+    @classmethod
+    def images(cls, aircraft_type: str) -> list[str]:
+        """
+        Docker images needed to run a vehicle of this type
+        """
+        return [
+            cls.SITL_IMAGE.format(aircraft_type=aircraft_type),
+            cls.MAVPROXY_IMAGE,
+            cls.SMM_MAVLINK_IMAGE,
+        ]
+
     # pylint: disable=R0913,R0917
     def __init__(
         self,
@@ -35,8 +52,9 @@ class Vehicle:
         password: str,
         lat: float = -43.5,
         lon: float = 172.5,
+        speedup: float = 1.0,
     ) -> None:
-        docker_client = docker.from_env()
+        docker_client = get_docker_client()
         self.prefix_name = (
             f'{sanitize_docker_name(smm_server.name)}_'
             f'{sanitize_docker_name(name)}')
@@ -53,7 +71,8 @@ class Vehicle:
                 username,
                 password,
                 lat,
-                lon)
+                lon,
+                speedup)
         except Exception:  # pylint: disable=broad-exception-caught
             try:
                 self.stop()
@@ -62,8 +81,6 @@ class Vehicle:
                     "Error during vehicle cleanup after failed creation: %s",
                     name)
             raise
-        finally:
-            docker_client.close()
         log.debug("Created vehicle containers for %s", name)
 
     # pylint: disable=R0913,R0917
@@ -77,6 +94,7 @@ class Vehicle:
         password: str,
         lat: float,
         lon: float,
+        speedup: float,
     ) -> None:
         """
         Create Docker resources for this vehicle.
@@ -88,18 +106,20 @@ class Vehicle:
                 f'ap_{self.prefix_name}-net',
                 driver='bridge')
         self.apm = docker_client.containers.create(
-            f'sparlane/ardupilot-sitl:{aircraft_type}-latest',
+            self.SITL_IMAGE.format(aircraft_type=aircraft_type),
             detach=True,
             name=f'{self.prefix_name}_sitl',
             environment=[
                 f'LAT={lat}',
                 f'LON={lon}',
                 'BATT_CAPACITY=100000',
+                # Simulate at the same rate as the mission clock
+                f'SPEEDUP={speedup:g}',
             ]
         )
         self.net.connect(self.apm)
         self.mavproxy = docker_client.containers.create(
-            'sparlane/mavproxy:latest',
+            self.MAVPROXY_IMAGE,
             detach=True,
             name=f'{self.prefix_name}_mavproxy',
             command=[
@@ -123,10 +143,8 @@ class Vehicle:
             }
         )
         self.net.connect(self.mavproxy)
-        docker_client.images.pull(
-            'canterburyairpatrol/smm-mavlink:latest')
         self.smm_mavlink = docker_client.containers.create(
-            'canterburyairpatrol/smm-mavlink:latest',
+            self.SMM_MAVLINK_IMAGE,
             command=[
                 f"tcp:{self.prefix_name}_mavproxy:5760",
                 f"http://{smm_server.name}:{smm_server.internal_port}",
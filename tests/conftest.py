@@ -0,0 +1,101 @@
+"""
+Benchmark support
+Tests marked `benchmark` time a call with the `benchmark` fixture and
+compare it with tests/benchmarks.json. A call more than
+--benchmark-threshold times slower than its baseline fails the test.
+--benchmark-update records this run as the new baseline. Baselines only
+mean something on the machine that recorded them, so the file is not
+committed and benchmarks are not part of check-code.sh.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import timeit
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+
+BASELINE = pathlib.Path(__file__).with_name('benchmarks.json')
+ROUNDS = 5
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """
+    Benchmark options
+    """
+    group = parser.getgroup('benchmark')
+    group.addoption(
+        '--benchmark-baseline',
+        default=str(BASELINE),
+        help='JSON file of baseline timings')
+    group.addoption(
+        '--benchmark-threshold',
+        type=float,
+        default=1.5,
+        help='Fail a benchmark this many times slower than its baseline')
+    group.addoption(
+        '--benchmark-update',
+        action='store_true',
+        help='Save this run as the baseline')
+
+
+class _Results:
+    """Timings from this run, by test id."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.baseline: dict[str, float] = {}
+        if path.exists():
+            self.baseline = json.loads(path.read_text(encoding='utf-8'))
+        self.timings: dict[str, float] = {}
+
+    def save(self) -> None:
+        """
+        Merge this run's timings into the baseline file
+        """
+        merged = {**self.baseline, **self.timings}
+        self.path.write_text(
+            json.dumps(dict(sorted(merged.items())), indent=2) + '\n',
+            encoding='utf-8')
+
+
+@pytest.fixture(scope='session')
+def _benchmark_results(
+        request: pytest.FixtureRequest) -> Iterator[_Results]:
+    results = _Results(
+        pathlib.Path(request.config.getoption('--benchmark-baseline')))
+    yield results
+    if request.config.getoption('--benchmark-update') and results.timings:
+        results.save()
+
+
+@pytest.fixture
+def benchmark(
+        request: pytest.FixtureRequest,
+        _benchmark_results: _Results) -> Callable[..., Any]:
+    """
+    Time `func(*args)`, best of several rounds, and check it against the
+    baseline. Returns the function's result.
+    """
+    threshold = request.config.getoption('--benchmark-threshold')
+    update = request.config.getoption('--benchmark-update')
+    name = request.node.nodeid.split('::', 1)[1]
+
+    def run(func: Callable[..., Any], *args: Any) -> Any:
+        timer = timeit.Timer(lambda: func(*args))
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(ROUNDS, number)) / number
+        _benchmark_results.timings[name] = seconds
+        baseline = _benchmark_results.baseline.get(name)
+        if baseline is not None and not update:
+            slowdown = seconds / baseline
+            if slowdown > threshold:
+                pytest.fail(
+                    f"{name} took {seconds * 1e6:.1f}us, {slowdown:.2f}x "
+                    f"its {baseline * 1e6:.1f}us baseline "
+                    f"(threshold {threshold}x)")
+        return func(*args)
+    return run
@@ -0,0 +1,190 @@
+"""
+Benchmarks for the runner's hot paths.
+Run with `pytest -m benchmark`; see conftest.py for the baseline options.
+"""
+
+import json
+import pathlib
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+import yaml
+
+import configloader
+from configloader import load_mission_config
+from configmodels import AssetConfig, BaseLocation, MissionConfig
+from fakes.smmapi import FakeSMMBackend
+from mission import (
+    MISSION_ASSET_STATUSES,
+    MissionRunnerParticipant,
+    ParticipantAsset,
+)
+from missionclock import REAL_TIME
+from services.helpers import get_random_secret, sanitize_docker_name
+
+pytestmark = pytest.mark.benchmark
+
+Benchmark = Callable[..., Any]
+
+CONFIG_ASSETS = 1000
+# Big enough to take the streaming path
+LARGE_CONFIG_ASSETS = 10000
+# (assets, organisations) per participant
+PARTICIPANT_SIZES = [(50, 5), (500, 20), (5000, 100)]
+
+
+def _mission_data(assets: int) -> dict[str, Any]:
+    return {
+        "name": "Benchmark",
+        "description": "Benchmark mission",
+        "assets": [
+            {
+                "name": f"Asset {index}",
+                "type": "Boat",
+                "organization": f"Org {index % 50}",
+                "responseTimeMins": 5,
+                "baseLocation": {"latitude": -43.5, "longitude": 172.5},
+            }
+            for index in range(assets)
+        ],
+        "POIs": [
+            {
+                "name": f"POI {index}",
+                "location": {"latitude": -43.0, "longitude": 172.0},
+            }
+            for index in range(100)
+        ],
+    }
+
+
+@pytest.mark.parametrize("extension", ["yml", "json"])
+def test_load_mission_config(
+        benchmark: Benchmark,
+        tmp_path: pathlib.Path,
+        extension: str) -> None:
+    path = tmp_path / f"mission.{extension}"
+    data = _mission_data(CONFIG_ASSETS)
+    with open(path, "w", encoding="utf-8") as file:
+        if extension == "json":
+            json.dump(data, file)
+        else:
+            yaml.safe_dump(data, file)
+
+    config = benchmark(load_mission_config, str(path))
+
+    assert len(config.assets) == CONFIG_ASSETS
+
+
+def test_load_large_mission_streams(
+        benchmark: Benchmark,
+        tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "mission.yml"
+    with open(path, "w", encoding="utf-8") as file:
+        yaml.safe_dump(_mission_data(LARGE_CONFIG_ASSETS), file)
+    assert path.stat().st_size > configloader.STREAM_BYTES
+
+    config = benchmark(load_mission_config, str(path))
+
+    assert len(config.assets) == LARGE_CONFIG_ASSETS
+
+
+def test_load_cached_mission_config(
+        benchmark: Benchmark,
+        tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "mission.yml"
+    with open(path, "w", encoding="utf-8") as file:
+        yaml.safe_dump(_mission_data(CONFIG_ASSETS), file)
+    configloader.configure_cache(str(tmp_path / "cache"))
+    try:
+        load_mission_config(str(path))
+        config = benchmark(load_mission_config, str(path))
+    finally:
+        configloader.configure_cache(None)
+
+    assert len(config.assets) == CONFIG_ASSETS
+
+
+def test_mission_config_validation(benchmark: Benchmark) -> None:
+    data = _mission_data(CONFIG_ASSETS)
+
+    config = benchmark(MissionConfig.from_dict, data, "mission.yml")
+
+    assert len(config.assets) == CONFIG_ASSETS
+
+
+def _participant(assets: int, orgs: int) -> MissionRunnerParticipant:
+    """
+    A participant whose organisations have all joined and whose assets
+    are all waiting to launch
+    """
+    backend = FakeSMMBackend()
+    backend.serve("http://smm", "secret")
+    connection = backend.connect("http://smm", "admin", "secret")
+    mission = connection.create_mission("Benchmark", "")
+    for index in range(orgs):
+        mission.add_organization(
+            connection.create_organization(f"Org {index}"))
+    configs = [
+        AssetConfig(
+            name=f"Asset {index}",
+            type="Boat",
+            organization=f"Org {index % orgs}",
+            response_time_mins=60,
+            base_location=BaseLocation(latitude=-43.5, longitude=172.5))
+        for index in range(assets)
+    ]
+    runner = MagicMock()
+    runner.config.assets = configs
+    runner.clock = REAL_TIME
+    smm = MagicMock()
+    smm.get_web_connection.return_value = connection
+    participant = MissionRunnerParticipant(runner, smm)
+    participant.mission_id = mission.id
+    participant.mission_asset_statuses = dict.fromkeys(
+        MISSION_ASSET_STATUSES, MagicMock())
+    service = MagicMock()
+    for config in configs:
+        participant.assets[config.name] = ParticipantAsset(
+            participant, config, service, service, "user", "pass")
+    participant.check_added_organizations()
+    return participant
+
+
+@pytest.mark.parametrize("assets,orgs", PARTICIPANT_SIZES)
+def test_check_added_organizations(
+        benchmark: Benchmark,
+        assets: int,
+        orgs: int) -> None:
+    participant = _participant(assets, orgs)
+
+    benchmark(participant.check_added_organizations)
+
+    assert len(participant.mission_org_list) == orgs
+
+
+@pytest.mark.parametrize("assets,orgs", PARTICIPANT_SIZES)
+def test_participant_time_tick(
+        benchmark: Benchmark,
+        assets: int,
+        orgs: int) -> None:
+    participant = _participant(assets, orgs)
+
+    benchmark(participant.time_tick)
+
+    assert participant.next_launch_deadline() is not None
+
+
+def test_sanitize_docker_names(benchmark: Benchmark) -> None:
+    names = [f"Team {index} / Alpha Boat #{index}" for index in range(10000)]
+
+    cleaned = benchmark(lambda: [sanitize_docker_name(n) for n in names])
+
+    assert cleaned[1] == "team-1-alpha-boat-1"
+
+
+def test_random_secrets(benchmark: Benchmark) -> None:
+    secrets = benchmark(lambda: [get_random_secret(32) for _ in range(1000)])
+
+    assert len(secrets) == 1000
@@ -4,16 +4,20 @@ Unit tests for configloader.
 
 import json
 import pathlib
+from collections.abc import Iterator
+from unittest.mock import MagicMock
 
 import pytest
 import yaml
 
+import configloader
 from configloader import (
+    configure_cache,
     load_config,
     load_mission_config,
     load_participant_config,
 )
-from configmodels import ConfigError
+from configmodels import ConfigError, MissionConfig
 
 
 MINIMAL_ASSET: dict[str, object] = {
@@ -301,3 +305,151 @@ class TestLoadParticipantConfig:
         path = _write(tmp_path, "participant.yaml", data)
         with pytest.raises(ConfigError, match="password is required"):
             load_participant_config(path)
+
+
+class TestStreamingMissionConfig:
+    @pytest.fixture(autouse=True)
+    def _always_stream(self, mocker: MagicMock) -> None:
+        mocker.patch("configloader.STREAM_BYTES", 0)
+
+    def test_matches_full_parse(self, tmp_path: pathlib.Path) -> None:
+        data = dict(
+            MINIMAL_MISSION,
+            assets=[MINIMAL_ASSET, dict(MINIMAL_ASSET, name="Beta Boat")],
+            POIs=[{
+                "name": "Clue 1",
+                "location": {"latitude": -43.0, "longitude": 172.0},
+            }])
+        path = _write(tmp_path, "mission.yaml", data)
+
+        cfg = load_mission_config(path)
+
+        assert cfg == MissionConfig.from_dict(data, path)
+
+    def test_asset_errors_name_the_asset(
+            self,
+            tmp_path: pathlib.Path) -> None:
+        asset = dict(MINIMAL_ASSET)
+        del asset["baseLocation"]
+        data = dict(MINIMAL_MISSION, assets=[MINIMAL_ASSET, asset])
+        path = _write(tmp_path, "mission.yaml", data)
+
+        with pytest.raises(
+                ConfigError,
+                match=r"assets\[1\].baseLocation is required"):
+            load_mission_config(path)
+
+    def test_aliases_fall_back_to_full_parse(
+            self,
+            tmp_path: pathlib.Path) -> None:
+        path = tmp_path / "mission.yaml"
+        path.write_text(
+            "name: Test Mission\n"
+            "description: A test\n"
+            "assets:\n"
+            "  - &boat {name: Alpha Boat, type: Boat, organization: T,\n"
+            "           responseTimeMins: 5,\n"
+            "           baseLocation: {latitude: 1, longitude: 2}}\n"
+            "  - *boat\n",
+            encoding="utf-8")
+
+        cfg = load_mission_config(str(path))
+
+        assert [asset.name for asset in cfg.assets] == ["Alpha Boat"] * 2
+
+
+class TestConfigCache:
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path: pathlib.Path) -> Iterator[pathlib.Path]:
+        directory = tmp_path / "cache"
+        configure_cache(str(directory))
+        yield directory
+        configure_cache(None)
+
+    def test_unchanged_file_is_not_parsed_again(
+            self,
+            tmp_path: pathlib.Path,
+            mocker: MagicMock) -> None:
+        path = _write(tmp_path, "mission.yaml", MINIMAL_MISSION)
+        first = load_mission_config(path)
+        parse = mocker.patch("configloader._parse_mission")
+
+        assert load_mission_config(path) == first
+        parse.assert_not_called()
+
+    def test_changed_file_is_parsed(self, tmp_path: pathlib.Path) -> None:
+        path = _write(tmp_path, "mission.yaml", MINIMAL_MISSION)
+        load_mission_config(path)
+        _write(tmp_path, "mission.yaml", dict(MINIMAL_MISSION, name="New"))
+
+        assert load_mission_config(path).name == "New"
+
+    def test_changed_loader_is_not_served_old_entries(
+            self,
+            tmp_path: pathlib.Path,
+            mocker: MagicMock) -> None:
+        path = _write(tmp_path, "mission.yaml", MINIMAL_MISSION)
+        load_mission_config(path)
+        mocker.patch(
+            "configloader._code_digest", return_value=b"new loader")
+        parse = mocker.spy(configloader, "_parse_mission")
+
+        load_mission_config(path)
+
+        parse.assert_called_once()
+
+    def test_kinds_are_cached_apart(self, tmp_path: pathlib.Path) -> None:
+        path = _write(tmp_path, "participant.yaml", MINIMAL_PARTICIPANT)
+        load_participant_config(path)
+
+        with pytest.raises(ConfigError, match="description is required"):
+            load_mission_config(path)
+
+    def test_unreadable_entry_is_replaced(
+            self,
+            tmp_path: pathlib.Path,
+            cache_dir: pathlib.Path) -> None:
+        path = _write(tmp_path, "participant.yaml", MINIMAL_PARTICIPANT)
+        load_participant_config(path)
+        for entry in cache_dir.iterdir():
+            entry.write_bytes(b"not a pickle")
+
+        assert load_participant_config(path).name == "Team Alpha"
+        assert load_participant_config(path).name == "Team Alpha"
+
+    def test_shared_cache_directory_is_ignored(
+            self,
+            tmp_path: pathlib.Path,
+            cache_dir: pathlib.Path,
+            mocker: MagicMock) -> None:
+        path = _write(tmp_path, "mission.yaml", MINIMAL_MISSION)
+        load_mission_config(path)
+        cache_dir.chmod(0o777)
+        load = mocker.patch("configloader.pickle.load")
+
+        assert load_mission_config(path).name == MINIMAL_MISSION["name"]
+        load.assert_not_called()
+
+    def test_cache_directory_of_another_user_is_ignored(
+            self,
+            tmp_path: pathlib.Path,
+            mocker: MagicMock) -> None:
+        path = _write(tmp_path, "mission.yaml", MINIMAL_MISSION)
+        load_mission_config(path)
+        mocker.patch("configloader.os.getuid", return_value=12345)
+        load = mocker.patch("configloader.pickle.load")
+
+        load_mission_config(path)
+
+        load.assert_not_called()
+
+    def test_invalid_config_is_not_cached(
+            self,
+            tmp_path: pathlib.Path,
+            cache_dir: pathlib.Path) -> None:
+        path = _write(tmp_path, "participant.yaml", {"name": "Team"})
+
+        with pytest.raises(ConfigError):
+            load_participant_config(path)
+
+        assert not cache_dir.exists()
@@ -0,0 +1,141 @@
+"""
+Unit tests for pooled SMM connections.
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.connection import PooledSMMConnection, SMMConnectionPool
+
+
+def _response(url: str, redirected: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(
+        url=url,
+        history=[MagicMock()] if redirected else [],
+        json=lambda: {"ok": True})
+
+
+def _connection(session: MagicMock) -> PooledSMMConnection:
+    connection = object.__new__(PooledSMMConnection)
+    connection.base_url = "http://localhost:8080"
+    connection.username = "imt-challenge"
+    connection.password = "secret"
+    connection.session = session
+    connection._login_lock = threading.Lock()
+    connection._pool_size = 4
+    return connection
+
+
+def test_request_with_live_session_is_sent_once(mocker: MagicMock) -> None:
+    session = MagicMock()
+    session.get.return_value = _response("http://localhost:8080/mission/")
+    connection = _connection(session)
+    login = mocker.patch.object(connection, "login")
+
+    assert connection.get_json("/mission/") == {"ok": True}
+
+    session.get.assert_called_once()
+    login.assert_not_called()
+
+
+@pytest.mark.parametrize("login_page", [
+    "/accounts/login/?next=/mission/",
+    "/admin/login/?next=/admin/assets/asset/add/",
+])
+def test_expired_session_logs_in_and_retries(
+        mocker: MagicMock,
+        login_page: str) -> None:
+    session = MagicMock()
+    session.get.side_effect = [
+        _response(f"http://localhost:8080{login_page}", redirected=True),
+        _response("http://localhost:8080/mission/"),
+    ]
+    connection = _connection(session)
+    login = mocker.patch.object(connection, "login")
+
+    response = connection.get("/mission/")
+
+    login.assert_called_once_with(session)
+    assert session.get.call_count == 2
+    assert response.url == "http://localhost:8080/mission/"
+
+
+def test_login_uses_a_keep_alive_pool(mocker: MagicMock) -> None:
+    session = MagicMock()
+    session.cookies = {"csrftoken": "token"}
+    mocker.patch(
+        "services.connection.requests.Session",
+        return_value=session)
+    expired = MagicMock()
+    connection = _connection(expired)
+
+    connection.login(expired)
+
+    assert connection.session is session
+    expired.close.assert_not_called()
+    adapter = session.mount.call_args_list[0].args[1]
+    assert adapter._pool_maxsize == 4
+    session.post.assert_called_once()
+    assert session.post.call_args.kwargs["data"] == {
+        "username": "imt-challenge",
+        "password": "secret",
+    }
+
+
+def test_login_is_skipped_once_expired_session_is_replaced(
+        mocker: MagicMock) -> None:
+    fresh = MagicMock()
+    fresh.cookies = {"csrftoken": "token"}
+    new_session = mocker.patch(
+        "services.connection.requests.Session",
+        return_value=fresh)
+    expired = MagicMock()
+    connection = _connection(expired)
+
+    # Two requests sent with the same expired session both log in
+    connection.login(expired)
+    connection.login(expired)
+
+    new_session.assert_called_once_with()
+    fresh.post.assert_called_once()
+    assert connection.session is fresh
+
+
+def test_pool_reuses_connection_per_user() -> None:
+    factory = MagicMock(side_effect=lambda url, user, password: MagicMock(
+        password=password))
+    pool = SMMConnectionPool(factory)
+
+    first = pool.get("http://localhost:1", "admin", "pw")
+    second = pool.get("http://localhost:1", "admin", "pw")
+    other_user = pool.get("http://localhost:1", "imt-challenge", "pw")
+    other_server = pool.get("http://localhost:2", "admin", "pw")
+
+    assert first is second
+    assert len({id(first), id(other_user), id(other_server)}) == 3
+    assert factory.call_count == 3
+
+
+def test_pool_logs_in_again_when_password_changes() -> None:
+    factory = MagicMock(side_effect=lambda url, user, password: MagicMock(
+        password=password))
+    pool = SMMConnectionPool(factory)
+
+    first = pool.get("http://localhost:1", "admin", "old")
+    second = pool.get("http://localhost:1", "admin", "new")
+
+    assert first is not second
+    assert second.password == "new"
+
+
+def test_pool_close_closes_sessions() -> None:
+    connection = MagicMock(password="pw")
+    pool = SMMConnectionPool(MagicMock(return_value=connection))
+    pool.get("http://localhost:1", "admin", "pw")
+
+    pool.close()
+
+    connection.session.close.assert_called_once_with()
@@ -0,0 +1,70 @@
+"""
+Unit tests for the shared Docker client.
+"""
+
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import docker_client
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_client() -> Iterator[None]:
+    docker_client.close_docker_client()
+    yield
+    docker_client.close_docker_client()
+    docker_client.configure_docker_client(
+        docker_client.DEFAULT_MAX_POOL_SIZE)
+
+
+def test_client_is_created_once(mocker: MagicMock) -> None:
+    from_env = mocker.patch("services.docker_client.docker.from_env")
+
+    first = docker_client.get_docker_client()
+    second = docker_client.get_docker_client()
+
+    assert first is second
+    from_env.assert_called_once_with(
+        max_pool_size=docker_client.DEFAULT_MAX_POOL_SIZE)
+
+
+def test_configured_pool_size_is_used(mocker: MagicMock) -> None:
+    from_env = mocker.patch("services.docker_client.docker.from_env")
+
+    docker_client.configure_docker_client(64)
+    docker_client.get_docker_client()
+
+    from_env.assert_called_once_with(max_pool_size=64)
+
+
+def test_configure_after_creation_raises(mocker: MagicMock) -> None:
+    mocker.patch("services.docker_client.docker.from_env")
+    docker_client.get_docker_client()
+
+    with pytest.raises(RuntimeError, match="already been created"):
+        docker_client.configure_docker_client(64)
+
+
+def test_close_allows_recreation(mocker: MagicMock) -> None:
+    from_env = mocker.patch("services.docker_client.docker.from_env")
+    first = docker_client.get_docker_client()
+
+    docker_client.close_docker_client()
+    docker_client.get_docker_client()
+
+    first.close.assert_called_once_with()
+    assert from_env.call_count == 2
+
+
+def test_supplied_client_is_shared(mocker: MagicMock) -> None:
+    from_env = mocker.patch("services.docker_client.docker.from_env")
+    fake = MagicMock()
+
+    docker_client.use_docker_client(fake)
+
+    assert docker_client.get_docker_client() is fake
+    from_env.assert_not_called()
+    with pytest.raises(RuntimeError, match="already been created"):
+        docker_client.use_docker_client(MagicMock())
@@ -0,0 +1,123 @@
+"""
+Unit tests for the fake Docker and SMM backends.
+"""
+
+from unittest.mock import MagicMock
+
+import docker.errors
+import pytest
+import requests
+
+from smm_client.missions import SMMMission
+
+from fakes.dockerapi import FakeDockerClient
+from fakes.faults import Faults, InjectedFault
+from fakes.smmapi import FakeSMMBackend
+from services.helpers import remove_network
+
+
+def test_queued_failures_are_raised_and_counted() -> None:
+    sleep = MagicMock()
+    faults = Faults(latency=0.5, sleep=sleep)
+    faults.fail_next("op")
+
+    with pytest.raises(InjectedFault, match="op"):
+        faults.check("op")
+    faults.check("op")
+
+    assert faults.snapshot() == {"op": 2}
+    assert faults.failures == {"op": 1}
+    assert sleep.call_count == 2
+
+
+def test_failure_rate_must_be_a_fraction() -> None:
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        Faults(failure_rate=2)
+
+
+def test_containers_need_pulled_images() -> None:
+    client = FakeDockerClient()
+
+    with pytest.raises(docker.errors.ImageNotFound):
+        client.containers.create("postgres", name="db")
+
+
+def test_started_container_publishes_ports_and_turns_healthy() -> None:
+    client = FakeDockerClient(boot_time=0)
+    client.images.pull("postgres")
+    events = client.events(filters={"event": ["health_status", "die"]})
+    container = client.containers.create(
+        "postgres",
+        name="db",
+        ports={"5432/tcp": ("127.0.0.1", None)},
+        healthcheck={"test": ["CMD", "true"]})
+
+    container.start()
+    event = next(iter(events))
+    container.reload()
+
+    assert event["id"] == container.id
+    assert event["Action"] == "health_status: healthy"
+    assert container.attrs["NetworkSettings"]["Ports"]["5432/tcp"] == [
+        {"HostIp": "127.0.0.1", "HostPort": "49153"}]
+    assert container.exec_run(["pg_isready"]).exit_code == 0
+    container.remove(force=True)
+    events.close()
+
+
+def test_names_are_unique_and_labels_filter() -> None:
+    client = FakeDockerClient()
+    client.images.pull("smm")
+    client.containers.create("smm", name="a", labels={"pool": "a"})
+    client.containers.create("smm", name="b")
+
+    with pytest.raises(docker.errors.APIError) as exc_info:
+        client.containers.create("smm", name="a")
+
+    assert exc_info.value.response.status_code == 409
+    assert [c.name for c in client.containers.list(
+        all=True, filters={"label": "pool=a"})] == ["a"]
+    assert client.containers.list() == []
+
+
+def test_network_with_endpoints_is_not_removed() -> None:
+    client = FakeDockerClient()
+    client.images.pull("smm")
+    network = client.networks.create("net")
+    container = client.containers.create("smm", name="smm")
+    network.connect(container)
+
+    remove_network(network)
+    assert client.networks.get("net") is network
+
+    container.remove(force=True)
+    remove_network(network)
+    with pytest.raises(docker.errors.NotFound):
+        client.networks.get("net")
+
+
+def test_smm_client_runs_against_the_fake_server() -> None:
+    backend = FakeSMMBackend()
+    server = backend.serve("http://smm", "secret")
+    admin = backend.connect("http://smm", "admin", "secret")
+
+    organization = admin.create_organization("IMT")
+    mission = admin.create_mission("Search", "Find it")
+    mission.add_organization(organization)
+    server.add_mission_organization(int(mission.id), "IMT")
+
+    orgs = SMMMission(admin, mission.id, "Search").get_organizations()
+    assert [org.organization.name for org in orgs] == ["IMT"]
+    assert backend.faults.snapshot()["GET /mission/{id}/organizations/"] == 1
+
+
+def test_smm_rejects_bad_logins_and_unknown_pages() -> None:
+    backend = FakeSMMBackend()
+    backend.serve("http://smm", "secret")
+
+    assert backend.connect("http://smm", "admin", "wrong").get(
+        "/assets/").status_code == 403
+    assert backend.connect("http://smm", "admin", "secret").get(
+        "/nowhere/").status_code == 404
+    with pytest.raises(requests.ConnectionError):
+        backend.connect("http://elsewhere", "admin", "secret")
@@ -2,6 +2,9 @@
 Unit tests for services.helpers.
 """
 
+import base64
+import hashlib
+import threading
 import unittest
 from contextlib import AbstractContextManager
 from types import SimpleNamespace
@@ -10,11 +13,14 @@ from unittest.mock import MagicMock, patch
 
 import docker.errors
 
+from services import metrics
 from services.helpers import (
+    django_password_hash,
     get_random_secret,
     get_random_string,
     pull_images,
     remove_network,
+    run_in_parallel,
     sanitize_account_name,
     sanitize_docker_name,
     wait_until,
@@ -107,6 +113,49 @@ class PullImagesTests(unittest.TestCase):
         client.images.pull.assert_any_call("two")
         self.assertEqual(client.images.pull.call_count, 2)
 
+    def test_duplicate_images_pulled_once(self) -> None:
+        client = MagicMock()
+
+        pull_images(client, ["one", "two", "one"])
+
+        self.assertEqual(client.images.pull.call_count, 2)
+
+
+class RunInParallelTests(unittest.TestCase):
+    def test_results_are_in_item_order(self) -> None:
+        self.assertEqual(
+            run_in_parallel(lambda x: x * 2, [3, 1, 2], max_workers=2),
+            [6, 2, 4])
+
+    def test_empty_items(self) -> None:
+        self.assertEqual(run_in_parallel(str, [], max_workers=4), [])
+
+    def test_every_call_finishes_before_failure_is_raised(self) -> None:
+        finished: list[int] = []
+
+        def work(item: int) -> None:
+            if item == 0:
+                raise RuntimeError("first failed")
+            finished.append(item)
+
+        with self.assertRaises(RuntimeError):
+            run_in_parallel(work, [0, 1, 2], max_workers=1)
+        self.assertEqual(finished, [1, 2])
+
+    def test_calls_overlap(self) -> None:
+        barrier = threading.Barrier(3, timeout=5)
+
+        run_in_parallel(lambda _: barrier.wait(), range(3), max_workers=3)
+
+    def test_calls_see_the_callers_participant(self) -> None:
+        with metrics.participant("alpha-smm"):
+            names = run_in_parallel(
+                lambda _: metrics.current_participant(),
+                range(3),
+                max_workers=3)
+
+        self.assertEqual(names, ["alpha-smm"] * 3)
+
 
 class GetRandomSecretTests(unittest.TestCase):
     def test_secrets_are_unique(self) -> None:
@@ -122,6 +171,22 @@ class GetRandomSecretTests(unittest.TestCase):
         self.assertEqual(len(secret), 12)
 
 
+class DjangoPasswordHashTests(unittest.TestCase):
+    def test_hash_verifies_like_django(self) -> None:
+        algorithm, iterations, salt, encoded = django_password_hash(
+            "secret").split("$")
+
+        self.assertEqual(algorithm, "pbkdf2_sha256")
+        expected = hashlib.pbkdf2_hmac(
+            "sha256", b"secret", salt.encode(), int(iterations))
+        self.assertEqual(base64.b64decode(encoded), expected)
+
+    def test_hashes_are_salted(self) -> None:
+        self.assertNotEqual(
+            django_password_hash("secret"),
+            django_password_hash("secret"))
+
+
 class WaitUntilTests(unittest.TestCase):
     def _patch_clock(self, clock: FakeClock) -> AbstractContextManager[Any]:
         return patch.multiple(
@@ -171,6 +236,30 @@ class WaitUntilTests(unittest.TestCase):
                 wait_until(lambda: False, timeout=2.5, interval=1)
         self.assertEqual(clock.sleeps, [1, 1, 0.5])
 
+    def test_initial_interval_doubles_up_to_interval(self) -> None:
+        clock = FakeClock()
+        with self._patch_clock(clock):
+            with self.assertRaises(TimeoutError):
+                wait_until(
+                    lambda: False,
+                    timeout=2,
+                    interval=0.5,
+                    initial_interval=0.1)
+        self.assertEqual(clock.sleeps[:4], [0.1, 0.2, 0.4, 0.5])
+
+    def test_wake_event_ends_sleep_early(self) -> None:
+        wake = threading.Event()
+        attempts = {'n': 0}
+
+        def predicate() -> bool:
+            attempts['n'] += 1
+            wake.set()
+            return attempts['n'] >= 2
+
+        wait_until(predicate, timeout=60, interval=30, wake=wake)
+
+        self.assertEqual(attempts['n'], 2)
+
 
 class GetRandomStringTests(unittest.TestCase):
     def test_length_is_exact(self) -> None:
@@ -6,7 +6,7 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from configmodels import ConfigError, ParticipantConfig
+from configmodels import ConfigError, MemberConfig, ParticipantConfig
 from instance import Participant, ServiceNotStartedError, require_smm
 
 
@@ -45,3 +45,34 @@ def test_require_smm_raises_specific_error_when_not_started() -> None:
             ServiceNotStartedError,
             match="Participant Team Alpha has not been started"):
         require_smm(participant)
+
+
+def test_start_claims_smm_from_pool() -> None:
+    participant = object.__new__(Participant)
+    participant.name = "Team Alpha"
+    participant.service_name = "team-alpha"
+    participant.smm = None
+    pool = MagicMock()
+
+    participant.start(pool)
+
+    pool.claim.assert_called_once_with("team-alpha-smm")
+    assert participant.smm is pool.claim.return_value
+
+
+def test_setup_adds_every_member_to_imt_org() -> None:
+    participant = object.__new__(Participant)
+    participant.name = "Team Alpha"
+    participant.members = [
+        MemberConfig(username=f"user{i}", password="pw") for i in range(3)]
+    participant.smm = MagicMock()
+    smm_admin = participant.smm.get_web_connection.return_value
+    imt_org = smm_admin.create_organization.return_value
+
+    participant.setup()
+
+    smm_admin.create_organization.assert_called_once_with("IMT")
+    assert sorted(
+        call.args[0] for call in smm_admin.create_user.call_args_list) == [
+            "user0", "user1", "user2"]
+    assert imt_org.add_member.call_count == 3
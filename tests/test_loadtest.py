@@ -0,0 +1,66 @@
+"""
+Unit tests for the load test harness.
+"""
+
+import json
+from collections.abc import Iterator
+
+import pytest
+
+import loadtest
+from services.docker_client import close_docker_client
+
+
+@pytest.fixture(autouse=True)
+def _no_shared_client() -> Iterator[None]:
+    close_docker_client()
+    yield
+    close_docker_client()
+
+
+def _options(**overrides: object) -> loadtest.LoadTestOptions:
+    options = loadtest.LoadTestOptions(
+        participants=2,
+        assets=4,
+        organizations=2,
+        duration=120,
+        speedup=60,
+        response_time_mins=0,
+        boot_time=0.01,
+        seed=1)
+    for name, value in overrides.items():
+        setattr(options, name, value)
+    return options
+
+
+def test_mission_runs_against_fakes() -> None:
+    report = loadtest.run_load_test(_options())
+
+    assert report.error is None
+    assert list(report.setup) == [
+        "start", "add_participants", "setup", "create_mission"]
+    assert report.assets_added == 8
+    assert report.assets_launched == 8
+    assert report.tick_latency["count"] == 4
+    # Postgres and SMM per participant, three containers per vehicle
+    assert report.docker_calls["container.start"] == 2 * 2 + 8 * 3
+    assert report.smm_calls["POST /mission/new/"] == 2
+
+
+def test_injected_failure_is_reported_by_phase() -> None:
+    report = loadtest.run_load_test(_options(smm_failure_rate=1.0))
+
+    assert report.error is not None
+    assert report.error.startswith("add_participants:")
+    assert report.assets_added == 0
+
+
+def test_main_prints_json() -> None:
+    lines: list[str] = []
+
+    status = loadtest.main(
+        ["-n", "1", "-a", "1", "-t", "1", "--speedup", "1", "--json"],
+        out=lines.append)
+
+    assert status == 0
+    assert json.loads(lines[0])["options"]["participants"] == 1
@@ -0,0 +1,125 @@
+"""
+Unit tests for the SMM lookup cache.
+"""
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from services.lookup import SMMLookupCache
+
+
+def _named(item_id: int, name: str) -> SimpleNamespace:
+    return SimpleNamespace(id=item_id, name=name)
+
+
+def test_asset_types_are_listed_once() -> None:
+    cache = SMMLookupCache()
+    connection = MagicMock()
+    connection.get_asset_types.return_value = [
+        _named(1, "Boat"), _named(2, "Aircraft")]
+
+    first = cache.asset_type(connection, "Boat")
+    second = cache.asset_type(connection, "Aircraft")
+
+    connection.get_asset_types.assert_called_once_with()
+    connection.create_asset_type.assert_not_called()
+    assert (first.id, second.id) == (1, 2)
+
+
+def test_created_asset_type_is_remembered() -> None:
+    cache = SMMLookupCache()
+    connection = MagicMock()
+    connection.get_asset_types.return_value = []
+    connection.create_asset_type.return_value = _named(7, "Boat")
+
+    cache.asset_type(connection, "Boat")
+    asset_type = cache.asset_type(connection, "Boat")
+
+    connection.create_asset_type.assert_called_once_with("Boat", "Boat")
+    assert asset_type.id == 7
+
+
+def test_organizations_are_bound_to_the_caller() -> None:
+    cache = SMMLookupCache()
+    first_connection = MagicMock(username="imt-challenge")
+    first_connection.get_organizations.return_value = [_named(3, "Police")]
+    second_connection = MagicMock(username="imt-challenge")
+
+    cache.organization(first_connection, "Police")
+    organization = cache.organization(second_connection, "Police")
+
+    second_connection.get_organizations.assert_not_called()
+    assert organization.connection is second_connection
+    assert organization.id == 3
+
+
+def test_organizations_are_listed_per_user() -> None:
+    cache = SMMLookupCache()
+    admin = MagicMock(username="admin")
+    admin.get_organizations.return_value = []
+    admin.create_organization.return_value = _named(4, "Police")
+    runner = MagicMock(username="imt-challenge")
+    runner.get_organizations.return_value = [_named(5, "Police")]
+
+    cache.organization(admin, "Police")
+    organization = cache.organization(runner, "Police")
+
+    assert organization.id == 5
+
+
+def test_mission_asset_statuses_are_listed_once() -> None:
+    cache = SMMLookupCache()
+    connection = MagicMock()
+    enroute = _named(1, "Enroute")
+    connection.get_mission_asset_status_values.return_value = [enroute]
+
+    status = cache.mission_asset_status(connection, "Enroute", "Enroute")
+    cache.mission_asset_status(connection, "Enroute", "Enroute")
+
+    connection.get_mission_asset_status_values.assert_called_once_with()
+    assert status is enroute
+
+
+def test_invalidate_fetches_again() -> None:
+    cache = SMMLookupCache()
+    connection = MagicMock()
+    connection.get_asset_types.return_value = [_named(1, "Boat")]
+
+    cache.asset_type(connection, "Boat")
+    cache.invalidate()
+    cache.asset_type(connection, "Boat")
+
+    assert connection.get_asset_types.call_count == 2
+
+
+def test_creating_one_name_does_not_block_other_lookups() -> None:
+    cache = SMMLookupCache()
+    connection = MagicMock()
+    connection.get_asset_types.return_value = [_named(1, "Aircraft")]
+    creating = threading.Event()
+    release = threading.Event()
+
+    def create_asset_type(name: str, description: str) -> SimpleNamespace:
+        creating.set()
+        release.wait(timeout=5)
+        return _named(2, name)
+
+    connection.create_asset_type.side_effect = create_asset_type
+    creator = threading.Thread(
+        target=cache.asset_type, args=(connection, "Boat"))
+    creator.start()
+    assert creating.wait(timeout=5)
+
+    # Answered from the cache while "Boat" is still being created
+    found: list[int] = []
+    reader = threading.Thread(target=lambda: found.append(
+        cache.asset_type(connection, "Aircraft").id))
+    reader.start()
+    reader.join(timeout=1)
+    assert found == [1]
+
+    release.set()
+    creator.join(timeout=5)
+    assert cache.asset_type(connection, "Boat").id == 2
+    connection.create_asset_type.assert_called_once_with("Boat", "Boat")
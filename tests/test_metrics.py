@@ -0,0 +1,136 @@
+"""
+Unit tests for runtime metrics.
+"""
+
+import json
+import pathlib
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import metrics
+from scheduler import TickStats
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram(
+        'poll_seconds', 'Poll time', ('participant',), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, participant='alpha')
+    histogram.observe(0.5, participant='alpha')
+    histogram.observe(2.0, participant='alpha')
+
+    assert registry.render().splitlines() == [
+        '# HELP poll_seconds Poll time',
+        '# TYPE poll_seconds histogram',
+        'poll_seconds_bucket{participant="alpha",le="0.1"} 1',
+        'poll_seconds_bucket{participant="alpha",le="1"} 2',
+        'poll_seconds_bucket{participant="alpha",le="+Inf"} 3',
+        'poll_seconds_sum{participant="alpha"} 2.55',
+        'poll_seconds_count{participant="alpha"} 3',
+    ]
+
+
+def test_incomplete_metric_cannot_be_created() -> None:
+    class Gauge(metrics._Metric):
+        TYPE = 'gauge'
+
+        def reset(self) -> None:
+            pass
+
+    with pytest.raises(TypeError, match="samples"):
+        Gauge('queue_length', 'Queue length')  # type: ignore[abstract]
+
+
+def test_counter_escapes_label_values() -> None:
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('overruns_total', 'Overruns', ('participant',))
+
+    counter.inc(participant='say "hi"')
+
+    assert 'overruns_total{participant="say \\"hi\\""} 1' in (
+        registry.render().splitlines())
+
+
+def test_labels_must_match() -> None:
+    histogram = metrics.Histogram('seconds', 'Time', ('phase',))
+
+    with pytest.raises(ValueError, match="needs labels phase"):
+        histogram.observe(1.0, participant='alpha')
+
+
+def test_timer_records_failed_blocks(mocker: MagicMock) -> None:
+    mocker.patch('services.metrics.time.perf_counter', side_effect=[1.0, 3.5])
+    histogram = metrics.Histogram('seconds', 'Time')
+
+    with pytest.raises(RuntimeError):
+        with histogram.time():
+            raise RuntimeError("boom")
+
+    assert histogram.summary() == [{
+        'labels': {},
+        'count': 1,
+        'sum': 2.5,
+        'mean': 2.5,
+        'min': 2.5,
+        'max': 2.5,
+    }]
+
+
+def test_phases_are_labelled_with_the_current_participant() -> None:
+    metrics.REGISTRY.reset()
+
+    with metrics.phase('pull_images'):
+        pass
+    with metrics.participant('alpha-smm'):
+        with metrics.phase('smm_ready'):
+            pass
+
+    assert metrics.PHASE_SECONDS.count(
+        phase='pull_images', participant='') == 1
+    assert metrics.PHASE_SECONDS.count(
+        phase='smm_ready', participant='alpha-smm') == 1
+
+
+def test_tick_stats_are_counted() -> None:
+    metrics.REGISTRY.reset()
+    stats = TickStats()
+
+    stats.next_tick(1, 10, elapsed=3.5, period=1.0)
+    stats.overrun('alpha-smm', 1.0)
+
+    assert metrics.MISSED_TICKS.value() == 2
+    assert metrics.TICK_OVERRUNS.value(participant='alpha-smm') == 1
+
+
+def test_exports_are_written(tmp_path: pathlib.Path) -> None:
+    registry = metrics.MetricsRegistry()
+    registry.counter('launches_total', 'Launches').inc(3)
+
+    registry.write_prometheus(str(tmp_path / 'metrics.prom'))
+    registry.write_summary(str(tmp_path / 'metrics.json'))
+
+    assert 'launches_total 3' in (tmp_path / 'metrics.prom').read_text()
+    assert not (tmp_path / 'metrics.prom.tmp').exists()
+    assert json.loads((tmp_path / 'metrics.json').read_text()) == {
+        'launches_total': [{'labels': {}, 'value': 3.0}]}
+
+
+def test_server_serves_metrics() -> None:
+    registry = metrics.MetricsRegistry()
+    registry.counter('launches_total', 'Launches').inc()
+    server = metrics.MetricsServer(0, registry=registry)
+    server.start()
+    try:
+        url = f'http://127.0.0.1:{server.port}'
+        with urllib.request.urlopen(f'{url}/metrics', timeout=5) as resp:
+            body = resp.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'{url}/other', timeout=5)
+    finally:
+        server.stop()
+
+    assert 'launches_total 1' in body.splitlines()
@@ -2,12 +2,21 @@
 Unit tests for mission.py ParticipantAsset and MissionRunnerParticipant logic.
 """
 
-from unittest.mock import MagicMock
+import logging
+import threading
+from unittest.mock import MagicMock, call
 
 import pytest
 
 from configmodels import AssetConfig, BaseLocation
-from mission import MissionRunnerParticipant, ParticipantAsset
+from missionclock import REAL_TIME
+from mission import (
+    LaunchExecutor,
+    MissionRunner,
+    MissionRunnerParticipant,
+    ParticipantAsset,
+)
+from services.smmdb import StateReadError
 
 
 BASE_LOCATION = BaseLocation(latitude=-43.5, longitude=172.6)
@@ -50,26 +59,26 @@ class TestParticipantAssetShouldLaunch:
             mocker: MagicMock) -> None:
         asset = _make_participant_asset(_asset_config(response_time_mins=5))
         asset.added_time = 1000.0
-        mocker.patch("mission.time.time", return_value=1000.0 + 4 * 60)
+        mocker.patch("missionclock.time.time", return_value=1000.0 + 4 * 60)
         assert not asset.should_launch()
 
     def test_at_response_time_returns_true(self, mocker: MagicMock) -> None:
         asset = _make_participant_asset(_asset_config(response_time_mins=5))
         asset.added_time = 1000.0
-        mocker.patch("mission.time.time", return_value=1000.0 + 5 * 60)
+        mocker.patch("missionclock.time.time", return_value=1000.0 + 5 * 60)
         assert asset.should_launch()
 
     def test_after_response_time_returns_true(self, mocker: MagicMock) -> None:
         asset = _make_participant_asset(_asset_config(response_time_mins=2))
         asset.added_time = 0.0
-        mocker.patch("mission.time.time", return_value=200.0)
+        mocker.patch("missionclock.time.time", return_value=200.0)
         assert asset.should_launch()
 
     def test_already_launched_returns_false(self, mocker: MagicMock) -> None:
         asset = _make_participant_asset(_asset_config(response_time_mins=1))
         asset.added_time = 0.0
         asset.launch_time = 60.0
-        mocker.patch("mission.time.time", return_value=999.0)
+        mocker.patch("missionclock.time.time", return_value=999.0)
         assert not asset.should_launch()
 
 
@@ -78,6 +87,7 @@ def _make_mission_runner_participant(
 ) -> MissionRunnerParticipant:
     mock_runner = MagicMock()
     mock_runner.config.assets = asset_configs
+    mock_runner.clock = REAL_TIME
     mock_smm = MagicMock()
     participant = MissionRunnerParticipant(mock_runner, mock_smm)
     participant.mission_id = 42
@@ -235,3 +245,447 @@ class TestCheckAddedOrganizations:
 
         mock_pa.add_to_mission.assert_called_once()
         assert participant.mission_org_list == [existing_org_mo, new_org_mo]
+
+    def test_failed_add_is_retried_on_next_check(
+            self,
+            mocker: MagicMock) -> None:
+        config = _asset_config(org="TeamAlpha")
+        participant = _make_mission_runner_participant([config])
+
+        mock_pa = MagicMock(spec=ParticipantAsset)
+        mock_pa.added_time = None
+        mock_pa.config = config
+        mock_pa.launch_deadline.return_value = 60.0
+
+        def add_to_mission() -> None:
+            if mock_pa.add_to_mission.call_count == 1:
+                raise ConnectionError("SMM unavailable")
+            mock_pa.added_time = 0.0
+        mock_pa.add_to_mission.side_effect = add_to_mission
+        participant.assets = {config.name: mock_pa}
+        participant.mission_org_list = []
+
+        mocker.patch.object(
+            participant,
+            "_get_smm_imt_challenge",
+            return_value=MagicMock())
+        mock_mission = MagicMock()
+        mock_mission.get_organizations.return_value = [
+            _mock_mission_org("TeamAlpha")
+        ]
+        mocker.patch.object(
+            participant,
+            "_get_mission",
+            return_value=mock_mission)
+
+        with pytest.raises(ConnectionError):
+            participant.check_added_organizations()
+        assert participant.next_launch_deadline() is None
+
+        participant.check_added_organizations()
+
+        assert mock_pa.add_to_mission.call_count == 2
+        assert mock_pa.added_time == 0.0
+        assert participant.next_launch_deadline() == 60.0
+
+
+def test_vehicle_images_cover_every_asset_type() -> None:
+    runner = object.__new__(MissionRunner)
+    runner.config = MagicMock()
+    runner.config.assets = [
+        _asset_config(name="Boat 1"),
+        _asset_config(name="Boat 2"),
+        AssetConfig(
+            name="Plane",
+            type="Aircraft",
+            organization="TeamAlpha",
+            response_time_mins=5,
+            base_location=BASE_LOCATION,
+        ),
+    ]
+
+    assert runner.vehicle_images() == [
+        "canterburyairpatrol/smm-mavlink:latest",
+        "sparlane/ardupilot-sitl:Plane-latest",
+        "sparlane/ardupilot-sitl:Rover-latest",
+        "sparlane/mavproxy:latest",
+    ]
+
+
+class TestVehiclePreparation:
+    def test_prepare_creates_vehicle_without_starting(
+            self,
+            mocker: MagicMock) -> None:
+        vehicle_cls = mocker.patch("mission.Vehicle")
+        asset = _make_participant_asset(_asset_config())
+
+        asset.prepare()
+
+        vehicle_cls.assert_called_once()
+        vehicle_cls.return_value.start.assert_not_called()
+
+    def test_launch_is_submitted_to_launcher(self, mocker: MagicMock) -> None:
+        vehicle_cls = mocker.patch("mission.Vehicle")
+        mocker.patch("mission.SMMMission")
+        asset = _make_participant_asset(_asset_config(response_time_mins=1))
+        launcher = MagicMock()
+        asset.parent.parent.launcher = launcher
+        asset.prepare()
+        asset.added_time = 0.0
+        mocker.patch("missionclock.time.time", return_value=60.0)
+
+        asset.time_tick()
+
+        launcher.submit.assert_called_once_with(
+            "Alpha Boat",
+            asset.vehicle_manager.start)
+        vehicle_cls.return_value.start.assert_not_called()
+
+    def test_start_creates_unprepared_vehicle(self, mocker: MagicMock) -> None:
+        vehicle_cls = mocker.patch("mission.Vehicle")
+        asset = _make_participant_asset(_asset_config())
+
+        asset.vehicle_manager.start()
+
+        vehicle_cls.assert_called_once()
+        vehicle_cls.return_value.start.assert_called_once_with()
+
+    def test_failed_preparation_removes_created_vehicles(self) -> None:
+        participant = _make_mission_runner_participant([])
+        prepared = MagicMock()
+        failing = MagicMock()
+        failing.prepare.side_effect = RuntimeError("create failed")
+        participant.assets = {"one": prepared, "two": failing}
+
+        with pytest.raises(RuntimeError, match="create failed"):
+            participant.prepare_assets()
+
+        prepared.stop.assert_called_once_with()
+        failing.stop.assert_called_once_with()
+
+
+class TestLaunchExecutor:
+    def test_collect_forgets_finished_launches(self) -> None:
+        launcher = LaunchExecutor(max_workers=2)
+        launched = MagicMock()
+        launcher.submit("Alpha Boat", launched)
+        launcher.shutdown()
+
+        launcher.collect()
+
+        launched.assert_called_once_with()
+
+    def test_collect_reraises_failed_launch(self) -> None:
+        launcher = LaunchExecutor(max_workers=1)
+        launcher.submit("Alpha Boat", MagicMock(side_effect=RuntimeError("x")))
+        for future in list(launcher._pending):
+            future.exception()
+
+        with pytest.raises(RuntimeError, match="x"):
+            launcher.collect()
+        launcher.shutdown()
+
+    def test_collect_logs_every_failed_launch(
+            self, caplog: pytest.LogCaptureFixture) -> None:
+        launcher = LaunchExecutor(max_workers=1)
+        launcher.submit("Alpha Boat", MagicMock(side_effect=RuntimeError("a")))
+        launcher.submit("Bravo Boat", MagicMock(side_effect=RuntimeError("b")))
+        for future in list(launcher._pending):
+            future.exception()
+
+        with pytest.raises(RuntimeError, match="a"):
+            launcher.collect()
+        launcher.shutdown()
+
+        failures = [r for r in caplog.records if r.levelno == logging.ERROR]
+        assert [r.getMessage() for r in failures] == [
+            "Failed to launch Alpha Boat",
+            "Failed to launch Bravo Boat",
+        ]
+        assert all(r.exc_info for r in failures)
+        assert not launcher._pending
+
+    def test_runner_stop_waits_for_launches_before_teardown(self) -> None:
+        runner = object.__new__(MissionRunner)
+        calls = MagicMock()
+        runner.launcher = calls.launcher
+        runner.participants = [calls.participant]
+
+        runner.stop()
+
+        assert calls.mock_calls == [
+            call.launcher.shutdown(),
+            call.participant.stop(),
+        ]
+
+
+class TestParallelProvisioning:
+    def _runner(self) -> MissionRunner:
+        runner = object.__new__(MissionRunner)
+        runner.config = MagicMock()
+        runner.participants = []
+        runner._participants_lock = threading.Lock()
+        return runner
+
+    def test_add_participants_registers_concurrently(
+            self,
+            mocker: MagicMock) -> None:
+        barrier = threading.Barrier(3, timeout=5)
+        mocker.patch.object(
+            MissionRunnerParticipant,
+            "add_imt_login",
+            lambda _self: barrier.wait())
+        mocker.patch.object(
+            MissionRunnerParticipant,
+            "setup_mission_asset_statuses")
+        mocker.patch.object(MissionRunnerParticipant, "add_assets")
+        runner = self._runner()
+        smms = [MagicMock(), MagicMock(), MagicMock()]
+
+        runner.add_participants(smms)
+
+        assert sorted(id(p.smm) for p in runner.participants) == sorted(
+            id(smm) for smm in smms)
+
+    def test_create_mission_runs_for_every_participant(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+        participants = [MagicMock(), MagicMock()]
+        for participant in participants:
+            participant.create_mission.side_effect = barrier.wait
+        runner = self._runner()
+        runner.participants = list(participants)
+
+        runner.create_mission()
+
+        for participant in participants:
+            participant.create_mission.assert_called_once_with()
+
+
+def test_mission_handle_is_reused_for_same_connection() -> None:
+    participant = _make_mission_runner_participant([])
+    connection = MagicMock()
+
+    first = participant._get_mission(connection)
+
+    assert participant._get_mission(connection) is first
+    assert participant._get_mission(MagicMock()) is not first
+
+
+def test_add_assets_keeps_config_order(mocker: MagicMock) -> None:
+    configs = [_asset_config(name=f"Boat {i}") for i in range(5)]
+    participant = _make_mission_runner_participant(configs)
+    mocker.patch.object(participant, "prepare_assets")
+
+    def setup(
+            asset: AssetConfig,
+            _admin: MagicMock,
+            _runner: MagicMock) -> ParticipantAsset:
+        return _make_participant_asset(asset)
+
+    mocker.patch.object(participant, "_setup_asset", side_effect=setup)
+
+    participant.add_assets()
+
+    assert list(participant.assets) == [config.name for config in configs]
+
+
+class TestLaunchDeadlines:
+    def _triggered(self, mocker: MagicMock) -> tuple[
+            MissionRunnerParticipant, MagicMock, MagicMock]:
+        alpha = _asset_config(name="Alpha Boat", org="TeamAlpha")
+        beta = _asset_config(name="Beta Boat", org="TeamBeta")
+        participant = _make_mission_runner_participant([alpha, beta])
+        alpha_pa = MagicMock(spec=ParticipantAsset)
+        alpha_pa.added_time = None
+        alpha_pa.launch_deadline.return_value = 1300.0
+        alpha_pa.should_launch.return_value = True
+        beta_pa = MagicMock(spec=ParticipantAsset)
+        beta_pa.added_time = None
+        participant.assets = {alpha.name: alpha_pa, beta.name: beta_pa}
+        mocker.patch.object(participant, "_get_smm_imt_challenge")
+        mission = MagicMock()
+        mission.get_organizations.return_value = [
+            _mock_mission_org("TeamAlpha")]
+        mocker.patch.object(
+            participant,
+            "_get_mission",
+            return_value=mission)
+        participant.check_added_organizations()
+        return participant, alpha_pa, beta_pa
+
+    def test_added_asset_is_scheduled_at_its_deadline(
+            self,
+            mocker: MagicMock) -> None:
+        participant, _, beta_pa = self._triggered(mocker)
+
+        assert participant.next_launch_deadline() == 1300.0
+        beta_pa.launch_deadline.assert_not_called()
+
+    def test_nothing_is_due_before_the_deadline(
+            self,
+            mocker: MagicMock) -> None:
+        participant, alpha_pa, _ = self._triggered(mocker)
+        mocker.patch("missionclock.time.time", return_value=1299.0)
+
+        participant.time_tick()
+
+        alpha_pa.time_tick.assert_not_called()
+        alpha_pa.should_launch.assert_not_called()
+
+    def test_due_asset_is_launched_once(self, mocker: MagicMock) -> None:
+        participant, alpha_pa, _ = self._triggered(mocker)
+        mocker.patch("missionclock.time.time", return_value=1300.0)
+
+        participant.time_tick()
+        participant.time_tick()
+
+        alpha_pa.time_tick.assert_called_once_with()
+        assert participant.next_launch_deadline() is None
+
+    def test_runner_reports_earliest_deadline(self) -> None:
+        runner = object.__new__(MissionRunner)
+        first = MagicMock()
+        first.next_launch_deadline.return_value = 50.0
+        idle = MagicMock()
+        idle.next_launch_deadline.return_value = None
+        second = MagicMock()
+        second.next_launch_deadline.return_value = 20.0
+        runner.participants = [first, idle, second]
+
+        assert runner.next_launch_deadline() == 20.0
+
+
+class TestOrganizationFeed:
+    def _participant(self, mocker: MagicMock) -> tuple[
+            MissionRunnerParticipant, MagicMock, MagicMock]:
+        config = _asset_config(org="TeamAlpha")
+        participant = _make_mission_runner_participant([config])
+        asset = MagicMock(spec=ParticipantAsset)
+        asset.added_time = None
+        asset.launch_deadline.return_value = None
+        participant.assets = {config.name: asset}
+        mocker.patch.object(participant, "_get_smm_imt_challenge")
+        mission = MagicMock()
+        mission.get_organizations.return_value = []
+        mocker.patch.object(
+            participant,
+            "_get_mission",
+            return_value=mission)
+        return participant, asset, mission
+
+    def test_live_feed_replaces_polling(self, mocker: MagicMock) -> None:
+        participant, _, mission = self._participant(mocker)
+        participant.feed = MagicMock(live=True, generation=1)
+
+        participant.check_added_organizations()
+        participant.check_added_organizations()
+
+        # Only the catch-up poll after the feed connected
+        mission.get_organizations.assert_called_once_with()
+
+    def test_reconnected_feed_polls_to_catch_up(
+            self,
+            mocker: MagicMock) -> None:
+        participant, _, mission = self._participant(mocker)
+        participant.feed = MagicMock(live=True, generation=1)
+        participant.check_added_organizations()
+
+        participant.feed.generation = 2
+        participant.check_added_organizations()
+
+        assert mission.get_organizations.call_count == 2
+
+    def test_failed_catch_up_is_retried(self, mocker: MagicMock) -> None:
+        participant, _, mission = self._participant(mocker)
+        participant.feed = MagicMock(live=True, generation=1)
+        mission.get_organizations.side_effect = [
+            ConnectionError("SMM unavailable"), []]
+
+        with pytest.raises(ConnectionError):
+            participant.check_added_organizations()
+        participant.check_added_organizations()
+        participant.check_added_organizations()
+
+        assert mission.get_organizations.call_count == 2
+
+    def test_down_feed_falls_back_to_polling(
+            self,
+            mocker: MagicMock) -> None:
+        participant, _, mission = self._participant(mocker)
+        participant.feed = MagicMock(live=False, generation=1)
+
+        participant.check_added_organizations()
+        participant.check_added_organizations()
+
+        assert mission.get_organizations.call_count == 2
+
+    def test_feed_notification_adds_assets_once(
+            self,
+            mocker: MagicMock) -> None:
+        participant, asset, _ = self._participant(mocker)
+
+        participant._on_org_added(41, "TeamAlpha")
+        participant._on_org_added(42, "TeamAlpha")
+        participant._on_org_added(42, "TeamAlpha")
+
+        asset.add_to_mission.assert_called_once_with()
+
+
+class TestDatabaseReads:
+    def _participant(self, mocker: MagicMock, reader: MagicMock) -> tuple[
+            MissionRunnerParticipant, MagicMock, MagicMock]:
+        config = _asset_config(org="TeamAlpha")
+        participant = _make_mission_runner_participant([config])
+        asset = MagicMock(spec=ParticipantAsset)
+        asset.added_time = None
+        asset.launch_deadline.return_value = None
+        participant.assets = {config.name: asset}
+        participant.mission_org_list = [_mock_mission_org("IMT")]
+        participant.state_reader = reader
+        http = mocker.patch.object(participant, "_get_mission")
+        return participant, asset, http
+
+    def test_new_organisation_is_read_from_database(
+            self,
+            mocker: MagicMock) -> None:
+        reader = MagicMock()
+        participant, asset, http = self._participant(mocker, reader)
+        reader.mission_organizations.return_value = [
+            (1, "IMT"), (2, "TeamAlpha")]
+
+        participant.check_added_organizations()
+        participant.check_added_organizations()
+
+        reader.mission_organizations.assert_called_with(42)
+        asset.add_to_mission.assert_called_once_with()
+        http.assert_not_called()
+
+    def test_asset_already_in_mission_is_not_added_again(
+            self,
+            mocker: MagicMock) -> None:
+        reader = MagicMock()
+        participant, asset, _ = self._participant(mocker, reader)
+        asset.config = participant.parent.config.assets[0]
+        reader.mission_organizations.return_value = [
+            (1, "IMT"), (2, "TeamAlpha")]
+        reader.asset_statuses.return_value = [
+            (asset.config.name, "Awaiting Crew")]
+
+        participant.check_added_organizations()
+
+        reader.asset_statuses.assert_called_once_with(42)
+        asset.add_to_mission.assert_not_called()
+        assert asset.added_time is not None
+
+    def test_failed_read_falls_back_to_http(
+            self,
+            mocker: MagicMock) -> None:
+        reader = MagicMock()
+        participant, _, http = self._participant(mocker, reader)
+        reader.mission_organizations.side_effect = StateReadError("down")
+        mocker.patch.object(participant, "_get_smm_imt_challenge")
+        http.return_value.get_organizations.return_value = []
+
+        participant.check_added_organizations()
+
+        http.return_value.get_organizations.assert_called_once_with()
@@ -0,0 +1,58 @@
+"""
+Unit tests for the mission clock.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from missionclock import MissionClock, SteppingClock
+from scheduler import TickScheduler
+
+
+def test_mission_time_runs_at_the_speedup(mocker: MagicMock) -> None:
+    wall = mocker.patch("missionclock.time.time", return_value=1000.0)
+    clock = MissionClock(speedup=10)
+
+    wall.return_value = 1003.0
+
+    assert clock.now() == pytest.approx(1030.0)
+    assert clock.wall_seconds_until(1050.0) == pytest.approx(2.0)
+    assert clock.to_wall(600) == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize("speedup", [0, -2])
+def test_speedup_must_be_positive(speedup: float) -> None:
+    with pytest.raises(ValueError, match="must be positive"):
+        MissionClock(speedup)
+
+
+def test_stepping_clock_sleeps_in_real_time() -> None:
+    clock = SteppingClock(start=500.0, speedup=4)
+
+    clock.sleep(2.5)
+
+    assert clock.monotonic() == pytest.approx(2.5)
+    assert clock.now() == pytest.approx(510.0)
+
+
+def test_scheduler_launches_on_mission_time() -> None:
+    clock = SteppingClock(start=1000.0, speedup=10)
+    asset = MagicMock()
+    participant = MagicMock()
+    participant.smm.name = "alpha"
+    participant.due_assets.side_effect = [[asset], []]
+    runner = MagicMock()
+    runner.clock = clock
+    runner.participants = [participant]
+    # Due 5 mission seconds in, which is half a real second
+    runner.next_launch_deadline.side_effect = [1005.0, None, None]
+
+    TickScheduler(
+        runner,
+        budget=5,
+        clock=clock.monotonic,
+        sleep=clock.sleep).run(clock.to_wall(10))
+
+    asset.time_tick.assert_called_once_with()
+    assert clock.now() == pytest.approx(1010.0)
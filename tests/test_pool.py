@@ -0,0 +1,155 @@
+"""
+Unit tests for the pre-started SMM pool.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.pool import (
+    POOL_CREATED_LABEL,
+    POOL_LABEL,
+    PoolExhaustedError,
+    SMMPool,
+)
+
+
+def _container(name: str, member: str, status: str = "running",
+               created: float | None = None) -> MagicMock:
+    container = MagicMock()
+    container.name = name
+    container.status = status
+    container.labels = {
+        POOL_LABEL: member,
+        POOL_CREATED_LABEL: str(int(created or time.time())),
+    }
+    return container
+
+
+def _member(name: str, running: bool = True) -> MagicMock:
+    smm = MagicMock()
+    smm.name = name
+    smm.port = 32768
+    smm.labels = {POOL_CREATED_LABEL: str(int(time.time()))}
+    smm.is_running.return_value = running
+    return smm
+
+
+def _pool(docker_client: MagicMock | None = None) -> SMMPool:
+    return SMMPool(2, docker_client or MagicMock())
+
+
+def test_pool_size_must_be_positive() -> None:
+    with pytest.raises(ValueError, match="must be positive"):
+        SMMPool(0, MagicMock())
+
+
+def test_claim_renames_ready_member() -> None:
+    pool = _pool()
+    member = _member("imt-pool-abc-smm")
+    pool._ready.append(member)
+
+    assert pool.claim("team-alpha-smm", timeout=0) is member
+
+    member.rename.assert_called_once_with("team-alpha-smm")
+    assert not pool._ready
+
+
+def test_claim_discards_stopped_members() -> None:
+    pool = _pool()
+    dead = _member("imt-pool-dead-smm", running=False)
+    alive = _member("imt-pool-live-smm")
+    pool._ready.extend([dead, alive])
+
+    assert pool.claim("team-alpha-smm", timeout=0) is alive
+
+    dead.cleanup.assert_called_once_with()
+
+
+def test_claim_times_out_when_pool_empty() -> None:
+    pool = _pool()
+
+    with pytest.raises(PoolExhaustedError):
+        pool.claim("team-alpha-smm", timeout=0.01)
+
+
+def test_collect_garbage_removes_exited_unclaimed_stacks() -> None:
+    docker_client = MagicMock()
+    exited = _container("imt-pool-old-smm", "imt-pool-old-smm", "exited")
+    claimed = _container("team-alpha-smm", "imt-pool-new-smm", "exited")
+    running = _container("imt-pool-run-smm", "imt-pool-run-smm")
+    docker_client.containers.list.side_effect = [
+        [exited, claimed, running],
+        [exited],
+    ]
+    docker_client.networks.list.return_value = []
+    pool = _pool(docker_client)
+
+    assert pool.collect_garbage() == 1
+
+    exited.remove.assert_called_once_with(force=True)
+    claimed.remove.assert_not_called()
+    running.remove.assert_not_called()
+
+
+def test_remove_stack_removes_labelled_volumes() -> None:
+    docker_client = MagicMock()
+    volume = MagicMock()
+    docker_client.containers.list.return_value = []
+    docker_client.networks.list.return_value = []
+    docker_client.volumes.list.return_value = [volume]
+    pool = _pool(docker_client)
+
+    pool._remove_stack("imt-pool-old-smm")
+
+    docker_client.volumes.list.assert_called_once_with(
+        filters={"label": f"{POOL_LABEL}=imt-pool-old-smm"})
+    volume.remove.assert_called_once_with(force=True)
+
+
+def test_remove_stack_releases_shared_database() -> None:
+    docker_client = MagicMock()
+    network = MagicMock()
+    network.name = "imt-pool-old-smm-net"
+    docker_client.containers.list.return_value = []
+    docker_client.networks.list.return_value = [network]
+    docker_client.volumes.list.return_value = []
+    shared_db = MagicMock()
+    pool = SMMPool(2, docker_client, shared_db=shared_db)
+
+    pool._remove_stack("imt-pool-old-smm")
+
+    shared_db.release_name.assert_called_once_with(
+        "imt-pool-old-smm", network)
+    network.remove.assert_called_once_with()
+
+
+def test_collect_garbage_removes_expired_ready_members() -> None:
+    pool = _pool()
+    pool.docker_client.containers.list.return_value = []
+    expired = _member("imt-pool-old-smm")
+    expired.labels = {POOL_CREATED_LABEL: "0"}
+    pool._ready.append(expired)
+
+    assert pool.collect_garbage() == 1
+
+    expired.cleanup.assert_called_once_with()
+    assert not pool._ready
+
+
+def test_adopt_takes_running_unclaimed_stacks(mocker: MagicMock) -> None:
+    docker_client = MagicMock()
+    unclaimed = _container("imt-pool-abc-smm", "imt-pool-abc-smm")
+    claimed = _container("team-alpha-smm", "imt-pool-def-smm")
+    docker_client.containers.list.return_value = [unclaimed, claimed]
+    adopted = _member("imt-pool-abc-smm")
+    from_container = mocker.patch(
+        "services.pool.SMMServer.from_container",
+        return_value=adopted)
+    pool = _pool(docker_client)
+
+    assert pool.adopt() == 1
+
+    from_container.assert_called_once_with(unclaimed, docker_client, None)
+    assert list(pool._ready) == [adopted]
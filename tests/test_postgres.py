@@ -0,0 +1,234 @@
+"""
+Unit tests for postgres servers.
+"""
+
+from unittest.mock import MagicMock
+
+import docker.errors
+import pytest
+
+from services.postgres import (
+    DatabaseAllocation,
+    PostgresServer,
+    SharedPostgresServer,
+)
+
+
+def _shared() -> tuple[SharedPostgresServer, MagicMock]:
+    docker_client = MagicMock()
+    docker_client.containers.get.side_effect = docker.errors.NotFound("new")
+    instance = docker_client.containers.create.return_value
+    instance.exec_run.return_value = MagicMock(exit_code=0)
+    return SharedPostgresServer(docker_client), instance
+
+
+def test_run_sql_raises_on_failure() -> None:
+    docker_client = MagicMock()
+    server = PostgresServer("db", MagicMock(), "smm", docker_client)
+    instance = docker_client.containers.create.return_value
+    instance.exec_run.return_value = MagicMock(
+        exit_code=1, output=b"syntax error")
+
+    with pytest.raises(RuntimeError, match="syntax error"):
+        server.run_sql("SELEC 1")
+
+
+def test_allocation_describes_own_database() -> None:
+    server = PostgresServer("db", MagicMock(), "smm", MagicMock())
+
+    assert server.allocation() == DatabaseAllocation(
+        host="db", name="smm", user="postgres",
+        password=server.get_password())
+
+
+def test_shared_allocate_creates_database_and_joins_network() -> None:
+    shared, instance = _shared()
+    network = MagicMock()
+
+    allocation = shared.allocate("Team-Alpha-smm", network)
+
+    assert allocation.host == SharedPostgresServer.NAME
+    assert allocation.name.startswith("smm_team_alpha_smm_")
+    assert allocation.user == allocation.name
+    network.connect.assert_called_once_with(instance)
+    command = instance.exec_run.call_args.args[0]
+    assert any(
+        f"CREATE DATABASE {allocation.name} " in part for part in command)
+
+
+def test_shared_allocate_drops_leftover_database_first() -> None:
+    shared, instance = _shared()
+
+    allocation = shared.allocate("team-alpha-smm", MagicMock())
+
+    command = instance.exec_run.call_args.args[0]
+    statements = [
+        part for previous, part in zip(command, command[1:])
+        if previous == "-c"]
+    assert statements[:3] == [
+        f"DROP DATABASE IF EXISTS {allocation.name} WITH (FORCE)",
+        "DROP ROLE IF EXISTS "
+        f"{PostgresServer.reader_name(allocation.name)}",
+        f"DROP ROLE IF EXISTS {allocation.user}",
+    ]
+    assert statements[3].startswith(f"CREATE ROLE {allocation.user} ")
+
+
+def test_shared_release_name_drops_allocated_database() -> None:
+    shared, instance = _shared()
+    allocation = shared.allocate("team-alpha-smm", MagicMock())
+    network = MagicMock()
+
+    shared.release_name("team-alpha-smm", network)
+
+    network.disconnect.assert_called_once_with(instance, force=True)
+    command = instance.exec_run.call_args.args[0]
+    assert f"DROP ROLE IF EXISTS {allocation.user}" in command
+
+
+def test_shared_identifiers_are_distinct_and_fit() -> None:
+    names = ["team-a", "team_a", "Team A", "x" * 80, "x" * 81]
+
+    identifiers = [SharedPostgresServer._identifier(name) for name in names]
+
+    assert len(set(identifiers)) == len(names)
+    assert all(len(identifier) <= 63 for identifier in identifiers)
+
+
+def test_shared_server_reuses_leftover_container() -> None:
+    docker_client = MagicMock()
+    leftover = docker_client.containers.get.return_value
+    leftover.name = SharedPostgresServer.NAME
+    leftover.attrs = {"Config": {"Env": ["POSTGRES_PASSWORD=pw"]}}
+
+    shared = SharedPostgresServer(docker_client)
+
+    docker_client.containers.create.assert_not_called()
+    assert shared.server is not None
+    assert shared.server.instance is leftover
+    assert shared.server.get_password() == "pw"
+
+
+def test_shared_release_drops_database_and_leaves_network() -> None:
+    shared, instance = _shared()
+    network = MagicMock()
+    allocation = shared.allocate("team-alpha-smm", network)
+
+    shared.release(allocation, network)
+
+    network.disconnect.assert_called_once_with(instance, force=True)
+    command = instance.exec_run.call_args.args[0]
+    assert any("DROP DATABASE" in part for part in command)
+
+
+def test_create_reader_grants_select_only() -> None:
+    docker_client = MagicMock()
+    server = PostgresServer("db", MagicMock(), "smm", docker_client)
+    instance = docker_client.containers.create.return_value
+    instance.exec_run.return_value = MagicMock(exit_code=0)
+
+    role, password = server.create_reader("smm", ["mission_a", "org_b"])
+
+    assert role == PostgresServer.reader_name("smm")
+    command = instance.exec_run.call_args.args[0]
+    assert command[command.index("-d") + 1] == "smm"
+    statements = [
+        part for previous, part in zip(command, command[1:])
+        if previous == "-c"]
+    assert f"ALTER ROLE {role} LOGIN PASSWORD '{password}'" in statements
+    assert f"GRANT SELECT ON mission_a, org_b TO {role}" in statements
+    assert not any(
+        "SUPERUSER" in statement or "GRANT ALL" in statement
+        for statement in statements)
+
+
+def test_shared_release_drops_reader_role() -> None:
+    shared, instance = _shared()
+    allocation = shared.allocate("team-alpha-smm", MagicMock())
+
+    shared.release(allocation, MagicMock())
+
+    command = instance.exec_run.call_args.args[0]
+    reader = PostgresServer.reader_name(allocation.name)
+    assert f"DROP ROLE IF EXISTS {reader}" in command
+
+
+def test_shared_release_after_cleanup_is_noop() -> None:
+    shared, _ = _shared()
+    allocation = shared.allocate("team-alpha-smm", MagicMock())
+    shared.cleanup()
+
+    shared.release(allocation, MagicMock())
+
+    assert shared.server is None
+
+
+def test_host_port_reads_loopback_binding() -> None:
+    docker_client = MagicMock()
+    server = PostgresServer("db", MagicMock(), "smm", docker_client)
+    instance = docker_client.containers.create.return_value
+    instance.attrs = {"NetworkSettings": {"Ports": {
+        "5432/tcp": [{"HostIp": "127.0.0.1", "HostPort": "49153"}]}}}
+
+    assert server.host_port() == 49153
+    assert docker_client.containers.create.call_args.kwargs["ports"] == {
+        "5432/tcp": ("127.0.0.1", None)}
+
+
+def test_host_port_raises_when_not_published() -> None:
+    docker_client = MagicMock()
+    server = PostgresServer("db", MagicMock(), "smm", docker_client)
+    docker_client.containers.create.return_value.attrs = {}
+
+    with pytest.raises(RuntimeError, match="does not publish"):
+        server.host_port()
+
+
+def test_from_container_owns_its_cloned_volume() -> None:
+    instance = MagicMock()
+    instance.name = "team-alpha-smm-db-server"
+    instance.attrs = {
+        "Config": {"Env": ["POSTGRES_PASSWORD=pw", "POSTGRES_DB=smm"]},
+        "Mounts": [{
+            "Type": "volume",
+            "Name": "team-alpha-smm-db-server-data",
+            "Destination": PostgresServer.DATA_DIR,
+        }],
+    }
+
+    server = PostgresServer.from_container(instance)
+    server.cleanup()
+
+    instance.client.volumes.get.assert_called_once_with(
+        "team-alpha-smm-db-server-data")
+    instance.client.volumes.get.return_value.remove.assert_called_once_with(
+        force=True)
+
+
+def test_from_container_leaves_other_volumes() -> None:
+    instance = MagicMock()
+    instance.name = "template-build-db-server"
+    instance.attrs = {"Mounts": [{
+        "Type": "volume",
+        "Name": "imt-smm-template-abc-build",
+        "Destination": PostgresServer.DATA_DIR,
+    }]}
+
+    server = PostgresServer.from_container(instance)
+    server.cleanup()
+
+    instance.client.volumes.get.assert_not_called()
+
+
+def test_readiness_probe_skips_the_init_server() -> None:
+    docker_client = MagicMock()
+    server = PostgresServer("db", MagicMock(), "smm", docker_client)
+    instance = docker_client.containers.create.return_value
+    instance.exec_run.return_value = MagicMock(exit_code=0)
+
+    assert server._is_ready()
+
+    command = instance.exec_run.call_args.args[0]
+    assert command[:3] == ["pg_isready", "-h", "127.0.0.1"]
+    check = docker_client.containers.create.call_args.kwargs["healthcheck"]
+    assert check["test"] == ["CMD", *command]
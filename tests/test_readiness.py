@@ -0,0 +1,92 @@
+"""
+Unit tests for event-driven container readiness.
+"""
+
+from unittest.mock import MagicMock
+
+import docker.errors
+import pytest
+
+from services.readiness import (
+    ContainerExitedError,
+    ReadinessMonitor,
+    healthcheck,
+)
+
+
+def _monitor() -> ReadinessMonitor:
+    def no_events() -> docker.DockerClient:
+        raise docker.errors.DockerException("no daemon")
+    return ReadinessMonitor(no_events)
+
+
+def _container() -> MagicMock:
+    container = MagicMock()
+    container.id = "abc123"
+    return container
+
+
+def test_healthcheck_uses_nanoseconds() -> None:
+    check = healthcheck(["CMD", "true"], interval=0.5, timeout=2)
+
+    assert check["interval"] == 500_000_000
+    assert check["timeout"] == 2_000_000_000
+
+
+def test_healthcheck_runs_rarely_once_started() -> None:
+    check = healthcheck(["CMD", "true"])
+
+    assert check["interval"] >= 30_000_000_000
+    assert check["start_period"] > 0
+
+
+def test_wait_ready_returns_when_probe_succeeds() -> None:
+    monitor = _monitor()
+
+    monitor.wait_ready(_container(), lambda: True, 1, "container")
+
+
+def test_health_event_marks_container_ready() -> None:
+    monitor = _monitor()
+    container = _container()
+    probes = []
+
+    def probe() -> bool:
+        probes.append(True)
+        monitor._dispatch({
+            "id": container.id,
+            "Action": "health_status: healthy",
+        })
+        return False
+
+    monitor.wait_ready(container, probe, 5, "container")
+
+    assert len(probes) == 1
+
+
+def test_unhealthy_event_does_not_mark_ready() -> None:
+    monitor = _monitor()
+    container = _container()
+
+    def probe() -> bool:
+        monitor._dispatch({
+            "id": container.id,
+            "Action": "health_status: unhealthy",
+        })
+        return False
+
+    with pytest.raises(TimeoutError):
+        monitor.wait_ready(container, probe, 0.05, "container")
+
+
+def test_die_event_raises_container_exited() -> None:
+    monitor = _monitor()
+    container = _container()
+
+    def probe() -> bool:
+        monitor._dispatch({"Actor": {"ID": container.id}, "Action": "die"})
+        return False
+
+    with pytest.raises(ContainerExitedError, match="my service"):
+        monitor.wait_ready(container, probe, 5, "my service")
+    assert not monitor._waiters
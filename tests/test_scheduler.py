@@ -0,0 +1,212 @@
+"""
+Unit tests for the mission tick scheduler.
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from missionclock import REAL_TIME
+from scheduler import AsyncTickScheduler, TickScheduler
+
+
+class FakeClock:
+    """
+    Monotonic time that only moves when slept or advanced.
+    """
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _runner(*participants: MagicMock) -> MagicMock:
+    runner = MagicMock()
+    runner.participants = list(participants)
+    runner.next_launch_deadline.return_value = None
+    runner.clock = REAL_TIME
+    return runner
+
+
+def _participant(name: str) -> MagicMock:
+    participant = MagicMock()
+    participant.smm.name = name
+    return participant
+
+
+def test_ticks_stay_on_the_grid() -> None:
+    clock = FakeClock()
+    runner = _runner()
+    # Each tick takes 0.3s, which must not push later ticks back
+    runner.launcher.collect.side_effect = lambda: clock.advance(0.3)
+    scheduler = TickScheduler(
+        runner,
+        clock=clock.monotonic,
+        sleep=clock.sleep)
+
+    stats = scheduler.run(3)
+
+    assert clock.sleeps == [1.0, 0.7, 0.7]
+    assert stats.ticks == 3
+    assert stats.missed_ticks == 0
+
+
+def test_overlong_tick_skips_missed_slots() -> None:
+    clock = FakeClock()
+    runner = _runner()
+    durations = iter([2.5, 0.0, 0.0])
+    runner.launcher.collect.side_effect = lambda: clock.advance(
+        next(durations))
+    scheduler = TickScheduler(
+        runner,
+        clock=clock.monotonic,
+        sleep=clock.sleep)
+
+    stats = scheduler.run(5)
+
+    assert stats.ticks == 3
+    assert stats.missed_ticks == 2
+    assert clock.now == pytest.approx(5.0)
+
+
+def test_every_participant_ticks_concurrently() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    alpha = _participant("alpha")
+    bravo = _participant("bravo")
+    alpha.tick.side_effect = barrier.wait
+    bravo.tick.side_effect = barrier.wait
+
+    TickScheduler(_runner(alpha, bravo), period=0.01, budget=5).run(0.01)
+
+    alpha.tick.assert_called_once_with()
+    bravo.tick.assert_called_once_with()
+
+
+def test_slow_participant_is_reported_and_not_restarted() -> None:
+    release = threading.Event()
+    slow = _participant("slow")
+    slow.tick.side_effect = lambda: release.wait(5)
+    fast = _participant("fast")
+
+    try:
+        stats = TickScheduler(
+            _runner(slow, fast),
+            period=0.05,
+            budget=0.01).run(0.2)
+    finally:
+        release.set()
+
+    assert stats.overruns == {"slow": 1}
+    slow.tick.assert_called_once_with()
+    assert fast.tick.call_count + stats.missed_ticks == 4
+
+
+def test_participant_failure_is_raised() -> None:
+    broken = _participant("broken")
+    broken.tick.side_effect = RuntimeError("smm unreachable")
+
+    with pytest.raises(RuntimeError, match="smm unreachable"):
+        TickScheduler(_runner(broken), period=0.01).run(0.05)
+
+
+def test_async_engine_ticks_participants_concurrently() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    alpha = _participant("alpha")
+    bravo = _participant("bravo")
+    alpha.check_added_organizations.side_effect = barrier.wait
+    bravo.check_added_organizations.side_effect = barrier.wait
+    alpha.due_assets.return_value = []
+    bravo.due_assets.return_value = []
+
+    AsyncTickScheduler(
+        _runner(alpha, bravo),
+        period=0.01,
+        budget=5).run(0.01)
+
+    alpha.check_added_organizations.assert_called_once_with()
+    bravo.check_added_organizations.assert_called_once_with()
+
+
+def test_async_engine_only_ticks_assets_due_to_launch() -> None:
+    due = MagicMock()
+    participant = _participant("alpha")
+    participant.due_assets.return_value = [due]
+
+    AsyncTickScheduler(_runner(participant), period=0.01, budget=5).run(0.01)
+
+    due.time_tick.assert_called_once_with()
+
+
+def test_async_engine_reports_slow_participant() -> None:
+    release = threading.Event()
+    slow = _participant("slow")
+    slow.check_added_organizations.side_effect = lambda: release.wait(5)
+    slow.due_assets.return_value = []
+
+    try:
+        stats = AsyncTickScheduler(
+            _runner(slow),
+            period=0.05,
+            budget=0.01).run(0.2)
+    finally:
+        release.set()
+
+    assert stats.overruns == {"slow": 1}
+    slow.check_added_organizations.assert_called_once_with()
+
+
+def test_due_launch_runs_before_the_next_poll(mocker: MagicMock) -> None:
+    clock = FakeClock()
+    mocker.patch("missionclock.time.time", return_value=1000.0)
+    asset = MagicMock()
+    participant = _participant("alpha")
+    participant.due_assets.side_effect = [[asset], []]
+    runner = _runner(participant)
+    # Due 0.4s into the mission, ahead of the first poll at 1s
+    runner.next_launch_deadline.side_effect = [1000.4, None, None]
+    scheduler = TickScheduler(
+        runner,
+        budget=5,
+        clock=clock.monotonic,
+        sleep=clock.sleep)
+
+    scheduler.run(1)
+
+    assert clock.sleeps == [0.4, 0.6]
+    asset.time_tick.assert_called_once_with()
+
+
+@pytest.mark.parametrize("engine", [TickScheduler, AsyncTickScheduler])
+def test_launch_in_flight_does_not_skip_the_poll(
+        mocker: MagicMock,
+        engine: type[TickScheduler] | type[AsyncTickScheduler]) -> None:
+    mocker.patch("missionclock.time.time", return_value=1000.0)
+    release = threading.Event()
+    asset = MagicMock()
+    asset.time_tick.side_effect = lambda: release.wait(5)
+    participant = _participant("alpha")
+    participant.due_assets.side_effect = [[asset], [], []]
+    runner = _runner(participant)
+    runner.next_launch_deadline.side_effect = [999.0, None, None]
+
+    try:
+        stats = engine(runner, period=0.05, budget=5).run(0.05)
+    finally:
+        release.set()
+
+    assert stats.overruns == {}
+    assert stats.missed_ticks == 0
+    if engine is TickScheduler:
+        participant.tick.assert_called_once_with()
+    else:
+        participant.check_added_organizations.assert_called_once_with()
@@ -8,6 +8,7 @@ from typing import cast
 import docker.errors
 import pytest
 
+from services.postgres import DatabaseAllocation
 from services.smm import SMMServer
 
 
@@ -103,3 +104,78 @@ def test_resolve_host_port_rejects_invalid_binding() -> None:
 
     with pytest.raises(RuntimeError, match="is not an integer"):
         server._resolve_host_port()
+
+
+def test_shared_db_server_skips_private_postgres() -> None:
+    docker_client = MagicMock()
+    shared_db = MagicMock()
+    shared_db.allocate.return_value = DatabaseAllocation(
+        host="imt-shared-db-server",
+        name="smm_team_alpha_smm",
+        user="smm_team_alpha_smm",
+        password="secret")
+
+    server = SMMServer("team-alpha-smm", None, docker_client,
+                       shared_db=shared_db)
+
+    assert server.postgres is None
+    shared_db.allocate.assert_called_once_with(
+        "team-alpha-smm", server.db_net)
+    docker_client.containers.create.assert_not_called()
+
+    server.cleanup()
+
+    shared_db.release.assert_called_once()
+
+
+def test_start_creates_smm_container_while_postgres_boots(
+        mocker: MagicMock) -> None:
+    server = _server()
+    server.db_net = MagicMock()
+    server.external_network = None
+    server.labels = {}
+    server.admin_password = "secret"
+    server._reset_admin_password = False
+    server.admin_email = "admin@example.invalid"
+    server.port = None
+    server.postgres = MagicMock()
+    server.database = DatabaseAllocation(
+        host="db", name="smm", user="postgres", password="pw")
+    mocker.patch.object(server, "_resolve_host_port", return_value=32768)
+    mocker.patch.object(server, "_wait_for_web_startup")
+    calls = MagicMock()
+    calls.attach_mock(server.postgres, "postgres")
+    calls.attach_mock(server.docker_client.containers.create, "create")
+
+    server.start()
+
+    names = [name for name, _, _ in calls.mock_calls]
+    assert names.index("postgres.launch") < names.index("create")
+    assert names.index("create") < names.index("postgres.wait_ready")
+    instance = server.docker_client.containers.create.return_value
+    instance.start.assert_called_once_with()
+    assert server.port == 32768
+
+
+def test_template_admin_password_is_replaced_before_smm_starts(
+        mocker: MagicMock) -> None:
+    docker_client = MagicMock()
+    template = MagicMock()
+    mocker.patch("services.smm.PostgresServer")
+
+    server = SMMServer(
+        "team-alpha-smm", None, docker_client, template=template)
+    mocker.patch.object(server, "_resolve_host_port", return_value=32768)
+    mocker.patch.object(server, "_wait_for_web_startup")
+    postgres = cast(MagicMock, server.postgres)
+    instance = docker_client.containers.create.return_value
+    calls = MagicMock()
+    calls.attach_mock(postgres.run_sql, "run_sql")
+    calls.attach_mock(instance.start, "start")
+
+    server.start()
+
+    assert [name for name, _, _ in calls.mock_calls] == ["run_sql", "start"]
+    statement = postgres.run_sql.call_args.args[0]
+    assert statement.startswith("UPDATE auth_user SET password = 'pbkdf2_")
+    assert server.admin_password not in statement
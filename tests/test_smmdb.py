@@ -0,0 +1,185 @@
+"""
+Unit tests for direct SMM database access.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import smmdb
+from services.postgres import DatabaseAllocation
+
+
+def _smm() -> MagicMock:
+    smm = MagicMock()
+    smm.name = "team-alpha-smm"
+    smm.shared_db = None
+    smm.database = DatabaseAllocation(
+        host="team-alpha-smm-db-server",
+        name="smm",
+        user="postgres",
+        password="secret")
+    smm.postgres.host_port.return_value = 49153
+    smm.postgres.get_password.return_value = "secret"
+    return smm
+
+
+def test_database_server_prefers_own_postgres() -> None:
+    smm = _smm()
+
+    assert smmdb.database_server(smm) is smm.postgres
+
+
+def test_database_server_uses_shared_server() -> None:
+    smm = _smm()
+    smm.postgres = None
+    smm.shared_db = MagicMock()
+
+    assert smmdb.database_server(smm) is smm.shared_db.server
+
+
+def test_connection_info_targets_loopback_port() -> None:
+    assert smmdb.connection_info(_smm()) == {
+        "host": "127.0.0.1",
+        "port": 49153,
+        "dbname": "smm",
+        "user": "postgres",
+        "password": "secret",
+    }
+
+
+def test_reader_connection_uses_a_read_only_role() -> None:
+    smm = _smm()
+    smm.postgres.create_reader.return_value = ("imt_reader_abc", "pw")
+
+    conninfo = smmdb.reader_connection_info(smm)
+
+    assert conninfo["user"] == "imt_reader_abc"
+    assert conninfo["password"] == "pw"
+    database, tables = smm.postgres.create_reader.call_args.args
+    assert database == "smm"
+    assert set(tables) == {
+        "mission_missionorganization",
+        "organization_organization",
+        "mission_missionassetstatus",
+        "assets_asset",
+        "mission_missionassetstatusvalue",
+    }
+
+
+def test_feed_requires_psycopg(mocker: MagicMock) -> None:
+    mocker.patch.object(smmdb, "psycopg", None)
+
+    with pytest.raises(RuntimeError, match="psycopg"):
+        smmdb.MissionOrgFeed({}, MagicMock())
+
+
+def test_open_feed_installs_trigger_and_starts(mocker: MagicMock) -> None:
+    mocker.patch.object(smmdb, "psycopg", MagicMock())
+    feed_cls = mocker.patch("services.smmdb.MissionOrgFeed")
+    smm = _smm()
+    on_added = MagicMock()
+
+    feed = smmdb.open_mission_org_feed(smm, on_added)
+
+    statements = smm.postgres.run_sql.call_args.args
+    assert "AFTER INSERT ON mission_missionorganization" in statements[-1]
+    assert smm.postgres.run_sql.call_args.kwargs == {"database": "smm"}
+    feed_cls.assert_called_once_with(
+        smmdb.connection_info(smm), on_added)
+    feed_cls.return_value.start.assert_called_once_with()
+    assert feed is feed_cls.return_value
+
+
+def test_feed_dispatches_notifications(mocker: MagicMock) -> None:
+    mocker.patch.object(smmdb, "psycopg", MagicMock())
+    on_added = MagicMock()
+    feed = smmdb.MissionOrgFeed({"dbname": "smm"}, on_added)
+
+    feed._dispatch(json.dumps({"mission": 3, "organization": "Police"}))
+    feed._dispatch("not json")
+
+    on_added.assert_called_once_with(3, "Police")
+
+
+def test_failed_notification_asks_for_a_catch_up(mocker: MagicMock) -> None:
+    mocker.patch.object(smmdb, "psycopg", MagicMock())
+    on_added = MagicMock(side_effect=ConnectionError("SMM unavailable"))
+    feed = smmdb.MissionOrgFeed({"dbname": "smm"}, on_added)
+
+    feed._dispatch(json.dumps({"mission": 3, "organization": "Police"}))
+
+    assert feed.generation == 1
+
+
+def test_feed_listens_until_closed(mocker: MagicMock) -> None:
+    psycopg = mocker.patch.object(smmdb, "psycopg", MagicMock())
+    conn = psycopg.connect.return_value.__enter__.return_value
+    on_added = MagicMock()
+    feed = smmdb.MissionOrgFeed({"dbname": "smm"}, on_added)
+
+    def notifies(timeout: float) -> list[SimpleNamespace]:
+        assert feed.live
+        feed._stop.set()
+        return [SimpleNamespace(
+            payload=json.dumps({"mission": 1, "organization": "IMT"}))]
+
+    conn.notifies.side_effect = notifies
+
+    feed._run()
+
+    conn.execute.assert_called_once_with("LISTEN imt_mission_org")
+    on_added.assert_called_once_with(1, "IMT")
+    assert feed.generation == 1
+    assert not feed.live
+
+
+class FakeError(Exception):
+    pass
+
+
+def _reader(mocker: MagicMock) -> tuple[smmdb.SMMStateReader, MagicMock]:
+    psycopg = mocker.patch.object(smmdb, "psycopg", MagicMock())
+    psycopg.Error = FakeError
+    return smmdb.SMMStateReader({"dbname": "smm"}), psycopg
+
+
+def test_reader_connects_read_only_and_reuses_connection(
+        mocker: MagicMock) -> None:
+    reader, psycopg = _reader(mocker)
+    conn = psycopg.connect.return_value
+    conn.execute.return_value.fetchall.return_value = [(1, "IMT")]
+
+    assert reader.mission_organizations(42) == [(1, "IMT")]
+    assert reader.mission_organizations(42) == [(1, "IMT")]
+
+    psycopg.connect.assert_called_once_with(
+        dbname="smm",
+        options="-c default_transaction_read_only=on",
+        autocommit=True)
+    assert conn.execute.call_args.args[1] == (42,)
+
+
+def test_reader_returns_asset_statuses(mocker: MagicMock) -> None:
+    reader, psycopg = _reader(mocker)
+    psycopg.connect.return_value.execute.return_value.fetchall.return_value = [
+        ("Alpha Boat", "Enroute")]
+
+    assert reader.asset_statuses(42) == [("Alpha Boat", "Enroute")]
+
+
+def test_reader_drops_broken_connection(mocker: MagicMock) -> None:
+    reader, psycopg = _reader(mocker)
+    broken = MagicMock()
+    broken.execute.side_effect = FakeError("server closed the connection")
+    healthy = MagicMock()
+    healthy.execute.return_value.fetchall.return_value = []
+    psycopg.connect.side_effect = [broken, healthy]
+
+    with pytest.raises(smmdb.StateReadError, match="server closed"):
+        reader.mission_organizations(42)
+    assert reader.mission_organizations(42) == []
+
+    broken.close.assert_called_once_with()
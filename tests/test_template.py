@@ -0,0 +1,164 @@
+"""
+Unit tests for the golden database template.
+"""
+
+from unittest.mock import MagicMock
+
+import docker.errors
+import pytest
+
+from services.postgres import PostgresServer
+from services.template import TEMPLATE_LABEL, DatabaseTemplate
+
+
+def _docker_client(smm_id: str = "sha256:smm") -> MagicMock:
+    docker_client = MagicMock()
+    images = {
+        "canterburyairpatrol/search-management-map:latest": smm_id,
+        PostgresServer.IMAGE: "sha256:pg",
+    }
+    docker_client.images.get.side_effect = (
+        lambda image: MagicMock(id=images[image]))
+    return docker_client
+
+
+def _volume(name: str, key: str) -> MagicMock:
+    volume = MagicMock()
+    volume.name = name
+    volume.attrs = {"Labels": {TEMPLATE_LABEL: key}}
+    return volume
+
+
+def test_key_changes_with_smm_image() -> None:
+    first = DatabaseTemplate(_docker_client("sha256:one"))
+    second = DatabaseTemplate(_docker_client("sha256:two"))
+
+    assert first.key != second.key
+    assert first.volume_name.startswith("imt-smm-template-")
+
+
+def test_ensure_reuses_existing_template(mocker: MagicMock) -> None:
+    docker_client = _docker_client()
+    template = DatabaseTemplate(docker_client)
+    current = _volume(template.volume_name, template.key)
+    stale = _volume("imt-smm-template-old", "old")
+    docker_client.volumes.get.return_value = current
+    docker_client.volumes.list.return_value = [current, stale]
+    build = mocker.patch.object(template, "_build")
+
+    template.ensure()
+
+    build.assert_not_called()
+    assert template.ready
+    stale.remove.assert_called_once_with(force=True)
+    current.remove.assert_not_called()
+
+
+def test_ensure_builds_missing_template(mocker: MagicMock) -> None:
+    docker_client = _docker_client()
+    template = DatabaseTemplate(docker_client)
+    built = _volume(template.volume_name, template.key)
+    docker_client.volumes.get.side_effect = docker.errors.NotFound("missing")
+    docker_client.volumes.list.return_value = [built]
+    build = mocker.patch.object(template, "_build")
+
+    template.ensure()
+
+    build.assert_called_once_with()
+    assert template.ready
+
+
+def test_build_does_not_label_template_with_secrets(
+        mocker: MagicMock) -> None:
+    docker_client = _docker_client()
+    docker_client.volumes.get.side_effect = docker.errors.NotFound("missing")
+    template = DatabaseTemplate(docker_client)
+    mocker.patch("services.template.SMMServer")
+
+    template._build()
+
+    docker_client.volumes.create.assert_called_once_with(
+        template.volume_name, labels={TEMPLATE_LABEL: template.key})
+
+
+def test_clone_copies_template_volume() -> None:
+    docker_client = _docker_client()
+    template = DatabaseTemplate(docker_client)
+    template.ready = True
+
+    assert template.clone(
+        "team-alpha-data", {"imt-challenge.pool": "imt-pool-abc-smm"},
+    ) == "team-alpha-data"
+
+    docker_client.volumes.create.assert_called_once_with(
+        "team-alpha-data", labels={"imt-challenge.pool": "imt-pool-abc-smm"})
+    volumes = docker_client.containers.run.call_args.kwargs["volumes"]
+    assert volumes[template.volume_name]["mode"] == "ro"
+    assert volumes["team-alpha-data"]["bind"] == "/destination"
+
+
+def test_clone_requires_built_template() -> None:
+    template = DatabaseTemplate(_docker_client())
+
+    with pytest.raises(RuntimeError, match="has not been built"):
+        template.clone("team-alpha-data")
+
+
+def test_postgres_from_template_resets_password(mocker: MagicMock) -> None:
+    docker_client = MagicMock()
+    template = MagicMock()
+    template.clone.return_value = "db-data"
+    mocker.patch.object(PostgresServer, "_wait_for_startup")
+
+    server = PostgresServer(
+        "db", MagicMock(), "smm", docker_client,
+        labels={"imt-challenge.pool": "imt-pool-abc-smm"}, template=template)
+    instance = docker_client.containers.create.return_value
+    instance.exec_run.return_value = MagicMock(exit_code=0)
+    server.start()
+
+    template.clone.assert_called_once_with(
+        "db-data", {"imt-challenge.pool": "imt-pool-abc-smm"})
+    volumes = docker_client.containers.create.call_args.kwargs["volumes"]
+    assert volumes == {"db-data": {
+        "bind": PostgresServer.DATA_DIR, "mode": "rw"}}
+    command = instance.exec_run.call_args.args[0]
+    assert server.get_password() in command[-1]
+
+    server.cleanup()
+
+    docker_client.volumes.get.assert_called_once_with("db-data")
+
+
+def test_failed_copy_is_removed_and_rebuilt(mocker: MagicMock) -> None:
+    docker_client = _docker_client()
+    volumes: dict[str, MagicMock] = {}
+
+    def create(name: str, labels: dict[str, str]) -> MagicMock:
+        volume = _volume(name, labels.get(TEMPLATE_LABEL, ""))
+        volume.remove.side_effect = lambda force: volumes.pop(name)
+        volumes[name] = volume
+        return volume
+
+    def get(name: str) -> MagicMock:
+        if name not in volumes:
+            raise docker.errors.NotFound(name)
+        return volumes[name]
+
+    docker_client.volumes.create.side_effect = create
+    docker_client.volumes.get.side_effect = get
+    docker_client.volumes.list.side_effect = lambda filters: list(
+        volumes.values())
+    docker_client.containers.run.side_effect = [
+        docker.errors.APIError("no space left on device"), None]
+    template = DatabaseTemplate(docker_client)
+    mocker.patch("services.template.SMMServer")
+
+    with pytest.raises(docker.errors.APIError):
+        template.ensure()
+    assert not volumes
+
+    template.ensure()
+
+    assert list(volumes) == [template.volume_name]
+    assert docker_client.containers.run.call_count == 2
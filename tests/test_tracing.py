@@ -0,0 +1,91 @@
+"""
+Unit tests for call tracing.
+"""
+
+import json
+import pathlib
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import docker
+import pytest
+
+from fakes.smmapi import FakeSMMBackend
+from services import metrics, tracing
+
+
+@pytest.fixture
+def tracer() -> Iterator[tracing.Tracer]:
+    tracing.TRACER.enable()
+    yield tracing.TRACER
+    tracing.TRACER.disable()
+
+
+def test_nothing_is_wrapped_or_recorded_when_disabled() -> None:
+    backend = FakeSMMBackend()
+    backend.serve("http://smm", "secret")
+    connection = backend.connect("http://smm", "admin", "secret")
+    get = connection.get
+
+    tracing.trace_smm(connection)
+    with tracing.span("idle", "test"):
+        pass
+
+    assert connection.get == get
+    assert "idle" not in {event["name"] for event in tracing.TRACER.events()}
+
+
+def test_smm_requests_are_named_by_path(tracer: tracing.Tracer) -> None:
+    backend = FakeSMMBackend()
+    backend.serve("http://smm", "secret")
+    connection = backend.connect("http://smm", "admin", "secret")
+    tracing.trace_smm(connection)
+
+    with metrics.participant("alpha-smm"):
+        mission = connection.create_mission("Search", "")
+        connection.get_json(f"/mission/{mission.id}/organizations/")
+
+    spans = [event for event in tracer.events() if event["ph"] == "X"]
+    assert [span["name"] for span in spans] == [
+        "POST /mission/new/",
+        "GET /mission/{id}/organizations/",
+    ]
+    assert {span["args"]["participant"] for span in spans} == {"alpha-smm"}
+    assert all(span["dur"] >= 0 for span in spans)
+
+
+def test_docker_api_calls_are_traced(
+        tracer: tracing.Tracer,
+        mocker: MagicMock) -> None:
+    client = docker.DockerClient(
+        base_url="tcp://127.0.0.1:1", version="1.45")
+    tracing.trace_docker(client)
+    mocker.patch.object(client.api, "_get")
+    mocker.patch.object(
+        client.api, "_result", side_effect=docker.errors.NotFound("gone"))
+
+    with pytest.raises(docker.errors.NotFound):
+        client.api.inspect_container("abc")
+
+    spans = [event for event in tracer.events() if event["ph"] == "X"]
+    assert [span["name"] for span in spans] == ["docker.inspect_container"]
+    assert spans[0]["args"]["error"] == "NotFound"
+    # The requests.Session methods underneath are left alone
+    assert not hasattr(client.api.get, "__wrapped__")
+    client.close()
+
+
+def test_trace_is_written_with_thread_names(
+        tracer: tracing.Tracer,
+        tmp_path: pathlib.Path) -> None:
+    with tracer.span("pull", "docker"):
+        pass
+    path = tmp_path / "trace.json"
+
+    tracer.write(str(path))
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert events[0]["ph"] == "M"
+    assert events[0]["args"]["name"] == "MainThread"
+    assert events[1]["name"] == "pull"
+    assert events[1]["tid"] == events[0]["tid"]
@@ -27,11 +27,13 @@ def test_vehicle_constructor_cleans_up_partial_create(
 
     docker_client.networks.get.side_effect = docker.errors.NotFound("missing")
     docker_client.networks.create.return_value = net
-    docker_client.containers.create.side_effect = [apm, mavproxy]
-    docker_client.images.pull.side_effect = docker.errors.APIError(
-        "pull failed")
+    docker_client.containers.create.side_effect = [
+        apm,
+        mavproxy,
+        docker.errors.APIError("create failed"),
+    ]
     mocker.patch(
-        "services.vehicle.docker.from_env",
+        "services.vehicle.get_docker_client",
         return_value=docker_client)
 
     with pytest.raises(docker.errors.APIError):
@@ -40,7 +42,6 @@ def test_vehicle_constructor_cleans_up_partial_create(
     apm.remove.assert_called_once_with(force=True)
     mavproxy.remove.assert_called_once_with(force=True)
     net.remove.assert_called_once_with()
-    docker_client.close.assert_called_once_with()
 
 
 def test_vehicle_constructor_preserves_create_failure_when_cleanup_fails(
@@ -49,11 +50,14 @@ def test_vehicle_constructor_preserves_create_failure_when_cleanup_fails(
     net = MagicMock()
     docker_client.networks.get.side_effect = docker.errors.NotFound("missing")
     docker_client.networks.create.return_value = net
-    docker_client.containers.create.return_value = MagicMock()
-    original_error = docker.errors.APIError("pull failed")
-    docker_client.images.pull.side_effect = original_error
+    original_error = docker.errors.APIError("create failed")
+    docker_client.containers.create.side_effect = [
+        MagicMock(),
+        MagicMock(),
+        original_error,
+    ]
     mocker.patch(
-        "services.vehicle.docker.from_env",
+        "services.vehicle.get_docker_client",
         return_value=docker_client)
     mocker.patch(
         "services.vehicle.remove_container",
@@ -63,21 +67,34 @@ def test_vehicle_constructor_preserves_create_failure_when_cleanup_fails(
         Vehicle("Alpha Boat", "Rover", _smm_server(), "user", "pass")
 
     assert excinfo.value is original_error
-    docker_client.close.assert_called_once_with()
 
 
-def test_vehicle_constructor_closes_docker_client(
+def test_vehicle_constructor_keeps_shared_docker_client_open(
         mocker: MagicMock) -> None:
     docker_client = MagicMock()
     docker_client.networks.get.return_value = MagicMock()
     docker_client.containers.create.return_value = MagicMock()
     mocker.patch(
-        "services.vehicle.docker.from_env",
+        "services.vehicle.get_docker_client",
+        return_value=docker_client)
+
+    Vehicle("Alpha Boat", "Rover", _smm_server(), "user", "pass")
+
+    docker_client.close.assert_not_called()
+
+
+def test_vehicle_create_does_not_pull_images(mocker: MagicMock) -> None:
+    docker_client = MagicMock()
+    mocker.patch(
+        "services.vehicle.get_docker_client",
         return_value=docker_client)
 
     Vehicle("Alpha Boat", "Rover", _smm_server(), "user", "pass")
 
-    docker_client.close.assert_called_once_with()
+    docker_client.images.pull.assert_not_called()
+    images = [
+        c.args[0] for c in docker_client.containers.create.call_args_list]
+    assert images == Vehicle.images("Rover")
 
 
 def test_vehicle_start_requires_created_containers() -> None:
@@ -89,3 +106,16 @@ def test_vehicle_start_requires_created_containers() -> None:
 
     with pytest.raises(RuntimeError, match="no SITL container"):
         vehicle.start()
+
+
+def test_vehicle_sitl_runs_at_the_mission_speedup(mocker: MagicMock) -> None:
+    docker_client = MagicMock()
+    mocker.patch(
+        "services.vehicle.get_docker_client",
+        return_value=docker_client)
+
+    Vehicle(
+        "Alpha Boat", "Rover", _smm_server(), "user", "pass", speedup=10.0)
+
+    sitl = docker_client.containers.create.call_args_list[0]
+    assert "SPEEDUP=10" in sitl.kwargs["environment"]